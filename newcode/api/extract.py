@@ -1,1240 +1,2957 @@
-import os
-from flask import Flask, request, jsonify, render_template
-import asyncio
-import json
-import re
-import time
-import csv
-import io
-from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
-
-# Get the directory of the current script and find templates
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(current_dir)
-template_dir = os.path.join(project_root, 'templates')
-
-app = Flask(__name__, template_folder=template_dir)
-
-# Constants
-UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
-
-PRICE_RE = re.compile(r'(?:£|\$|€)\s?[0-9][0-9\.,]*')
-
-def parse_price_value(price_str):
-    """Extract numeric value from price string"""
-    if not price_str:
-        return None
-    
-    # Remove currency symbols and clean the string
-    cleaned = re.sub(r'[£$€,\s]', '', str(price_str))
-    
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
-
-def compare_prices(our_price, competitor_price):
-    """Compare our price with competitor price"""
-    our_val = parse_price_value(our_price)
-    comp_val = parse_price_value(competitor_price)
-    
-    if our_val is None or comp_val is None:
-        return 'unknown'
-    
-    if our_val < comp_val:
-        return 'lower'  # We are cheaper
-    elif our_val > comp_val:
-        return 'higher'  # We are more expensive
-    else:
-        return 'equal'
-
-def format_comparison_result(comparison, our_price, competitor_price):
-    """Format comparison result with recommendations"""
-    our_val = parse_price_value(our_price)
-    comp_val = parse_price_value(competitor_price)
-    
-    if our_val is None or comp_val is None:
-        return {
-            'status': 'unknown',
-            'message': 'Unable to compare prices',
-            'difference': 'N/A',
-            'recommendation': 'Check price formats'
-        }
-    
-    if comparison == 'lower':
-        difference = comp_val - our_val
-        percentage = round((difference / comp_val) * 100, 2)
-        return {
-            'status': 'competitive',
-            'message': f'Our price is {percentage}% lower than competitor',
-            'difference': f'+{difference:.2f}',
-            'recommendation': 'Good position - we are cheaper'
-        }
-    elif comparison == 'higher':
-        difference = our_val - comp_val
-        percentage = round((difference / our_val) * 100, 2)
-        return {
-            'status': 'expensive',
-            'message': f'Our price is {percentage}% higher than competitor',
-            'difference': f'-{difference:.2f}',
-            'recommendation': 'Consider price adjustment to be more competitive'
-        }
-    elif comparison == 'equal':
-        return {
-            'status': 'equal',
-            'message': 'Prices are equal',
-            'difference': '0.00',
-            'recommendation': 'Consider slight reduction to gain competitive edge'
-        }
-    else:
-        return {
-            'status': 'unknown',
-            'message': 'Unable to compare prices',
-            'difference': 'N/A',
-            'recommendation': 'Check price formats'
-        }
-
-def parse_csv_content(csv_content):
-    """Parse CSV content and extract product data"""
-    try:
-        # Parse CSV content
-        csv_reader = csv.DictReader(io.StringIO(csv_content))
-        products = []
-        
-        for row in csv_reader:
-            # Extract product information
-            product_name = row.get('product_name', '').strip()
-            our_price = row.get('our_price', '').strip()
-            
-            # Extract competitor URLs (looking for columns with 'competitor' or 'url')
-            competitor_urls = []
-            for key, value in row.items():
-                if ('competitor' in key.lower() or 'url' in key.lower()) and value.strip():
-                    competitor_urls.append(value.strip())
-            
-            if product_name and our_price and competitor_urls:
-                products.append({
-                    'product_name': product_name,
-                    'our_price': our_price,
-                    'competitor_urls': competitor_urls
-                })
-        
-        return products
-    except Exception as e:
-        raise Exception(f"Error parsing CSV: {str(e)}")
-
-def process_product_comparison(product_data):
-    """Process a single product's price comparison"""
-    try:
-        product_name = product_data['product_name']
-        our_price = product_data['our_price']
-        competitor_urls = product_data['competitor_urls']
-        
-        # Extract prices from competitor URLs
-        competitor_results = []
-        
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_url = {executor.submit(extract_single_price, url): url for url in competitor_urls}
-            
-            for future in concurrent.futures.as_completed(future_to_url, timeout=60):
-                try:
-                    result = future.result()
-                    url = future_to_url[future]
-                    
-                    if result['price']:
-                        comparison = compare_prices(our_price, result['price'])
-                        comparison_details = format_comparison_result(comparison, our_price, result['price'])
-                        
-                        # Add price type information to details
-                        price_details = result.get('price_details', {})
-                        # Ensure comparison_details is a dictionary that can hold any type
-                        comparison_details = dict(comparison_details)
-                        comparison_details['competitor_price_info'] = {
-                            'actual_price': result['price'],
-                            'price_type': price_details.get('price_type', 'unknown'),
-                            'original_price': price_details.get('original_price'),
-                            'discount_percentage': price_details.get('discount_percentage')
-                        }
-                        
-                        # Add discount information to the message if available
-                        if price_details.get('discount_percentage'):
-                            comparison_details['competitor_discount'] = f"Competitor has {price_details['discount_percentage']}% discount"
-                        
-                        competitor_results.append({
-                            'url': url,
-                            'price': result['price'],
-                            'price_details': price_details,
-                            'comparison': comparison,
-                            'details': comparison_details,
-                            'status': 'success'
-                        })
-                    else:
-                        competitor_results.append({
-                            'url': url,
-                            'price': None,
-                            'price_details': result.get('price_details', {}),
-                            'comparison': 'unknown',
-                            'details': {'status': 'no_price', 'message': 'No price found'},
-                            'status': 'no_price_found'
-                        })
-                except Exception as e:
-                    url = future_to_url[future]
-                    competitor_results.append({
-                        'url': url,
-                        'price': None,
-                        'price_details': {},
-                        'comparison': 'error',
-                        'details': {'status': 'error', 'message': str(e)},
-                        'status': 'error'
-                    })
-        
-        # Generate summary
-        successful_comparisons = [r for r in competitor_results if r['status'] == 'success']
-        lower_count = len([r for r in successful_comparisons if r['comparison'] == 'lower'])
-        higher_count = len([r for r in successful_comparisons if r['comparison'] == 'higher'])
-        equal_count = len([r for r in successful_comparisons if r['comparison'] == 'equal'])
-        
-        overall_recommendation = 'competitive' if lower_count >= higher_count else 'consider_adjustment'
-        
-        return {
-            'product_name': product_name,
-            'our_price': our_price,
-            'competitor_results': competitor_results,
-            'summary': {
-                'total_competitors': len(competitor_urls),
-                'successful_extractions': len(successful_comparisons),
-                'lower_than_competitors': lower_count,
-                'higher_than_competitors': higher_count,
-                'equal_to_competitors': equal_count,
-                'overall_recommendation': overall_recommendation
-            },
-            'status': 'success'
-        }
-        
-    except Exception as e:
-        return {
-            'product_name': product_data.get('product_name', 'Unknown'),
-            'our_price': product_data.get('our_price', 'Unknown'),
-            'competitor_results': [],
-            'summary': {},
-            'status': 'error',
-            'error': str(e)
-        }
-
-def extract_price_with_type(html_content, url):
-    """Extract price with type classification (original, sale, current)"""
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # STEP 1: Detect main product area to avoid suggested products
-        main_product_area = detect_main_product_area(soup)
-        
-        # Initialize price data structure
-        price_data = {
-            'current_price': None,
-            'original_price': None,
-            'sale_price': None,
-            'price_type': 'unknown',
-            'discount_percentage': None,
-            'best_price': None  # The actual selling price to use for comparison
-        }
-        
-        # Strategy 1: JSON-LD structured data with price analysis
-        json_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_scripts:
-            try:
-                data = json.loads(script.string)
-                structured_prices = extract_structured_prices(data)
-                if structured_prices:
-                    price_data.update(structured_prices)
-                    if price_data['best_price']:
-                        return price_data
-            except:
-                continue
-        
-        # Strategy 2: Smart CSS selector analysis for different price types
-        price_selectors = {
-            'sale_price': [
-                # Common sale price selectors
-                '.sale-price', '.price-sale', '.discounted-price', '.offer-price',
-                '.deal-price', '.reduced-price', '.special-price', '.promo-price',
-                '.price-now', '.price-current', '.current-price', '.final-price',
-                '.price-reduced', '.price-special', '.price-discount',
-                
-                # Specific e-commerce patterns
-                '.price-box .price:not(.was-price)', '.price-container .price:not(.original)',
-                '.product-price .current', '.sale .price', '.discount .price',
-                '.offer .price', '.special .price',
-                
-                # Data attributes and test IDs
-                '[data-testid*="sale"]', '[data-testid*="current"]', '[data-testid*="offer"]',
-                '[data-price-type="sale"]', '[data-price-type="current"]',
-                '[data-automation-id*="price-current"]',
-                
-                # Additional common patterns
-                '.price-value:not(.was)', '.main-price:not(.original)',
-                '.product-price-value:not(.crossed)', '.price-primary',
-                '.price-big', '.price-large', '.price-main'
-            ],
-            'original_price': [
-                # Original/was price selectors
-                '.original-price', '.regular-price', '.was-price', '.old-price',
-                '.price-was', '.price-original', '.price-regular', '.list-price',
-                '.msrp', '.rrp', '.crossed-price', '.strike-price',
-                '.price-strike', '.price-crossed', '.price-before', '.price-old',
-                '.rrp-price', '.before-price', '.prev-price', '.previous-price',
-                
-                # Specific patterns for crossed-out prices
-                'del .price', 's .price', '.strikethrough .price',
-                '.line-through .price', '.text-decoration-line-through .price',
-                
-                # Data attributes
-                '[data-testid*="was"]', '[data-testid*="original"]', '[data-testid*="regular"]',
-                '[data-price-type="was"]', '[data-price-type="original"]',
-                '[data-automation-id*="price-was"]', '[data-automation-id*="price-original"]'
-            ],
-            'current_price': [
-                # General price selectors (fallback)
-                '.price', '.product-price', '.woocommerce-Price-amount', '.amount',
-                '[itemprop="price"]', '[data-price]', '.price-current',
-                '.product-price-value', '.price-box .price', '.final-price',
-                '.price-display', '.price-value', '.product-price-amount'
-            ]
-        }
-        
-        # Extract prices by type - FOCUS ON MAIN PRODUCT AREA
-        extracted_prices = {}
-        for price_type, selectors in price_selectors.items():
-            prices = []
-            for selector in selectors:
-                # Search within main product area first
-                elements = main_product_area.select(selector)
-                for element in elements:
-                    # Check if this element is from suggested products area
-                    if is_suggested_product_area(element):
-                        continue  # Skip suggested product prices
-                    
-                    # Skip if element is hidden or has display: none
-                    style = element.get('style', '')
-                    if isinstance(style, str):
-                        if 'display:none' in style.replace(' ', '') or 'display: none' in style:
-                            continue
-                    
-                    # Enhanced crossed-out price detection
-                    element_classes = element.get('class', [])
-                    element_style = element.get('style', '')
-                    parent_classes = element.parent.get('class', []) if element.parent else []
-                    parent_style = element.parent.get('style', '') if element.parent else ''
-                    
-                    # Convert to lists if strings
-                    if isinstance(element_classes, str):
-                        element_classes = [element_classes]
-                    if isinstance(parent_classes, str):
-                        parent_classes = [parent_classes]
-                    
-                    # Check for crossed-out indicators
-                    crossed_out_indicators = [
-                        'strike', 'strikethrough', 'line-through', 'text-decoration-line-through',
-                        'crossed', 'was-price', 'old-price', 'original-price', 'regular-price',
-                        'rrp', 'msrp', 'list-price', 'before-price', 'was', 'orig'
-                    ]
-                    
-                    # Check element and parent for crossed-out indicators
-                    all_classes = element_classes + parent_classes
-                    all_styles = [str(element_style), str(parent_style)]
-                    
-                    is_crossed_out = any(
-                        indicator in ' '.join(all_classes).lower() or 
-                        indicator in ' '.join(all_styles).lower() or
-                        'text-decoration: line-through' in str(element_style).lower() or
-                        'text-decoration:line-through' in str(element_style).lower()
-                        for indicator in crossed_out_indicators
-                    )
-                    
-                    # Additional visual checks for crossed-out prices
-                    if element.name == 's' or element.name == 'del':  # HTML strikethrough tags
-                        is_crossed_out = True
-                    
-                    # Skip crossed-out prices when looking for sale/current prices
-                    if price_type in ['sale_price', 'current_price'] and is_crossed_out:
-                        continue
-                    
-                    text = element.get_text().strip()
-                    if text and PRICE_RE.search(text):
-                        match = PRICE_RE.search(text)
-                        if match:
-                            price_value = match.group(0)
-                            prices.append({
-                                'value': price_value,
-                                'element': element,
-                                'is_crossed': is_crossed_out,
-                                'selector': selector,
-                                'confidence': calculate_main_product_confidence(element, price_type, is_crossed_out)
-                            })
-            extracted_prices[price_type] = prices
-        
-        # Strategy 3: Analyze price relationships and context
-        price_data = analyze_price_relationships(extracted_prices, soup)
-        
-        # Strategy 4: Fallback - find most prominent price IN MAIN PRODUCT AREA
-        if not price_data['best_price']:
-            all_price_elements = main_product_area.find_all(text=PRICE_RE)
-            price_candidates = []
-            
-            for text_node in all_price_elements:
-                if text_node.parent:
-                    element = text_node.parent
-                    
-                    # Skip if from suggested products area
-                    if is_suggested_product_area(element):
-                        continue
-                    
-                    price_match = PRICE_RE.search(str(text_node))
-                    if price_match:
-                        price_value = price_match.group(0)
-                        
-                        # Skip if element or parent has crossed-out indicators
-                        element_classes = ' '.join(element.get('class', [])).lower()
-                        parent_classes = ' '.join(element.parent.get('class', [])).lower() if element.parent else ''
-                        
-                        is_crossed = any(indicator in element_classes or indicator in parent_classes 
-                                       for indicator in ['strike', 'crossed', 'was', 'old', 'original', 'regular'])
-                        
-                        if element.name in ['s', 'del'] or element.parent and element.parent.name in ['s', 'del']:
-                            is_crossed = True
-                        
-                        if not is_crossed:  # Only consider non-crossed-out prices
-                            confidence = calculate_main_product_confidence(element, 'current_price', is_crossed)
-                            price_candidates.append({
-                                'value': price_value,
-                                'confidence': confidence,
-                                'element': element
-                            })
-            
-            if price_candidates:
-                # Sort by confidence and take the best one
-                price_candidates.sort(key=lambda x: x['confidence'], reverse=True)
-                best_candidate = price_candidates[0]
-                price_data['current_price'] = best_candidate['value']
-                price_data['best_price'] = best_candidate['value']
-                price_data['price_type'] = 'regular'
-        
-        return price_data
-        
-    except Exception as e:
-        print(f"Error extracting price from {url}: {str(e)}")
-        return {
-            'current_price': None,
-            'original_price': None,
-            'sale_price': None,
-            'price_type': 'error',
-            'discount_percentage': None,
-            'best_price': None
-        }
-
-def calculate_price_confidence(element, price_type, is_crossed_out):
-    """Calculate confidence score for price based on element attributes"""
-    confidence = 50  # Base confidence
-    
-    # Reduce confidence for crossed-out prices
-    if is_crossed_out:
-        confidence -= 30
-    
-    # Increase confidence for sale price indicators
-    element_classes = ' '.join(element.get('class', [])).lower()
-    element_text = element.get_text().lower()
-    
-    sale_indicators = ['sale', 'discount', 'offer', 'special', 'deal', 'reduced', 'now']
-    original_indicators = ['was', 'orig', 'regular', 'list', 'rrp', 'msrp']
-    
-    if price_type == 'sale_price':
-        if any(indicator in element_classes or indicator in element_text for indicator in sale_indicators):
-            confidence += 20
-        if any(indicator in element_classes or indicator in element_text for indicator in original_indicators):
-            confidence -= 15
-    
-    elif price_type == 'original_price':
-        if any(indicator in element_classes or indicator in element_text for indicator in original_indicators):
-            confidence += 20
-        if any(indicator in element_classes or indicator in element_text for indicator in sale_indicators):
-            confidence -= 15
-    
-    # Check element prominence (font size, position)
-    style = element.get('style', '')
-    if 'font-size' in style:
-        # Larger fonts typically indicate more prominent prices
-        if any(size in style for size in ['large', 'xl', '2em', '1.5em']):
-            confidence += 10
-        elif any(size in style for size in ['small', 'xs', '0.8em', '0.9em']):
-            confidence -= 10
-    
-    # Check for price position context
-    parent = element.parent
-    if parent:
-        parent_classes = ' '.join(parent.get('class', [])).lower()
-        if 'price-box' in parent_classes or 'price-container' in parent_classes:
-            confidence += 15
-    
-    return max(0, min(100, confidence))  # Clamp between 0-100
-
-def detect_main_product_area(soup):
-    """Detect the main product area to avoid suggested/related products"""
-    main_product_selectors = [
-        # Amazon main product area
-        '#dp-container', '#feature-bullets', '#apex_desktop', '#centerCol',
-        '.a-section[data-feature-name="detailBullets"]', '#productDetails_feature_div',
-        '#ppd', '#dp', '#detail-main', '#detail-bullets', '#feature-bullets',
-        
-        # Generic main product containers
-        '.product-main', '.product-detail', '.product-info', '.main-product',
-        '.product-container', '.product-wrapper', '.pd-wrap', '.pdp-container',
-        '.product-details-main', '.product-page-main', '.item-details',
-        '.product-content', '.product-summary', '.product-overview',
-        
-        # E-commerce specific patterns
-        '[data-testid="product-container"]', '[data-testid="main-product"]',
-        '[data-automation-id="product-main"]', '.js-product-container',
-        '[data-module="ProductDetails"]', '[data-component="ProductInfo"]',
-        
-        # John Lewis / Currys / Argos specific
-        '.product-overview', '.product-summary', '.product-hero',
-        '.pdp-product-overview', '.product-information-wrapper',
-        '.product-details-container', '.product-info-main',
-        
-        # ASOS / Next / Zara patterns
-        '.product-hero', '.pdp-product', '.product-detail-wrapper',
-        '.product-information', '.product-details-wrapper',
-        
-        # eBay patterns
-        '.x-buybox', '.notranslate', '#mainContent', '.vim',
-        
-        # Shopify patterns
-        '.product-single', '.product-form', '.product-detail',
-        '.shopify-section', '[data-section-type="product"]',
-        
-        # WooCommerce patterns
-        '.woocommerce-product-details', '.product', '.single-product',
-        '.woocommerce .product', '.product-summary',
-        
-        # Schema.org product containers
-        '[itemtype*="Product"]', '[itemscope][itemtype*="Product"]',
-        
-        # Common content areas
-        '#content', '#main-content', '.main-content', '.content-main',
-        '.page-content', '.container-main', '#primary-content'
-    ]
-    
-    # Try to find main product area with higher specificity first
-    for selector in main_product_selectors:
-        main_area = soup.select_one(selector)
-        if main_area:
-            # Validate that this area actually contains product information
-            area_text = main_area.get_text().lower()
-            product_indicators = ['price', 'buy', 'add to cart', 'purchase', 'description']
-            
-            if any(indicator in area_text for indicator in product_indicators):
-                return main_area
-    
-    # Fallback: try to identify by largest content area with product info
-    potential_areas = soup.find_all(['div', 'section', 'article', 'main'], class_=True)
-    scored_areas = []
-    
-    for area in potential_areas:
-        score = score_product_area(area)
-        if score > 30:  # Minimum threshold
-            scored_areas.append((area, score))
-    
-    if scored_areas:
-        # Return the highest scoring area
-        scored_areas.sort(key=lambda x: x[1], reverse=True)
-        return scored_areas[0][0]
-    
-    # Last resort: return body (full page) but with warning
-    return soup
-
-def score_product_area(element):
-    """Score an element's likelihood of being the main product area"""
-    score = 0
-    
-    # Check classes for product indicators
-    classes = ' '.join(element.get('class', [])).lower()
-    
-    # Positive indicators
-    product_indicators = [
-        'product', 'item', 'detail', 'main', 'primary', 'hero', 'overview',
-        'summary', 'information', 'description', 'specification'
-    ]
-    
-    for indicator in product_indicators:
-        if indicator in classes:
-            score += 15
-    
-    # Check for price elements (good sign)
-    price_elements = element.find_all(text=PRICE_RE)
-    score += min(len(price_elements) * 5, 20)  # Cap at 20 points
-    
-    # Check for product schema
-    if element.get('itemtype') and 'Product' in element.get('itemtype', ''):
-        score += 25
-    
-    # Check size (larger areas more likely to be main product)
-    text_length = len(element.get_text().strip())
-    if text_length > 500:
-        score += 10
-    elif text_length > 1000:
-        score += 15
-    
-    # Negative indicators (likely suggested products)
-    negative_indicators = [
-        'suggest', 'recommend', 'related', 'similar', 'also', 'bought',
-        'viewed', 'cross-sell', 'upsell', 'bundle', 'accessory'
-    ]
-    
-    for negative in negative_indicators:
-        if negative in classes:
-            score -= 20
-    
-    # Check for multiple product links (suggests listing/suggestions)
-    product_links = element.find_all('a', href=True)
-    if len(product_links) > 5:  # Too many links suggests it's a listing
-        score -= 10
-    
-    return score
-
-def is_suggested_product_area(element):
-    """Check if an element is likely from suggested/related products section"""
-    # First check if element is in a confirmed main product area
-    current = element
-    for level in range(3):
-        if current.parent:
-            current = current.parent
-            parent_classes = ' '.join(current.get('class', [])).lower()
-            parent_id = current.get('id', '').lower()
-            
-            # If we're in a confirmed main product area, NOT a suggestion
-            main_product_confirmations = [
-                'centerCol', 'dp-container', 'feature-bullets', 'product-main',
-                'main-product', 'product-detail', 'buybox', 'product-summary'
-            ]
-            
-            for confirmation in main_product_confirmations:
-                if confirmation in parent_classes or confirmation in parent_id:
-                    return False  # Definitely not a suggestion area
-        else:
-            break
-    
-    # Now check for suggested product indicators
-    element_text = element.get_text().lower()
-    classes = ' '.join(element.get('class', [])).lower()
-    element_id = element.get('id', '').lower()
-    
-    # Check parent elements up to 5 levels for suggestion indicators
-    current = element
-    for level in range(5):
-        if current.parent:
-            current = current.parent
-            parent_classes = ' '.join(current.get('class', [])).lower()
-            parent_text = current.get_text().lower()
-            parent_id = current.get('id', '').lower()
-            
-            # Enhanced suggested product text patterns
-            suggestion_patterns = [
-                'customers who bought', 'also bought', 'you might like', 'you may also like',
-                'recommended', 'related products', 'similar items', 'similar products',
-                'frequently bought together', 'customers also viewed', 'people also bought',
-                'inspired by your', 'because you viewed', 'suggestions', 'recommended for you',
-                'cross-sell', 'upsell', 'bundle', 'add-on', 'accessory', 'accessories',
-                'complete your look', 'goes well with', 'pair with', 'bundle deals',
-                'other customers', 'shoppers also', 'more like this', 'you might also need',
-                'trending now', 'best sellers', 'top picks', 'featured products',
-                'sponsored', 'advertisement', 'ad ', 'promoted', 'compare with similar',
-                'alternative products', 'other options', 'more choices', 'explore similar',
-                'recently viewed', 'your history', 'continue shopping', 'shop more'
-            ]
-            
-            for pattern in suggestion_patterns:
-                if (pattern in parent_text or pattern in parent_classes or 
-                    pattern in parent_id or pattern in classes or pattern in element_id):
-                    return True
-            
-            # Enhanced CSS class/ID indicators (but exclude main product areas)
-            suggestion_identifiers = [
-                'recommend', 'suggest', 'related', 'similar', 'also', 'other',
-                'cross-sell', 'upsell', 'bundle', 'accessory', 'addon', 'add-on',
-                'carousel', 'slider', 'grid-item', 'tile', 'card-grid',
-                'recently-viewed', 'trending', 'featured', 'sponsored', 'ad-',
-                'promotion', 'promo', 'deal-', 'offer-', 'sale-grid', 'product-grid',
-                'listing', 'catalog', 'search-result', 'filter-result',
-                'sidebar', 'aside', 'footer-products', 'header-products'
-            ]
-            
-            all_identifiers = parent_classes + ' ' + parent_id + ' ' + classes + ' ' + element_id
-            for identifier in suggestion_identifiers:
-                if identifier in all_identifiers:
-                    return True
-            
-            # Check for multiple product links in container (indicates listing/suggestions)
-            if level <= 2:  # Only check close parents
-                product_links = current.find_all('a', href=True)
-                product_prices = current.find_all(text=PRICE_RE)
-                
-                # If container has many products, likely a suggestions area
-                if len(product_links) > 4 or len(product_prices) > 3:
-                    return True
-            
-            # Check for specific e-commerce suggestion containers
-            ecommerce_suggestion_patterns = [
-                'recommendations', 'similar-products', 'related-items', 
-                'also-bought', 'you-might-like', 'frequently-together',
-                'cross-sells', 'up-sells', 'product-recommendations',
-                'recommended-products', 'suggestion-container', 'rec-container'
-            ]
-            
-            for pattern in ecommerce_suggestion_patterns:
-                if (pattern in parent_classes or pattern in parent_id or 
-                    pattern.replace('-', '_') in parent_classes or 
-                    pattern.replace('-', '') in parent_classes):
-                    return True
-        else:
-            break
-    
-    return False
-
-def calculate_main_product_confidence(element, price_type, is_crossed_out):
-    """Enhanced confidence calculation for main product area pricing"""
-    confidence = calculate_price_confidence(element, price_type, is_crossed_out)
-    
-    # HEAVILY penalize if element is in suggested product area
-    if is_suggested_product_area(element):
-        confidence -= 70  # Increased penalty from 50 to 70
-        return max(0, confidence)  # Early return for suggested products
-    
-    # Major bonus for being in main product context
-    current = element
-    main_product_bonus = 0
-    
-    for level in range(7):  # Check up to 7 parent levels
-        if current.parent:
-            current = current.parent
-            parent_classes = ' '.join(current.get('class', [])).lower()
-            parent_id = current.get('id', '').lower()
-            
-            # Main product area indicators with different weights
-            primary_indicators = [
-                ('product-main', 25), ('main-product', 25), ('product-detail', 20),
-                ('product-info', 20), ('product-container', 18), ('product-summary', 22),
-                ('product-overview', 20), ('centerCol', 30), ('dp-container', 30),
-                ('feature-bullets', 25), ('pdp-container', 22)
-            ]
-            
-            secondary_indicators = [
-                ('product-wrapper', 15), ('pd-wrap', 15), ('product-content', 18),
-                ('item-details', 15), ('product-hero', 20), ('buybox', 25),
-                ('product-form', 18), ('main-content', 12), ('primary-content', 15)
-            ]
-            
-            # Check primary indicators (higher bonus)
-            for indicator, bonus in primary_indicators:
-                if indicator in parent_classes or indicator in parent_id:
-                    main_product_bonus = max(main_product_bonus, bonus)
-                    break
-            
-            # Check secondary indicators if no primary found
-            if main_product_bonus == 0:
-                for indicator, bonus in secondary_indicators:
-                    if indicator in parent_classes or indicator in parent_id:
-                        main_product_bonus = max(main_product_bonus, bonus)
-            
-            # Special bonus for schema.org product markup
-            if current.get('itemtype') and 'Product' in current.get('itemtype', ''):
-                main_product_bonus = max(main_product_bonus, 20)
-            
-            # Bonus for data attributes indicating main product
-            data_attrs = ['data-testid', 'data-automation-id', 'data-component', 'data-module']
-            for attr in data_attrs:
-                attr_value = current.get(attr, '').lower()
-                if any(term in attr_value for term in ['product', 'main', 'detail', 'info']):
-                    main_product_bonus = max(main_product_bonus, 15)
-                    break
-        else:
-            break
-    
-    confidence += main_product_bonus
-    
-    # Enhanced position-based scoring
-    page_position_score = 0
-    try:
-        # Calculate element depth and sibling position
-        depth = 0
-        sibling_position = 0
-        current = element
-        
-        # Get sibling position (earlier elements are more likely main product)
-        if element.parent:
-            siblings = list(element.parent.children)
-            sibling_position = next((i for i, sibling in enumerate(siblings) if sibling == element), 0)
-        
-        # Calculate depth from root
-        while current.parent and depth < 15:
-            depth += 1
-            current = current.parent
-        
-        # Scoring based on position heuristics
-        if depth < 6:  # Very shallow = likely main content
-            page_position_score = 15
-        elif depth < 10:  # Reasonable depth
-            page_position_score = 8
-        elif depth < 15:  # Deep but acceptable
-            page_position_score = 3
-        
-        # Bonus for being among first elements (early in DOM)
-        if sibling_position < 3:
-            page_position_score += 5
-        
-    except:
-        pass
-    
-    confidence += page_position_score
-    
-    # Enhanced container analysis
-    parent_container = element.parent
-    if parent_container:
-        # Count prices in same container
-        sibling_prices = len(parent_container.find_all(text=PRICE_RE))
-        
-        # Penalize containers with too many prices (suggests listing)
-        if sibling_prices > 4:
-            confidence -= 20
-        elif sibling_prices > 2:
-            confidence -= 10
-        
-        # Check container size (larger containers more likely main product)
-        container_text_length = len(parent_container.get_text().strip())
-        if container_text_length > 1000:  # Large container
-            confidence += 8
-        elif container_text_length > 500:  # Medium container
-            confidence += 5
-        elif container_text_length < 100:  # Very small container (suspicious)
-            confidence -= 5
-    
-    # Price type specific adjustments
-    if price_type == 'sale_price' and not is_crossed_out:
-        confidence += 5  # Prefer clear sale prices
-    elif price_type == 'current_price' and not is_crossed_out:
-        confidence += 3  # Prefer current prices over crossed-out
-    
-    return max(0, min(100, confidence))  # Clamp between 0-100
-
-def extract_structured_prices(data):
-    """Extract prices from JSON-LD structured data with type detection"""
-    from typing import Dict, Any
-    prices: Dict[str, Any] = {'current_price': None, 'original_price': None, 'sale_price': None}
-    
-    def find_prices_recursive(obj):
-        if isinstance(obj, list):
-            for item in obj:
-                result = find_prices_recursive(item)
-                if result:
-                    return result
-        elif isinstance(obj, dict):
-            # Check if this object has @graph
-            if "@graph" in obj:
-                return find_prices_recursive(obj["@graph"])
-            
-            # Check if this is a product/offer object
-            if obj.get("@type") in ("Product", "Offer", "AggregateOffer"):
-                # Check offers array
-                if "offers" in obj:
-                    offers = obj["offers"]
-                    if isinstance(offers, list) and offers:
-                        offers = offers[0]
-                    
-                    if isinstance(offers, dict):
-                        # Look for different price types
-                        if "price" in offers:
-                            prices['current_price'] = str(offers["price"])
-                        if "highPrice" in offers:
-                            prices['original_price'] = str(offers["highPrice"])
-                        if "lowPrice" in offers:
-                            prices['sale_price'] = str(offers["lowPrice"])
-                        
-                        # Return if we found prices
-                        if any(prices.values()):
-                            return prices
-                
-                # Check direct price
-                if "price" in obj:
-                    prices['current_price'] = str(obj["price"])
-                    return prices
-    
-    result = find_prices_recursive(data)
-    if result and any(result.values()):
-        # Determine best price and type
-        if result['sale_price']:
-            result['best_price'] = result['sale_price']
-            result['price_type'] = 'sale'
-        elif result['current_price']:
-            result['best_price'] = result['current_price']
-            result['price_type'] = 'regular'
-        return result
-    return None
-
-def analyze_price_relationships(extracted_prices, soup):
-    """Analyze extracted prices to determine relationships and select best price"""
-    price_data = {
-        'current_price': None,
-        'original_price': None,
-        'sale_price': None,
-        'price_type': 'unknown',
-        'discount_percentage': None,
-        'best_price': None
-    }
-    
-    # Sort prices by confidence score (highest first)
-    for price_type in extracted_prices:
-        if extracted_prices[price_type]:
-            extracted_prices[price_type].sort(key=lambda x: x.get('confidence', 0), reverse=True)
-    
-    # Process sale prices (highest priority) - exclude crossed-out prices
-    sale_prices = [p for p in extracted_prices.get('sale_price', []) if not p.get('is_crossed', False)]
-    if sale_prices:
-        best_sale = sale_prices[0]
-        sale_price = best_sale['value']
-        price_data['sale_price'] = sale_price
-        price_data['best_price'] = sale_price
-        price_data['price_type'] = 'sale'
-    
-    # Process original prices - prefer crossed-out or "was" prices
-    original_prices = extracted_prices.get('original_price', [])
-    if original_prices:
-        # Prefer crossed-out prices for original price
-        crossed_originals = [p for p in original_prices if p.get('is_crossed', False)]
-        if crossed_originals:
-            original_price = crossed_originals[0]['value']
-        else:
-            original_price = original_prices[0]['value']
-        price_data['original_price'] = original_price
-        
-        # If we have both sale and original, calculate discount
-        if price_data['sale_price']:
-            try:
-                sale_val = parse_price_value(price_data['sale_price'])
-                orig_val = parse_price_value(original_price)
-                if sale_val and orig_val and orig_val > sale_val:
-                    discount = ((orig_val - sale_val) / orig_val) * 100
-                    price_data['discount_percentage'] = round(discount, 1)
-            except:
-                pass
-    
-    # Process current prices (if no sale price found) - exclude crossed-out prices
-    if not price_data['best_price']:
-        current_prices = [p for p in extracted_prices.get('current_price', []) if not p.get('is_crossed', False)]
-        if current_prices:
-            best_current = current_prices[0]
-            current_price = best_current['value']
-            price_data['current_price'] = current_price
-            price_data['best_price'] = current_price
-            
-            # Check if there's an original price higher than current (indicating sale)
-            if price_data['original_price']:
-                try:
-                    curr_val = parse_price_value(current_price)
-                    orig_val = parse_price_value(price_data['original_price'])
-                    if curr_val and orig_val and orig_val > curr_val:
-                        price_data['price_type'] = 'discounted'
-                        discount = ((orig_val - curr_val) / orig_val) * 100
-                        price_data['discount_percentage'] = round(discount, 1)
-                    else:
-                        price_data['price_type'] = 'regular'
-                except:
-                    price_data['price_type'] = 'regular'
-            else:
-                price_data['price_type'] = 'regular'
-    
-    # Final fallback: use any available price (even crossed-out if nothing else)
-    if not price_data['best_price']:
-        all_prices = []
-        for price_type_list in extracted_prices.values():
-            all_prices.extend(price_type_list)
-        
-        if all_prices:
-            # Sort by confidence and prefer non-crossed prices
-            all_prices.sort(key=lambda x: (not x.get('is_crossed', False), x.get('confidence', 0)), reverse=True)
-            best_available = all_prices[0]
-            price_data['best_price'] = best_available['value']
-            price_data['current_price'] = best_available['value']
-            price_data['price_type'] = 'regular' if not best_available.get('is_crossed', False) else 'uncertain'
-    
-    return price_data
-
-def extract_price_from_html(html_content, url):
-    """Legacy function - extract simple price from HTML content"""
-    price_data = extract_price_with_type(html_content, url)
-    return price_data['best_price'] if price_data else None
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Strategy 1: JSON-LD structured data
-        json_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_scripts:
-            try:
-                data = json.loads(script.string)
-                price = extract_price_from_jsonld_data(data)
-                if price:
-                    return price
-            except:
-                continue
-        
-        # Strategy 2: Common price selectors
-        price_selectors = [
-            '.price', '.product-price', '.woocommerce-Price-amount', '.amount',
-            '[itemprop="price"]', '[data-price]', '.price-current', '.sale-price',
-            '.regular-price', '.product-price-value', '.price-box .price',
-            '.price-range .price', '.product-price .price'
-        ]
-        
-        for selector in price_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                text = element.get_text().strip()
-                if text and PRICE_RE.search(text):
-                    match = PRICE_RE.search(text)
-                    if match:
-                        return match.group(0)
-        
-        # Strategy 3: Text pattern matching in entire HTML
-        price_match = PRICE_RE.search(html_content)
-        if price_match:
-            return price_match.group(0)
-            
-        return None
-        
-    except Exception as e:
-        print(f"Error extracting price from {url}: {str(e)}")
-        return None
-
-def extract_price_from_jsonld_data(data):
-    """Extract price from JSON-LD structured data"""
-    if isinstance(data, list):
-        for item in data:
-            price = extract_price_from_jsonld_data(item)
-            if price:
-                return price
-    elif isinstance(data, dict):
-        # Check if this object has @graph
-        if "@graph" in data:
-            return extract_price_from_jsonld_data(data["@graph"])
-        
-        # Check if this is a product/offer object
-        if data.get("@type") in ("Product", "Offer", "AggregateOffer"):
-            # Check offers
-            if "offers" in data:
-                offers = data["offers"]
-                if isinstance(offers, list) and offers:
-                    offers = offers[0]
-                if isinstance(offers, dict) and "price" in offers:
-                    return str(offers["price"])
-            
-            # Check direct price
-            if "price" in data:
-                return str(data["price"])
-    
-    return None
-
-def fetch_url_content(url, timeout=30):
-    """Fetch URL content with requests (more compatible with serverless)"""
-    try:
-        headers = {'User-Agent': UA}
-        response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        response.raise_for_status()
-        return response.text
-    except Exception as e:
-        raise Exception(f"Failed to fetch {url}: {str(e)}")
-
-def extract_single_price(url):
-    """Extract detailed price information from a single URL"""
-    try:
-        html_content = fetch_url_content(url)
-        price_data = extract_price_with_type(html_content, url)
-        
-        # Handle case where price_data might be None
-        if not price_data:
-            price_data = {
-                'current_price': None,
-                'original_price': None,
-                'sale_price': None,
-                'price_type': 'error',
-                'discount_percentage': None,
-                'best_price': None
-            }
-        
-        return {
-            'url': url,
-            'price': price_data.get('best_price'),
-            'price_details': {
-                'current_price': price_data.get('current_price'),
-                'original_price': price_data.get('original_price'),
-                'sale_price': price_data.get('sale_price'),
-                'price_type': price_data.get('price_type', 'unknown'),
-                'discount_percentage': price_data.get('discount_percentage')
-            },
-            'status': 'success' if price_data.get('best_price') else 'no_price_found'
-        }
-    except Exception as e:
-        return {
-            'url': url,
-            'price': None,
-            'price_details': {
-                'current_price': None,
-                'original_price': None,
-                'sale_price': None,
-                'price_type': 'error',
-                'discount_percentage': None
-            },
-            'status': 'error',
-            'error': str(e)
-        }
-
-@app.route('/api/extract', methods=['POST'])
-def extract_prices():
-    """Extract prices from multiple URLs"""
-    try:
-        data = request.json or {}
-        urls = data.get('urls', [])
-        
-        if not urls:
-            return jsonify({'error': 'No URLs provided'}), 400
-        
-        # Limit URLs for serverless constraints
-        if len(urls) > 10:
-            return jsonify({'error': 'Maximum 10 URLs allowed per request'}), 400
-        
-        results = []
-        
-        # Process URLs with threading for better performance
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_url = {executor.submit(extract_single_price, url.strip()): url for url in urls if url.strip()}
-            
-            for future in concurrent.futures.as_completed(future_to_url, timeout=120):
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    url = future_to_url[future]
-                    results.append({
-                        'url': url,
-                        'price': None,
-                        'status': 'error',
-                        'error': str(e)
-                    })
-        
-        return jsonify({
-            'results': results,
-            'total': len(results),
-            'successful': len([r for r in results if r['status'] == 'success']),
-            'failed': len([r for r in results if r['status'] == 'error'])
-        })
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/compare-csv', methods=['POST'])
-def compare_csv_prices():
-    """Process CSV file and compare prices with competitors"""
-    try:
-        # Check if request has file
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
-        
-        file = request.files['file']
-        if file.filename == '' or file.filename is None:
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not file.filename.lower().endswith('.csv'):
-            return jsonify({'error': 'File must be a CSV'}), 400
-        
-        # Read and parse CSV content
-        try:
-            csv_content = file.read().decode('utf-8')
-            products = parse_csv_content(csv_content)
-        except Exception as e:
-            return jsonify({'error': f'Error reading CSV: {str(e)}'}), 400
-        
-        if not products:
-            return jsonify({'error': 'No valid products found in CSV. Expected columns: product_name, our_price, and competitor URLs'}), 400
-        
-        # No product limit for local deployment
-        
-        # Process each product
-        results = []
-        for product in products:
-            try:
-                result = process_product_comparison(product)
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    'product_name': product.get('product_name', 'Unknown'),
-                    'our_price': product.get('our_price', 'Unknown'),
-                    'competitor_results': [],
-                    'summary': {},
-                    'status': 'error',
-                    'error': str(e)
-                })
-        
-        # Generate overall summary
-        successful_products = [r for r in results if r['status'] == 'success']
-        total_competitive = len([r for r in successful_products 
-                               if r['summary'].get('overall_recommendation') == 'competitive'])
-        
-        overall_summary = {
-            'total_products': len(products),
-            'successful_comparisons': len(successful_products),
-            'competitive_products': total_competitive,
-            'needs_adjustment': len(successful_products) - total_competitive,
-            'overall_status': 'good' if total_competitive >= len(successful_products) / 2 else 'needs_review'
-        }
-        
-        return jsonify({
-            'results': results,
-            'summary': overall_summary,
-            'status': 'success'
-        })
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/')
-def index():
-    """Serve the CSV upload interface"""
-    return render_template('csv_upload.html')
-
-@app.route('/csv-upload')
-def csv_upload_page():
-    """Serve the CSV upload interface"""
-    return render_template('csv_upload.html')
-
-# Vercel handler
-def handler(request):
-    def start_response(status, headers, exc_info=None):
-        # This function should return a write callable, but for Vercel
-        # we can return a simple function that handles bytes
-        def write(data):
-            return data
-        return write
-    
-    # Get the WSGI response
-    response = app(request.environ, start_response)
-    
-    # If response is an iterable, join it into a single response
-    if hasattr(response, '__iter__'):
-        return b''.join(response)
-    return response
-
-# For local development
-if __name__ == '__main__':
+import os
+from flask import Flask, request, jsonify, render_template
+import asyncio
+import json
+import re
+import time
+import csv
+import io
+import codecs
+import zlib
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+import threading
+import socket
+import sqlite3
+import tempfile
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, CData, Comment, Doctype, NavigableString, Tag
+import soupsieve
+from bs4.builder import HTMLTreeBuilder
+import concurrent.futures
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional asyncio fetch engine for bulk extraction
+try:
+    import aiohttp
+    ASYNC_FETCH_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    ASYNC_FETCH_AVAILABLE = False
+
+# Optional C-backed HTML parsers for extract_price_with_type
+try:
+    import lxml  # noqa: F401 (BeautifulSoup loads it by name)
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Get the directory of the current script and find templates
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+template_dir = os.path.join(project_root, 'templates')
+
+app = Flask(__name__, template_folder=template_dir)
+
+# Constants
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+PRICE_RE = re.compile(r'(?:£|\$|€)\s?[0-9][0-9\.,]*')
+
+# Worker threads per batch
+MAX_FETCH_WORKERS = 3
+
+# Asyncio engine limits: total fetches in flight on the event loop and
+# threads that parse finished pages
+ASYNC_MAX_IN_FLIGHT = 200
+PARSE_WORKERS = os.cpu_count() or 2
+
+# Streaming download: stop reading once a priced JSON-LD block has arrived or
+# the byte cap is hit, and extract from what has been read so far
+STREAM_MAX_BYTES = int(os.environ.get('STREAM_MAX_BYTES', 4 * 1024 * 1024))
+STREAM_CHUNK_SIZE = 16 * 1024
+# After stopping early, the rest of a body up to this size is read and
+# discarded so its keep-alive connection goes back to the pool; a bigger
+# remainder costs more than a new connection, so that connection is dropped
+STREAM_DRAIN_MAX_BYTES = 256 * 1024
+
+# JSON-LD fast path: extract_price_with_type pulls JSON-LD straight out of
+# the markup (str or bytes) and only builds a DOM when none of it has a
+# price. Like soup.find_all('script', type='application/ld+json'), only an
+# exact type attribute counts. Comments and <template>/<textarea> contents
+# are skipped whole, since their scripts never run
+SKIPPED_SPAN_TAGS = ('script', 'template', 'textarea')
+SCRIPT_SCAN_PATTERN = r'<!--|<(%s)\b' % '|'.join(SKIPPED_SPAN_TAGS)
+SCRIPT_TYPE_PATTERN = r'(?:^|\s)type\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))'
+SCRIPT_SCAN_RE = {str: re.compile(SCRIPT_SCAN_PATTERN, re.I),
+                  bytes: re.compile(SCRIPT_SCAN_PATTERN.encode(), re.I)}
+SPAN_END_RE = {str: {name: re.compile(r'</%s\s*>' % name, re.I) for name in SKIPPED_SPAN_TAGS},
+               bytes: {name.encode(): re.compile(rb'</%s\s*>' % name.encode(), re.I) for name in SKIPPED_SPAN_TAGS}}
+SCRIPT_TAG = {str: 'script', bytes: b'script'}
+COMMENT_END = {str: '-->', bytes: b'-->'}
+TAG_END = {str: '>', bytes: b'>'}
+SCAN_OPENER_MAX_LENGTH = len('<textarea')
+SCRIPT_TYPE_RE = {str: re.compile(SCRIPT_TYPE_PATTERN, re.I),
+                  bytes: re.compile(SCRIPT_TYPE_PATTERN.encode(), re.I)}
+JSONLD_TYPE = {str: 'application/ld+json', bytes: b'application/ld+json'}
+
+# Charset resolution works on raw bytes: Content-Type header, then BOM, then
+# a <meta charset> sniff of the first few KB. Statistical detection is slow
+# on large pages and only runs when none of those (nor strict UTF-8) apply
+CHARSET_SNIFF_BYTES = 4096
+HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([^\s;"\']+)', re.I)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.\-]+)', re.I)
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# HTML parser behind extract_price_with_type: 'html.parser' (pure Python),
+# 'lxml' (libxml2) or 'lexbor' (selectolax). Every backend builds the same
+# BeautifulSoup tree API the heuristics use, but they repair broken markup
+# differently: lxml and lexbor close a <p> at a nested <div> as browsers do,
+# html.parser keeps the <div> inside, and a price's container can change.
+# html.parser stays the default until benchmark_parsers.py reports no
+# mismatches on real pages; 'auto' takes the first of PARSER_PREFERENCE
+# that is installed
+HTML_PARSER = os.environ.get('HTML_PARSER', 'html.parser')
+PARSER_PREFERENCE = ('lxml', 'lexbor', 'html.parser')
+
+# Per-host politeness: steady request rate with a small burst, concurrent
+# requests per host, and how long a 429/503 Retry-After may pause a host
+HOST_RATE_PER_SECOND = 2.0
+HOST_BURST = 4
+HOST_MAX_CONCURRENCY = 4
+RETRY_AFTER_DEFAULT = 5.0
+RETRY_AFTER_MAX = 60.0
+THROTTLE_MAX_RETRIES = 1
+
+# Opt-in hedged requests: when a fetch has not started responding within
+# the host's observed p90 time-to-first-byte, race a duplicate. Hedges are
+# capped at a fraction of all fetches so slow hosts can't double our load
+HEDGE_REQUESTS = os.environ.get('HEDGE_REQUESTS', '0') == '1'
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_SAMPLES = 10
+HEDGE_MAX_RATIO = 0.05
+LATENCY_WINDOW = 100
+
+# Per-host circuit breaker: consecutive failures before a host's remaining
+# URLs are fast-failed, and seconds before a single probe is let through
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Request deadlines: each endpoint gets one time budget that every fetch,
+# parse and browser stage below it draws from. CSV jobs stop short of the
+# 300s function limit in vercel.json so partial results still get returned
+FETCH_TIMEOUT = 30
+PRODUCT_DEADLINE_SECONDS = 60
+EXTRACT_DEADLINE_SECONDS = 120
+COMPARE_CSV_DEADLINE_SECONDS = 280
+
+# Tiered extraction: the static fetch runs first and the Playwright renderer
+# in price_extractor.py (when installed) only gets the URLs static couldn't
+# price or that look client-rendered. The tier that worked is remembered per
+# host, and trusted for this long before static is given another chance
+BROWSER_TIER_ENABLED = os.environ.get('BROWSER_TIER', '1') == '1'
+TIER_STATIC = 'static'
+TIER_BROWSER = 'browser'
+TIER_MEMORY_TTL = 6 * 60 * 60
+CLIENT_RENDERED_TEXT_CHARS = 400
+APP_SHELL_RE = re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.I)
+NON_TEXT_BLOCK_RE = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.I | re.S)
+TAG_RE = re.compile(r'<[^>]+>')
+
+# Rendered pages tag their price-bearing nodes with this attribute (it must
+# match price_extractor.STYLE_NODE_ATTR) and send those nodes' computed
+# styles alongside the HTML. Prices whose top edge is within the first
+# screen count as above the fold
+STYLE_NODE_ATTR = 'data-price-node'
+ABOVE_FOLD_PX = 900
+
+# DNS pre-warm: resolved addresses are cached in-process for this long, and
+# a batch's background warm-up resolves its hosts for at most this long
+DNS_CACHE_TTL = 300.0
+PREWARM_TIMEOUT = 5
+PREWARM_WORKERS = 16
+
+# Shared keep-alive sessions, one per host. A session left idle this long is
+# closed, sockets and all, by the next sweep (run at most once a minute)
+SESSION_IDLE_TTL = 300.0
+SESSION_SWEEP_INTERVAL = 60.0
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+_http_sessions_swept_at = 0.0
+
+def get_url_host(url):
+    """Return the lower-cased host (with port) of a URL"""
+    return urlparse(url).netloc.lower()
+
+def get_http_session(url):
+    """Return the shared keep-alive session for the URL's host"""
+    global _http_sessions_swept_at
+    host = get_url_host(url)
+    now = time.monotonic()
+    idle = []
+    
+    with _http_sessions_lock:
+        if now - _http_sessions_swept_at >= SESSION_SWEEP_INTERVAL:
+            _http_sessions_swept_at = now
+            idle = [other for other, (_, used_at) in _http_sessions.items()
+                    if other != host and now - used_at >= SESSION_IDLE_TTL]
+            idle = [_http_sessions.pop(other)[0] for other in idle]
+        
+        entry = _http_sessions.get(host)
+        if entry is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': UA})
+            
+            # Connections are reused across workers instead of paying a
+            # fresh TCP+TLS handshake for every URL on the same retailer.
+            # The scheduler already caps requests per host, so the pool
+            # never makes a request wait; any extra connection (a redirect
+            # host, a caller outside the scheduler) is opened and dropped
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HOST_MAX_CONCURRENCY, pool_block=False)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            entry = _http_sessions[host] = [session, now]
+        entry[1] = now
+    
+    for session in idle:
+        session.close()
+    return entry[0]
+
+class DNSCache:
+    """In-process getaddrinfo cache for host-name TCP lookups, with a fixed TTL"""
+    
+    def __init__(self, ttl=DNS_CACHE_TTL, resolver=None):
+        self.ttl = ttl
+        self._resolver = resolver or socket.getaddrinfo
+        self._entries = {}
+        self._resolving = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        if not isinstance(host, str) or type not in (0, socket.SOCK_STREAM) or is_ip_address(host):
+            return self._resolver(host, port, family, type, proto, flags)
+        
+        key = (host.lower(), port)
+        addresses = self._cached(key)
+        while addresses is None:
+            # A lookup already running for this host (a warm-up racing the
+            # first fetch) is waited for rather than repeated
+            with self._lock:
+                resolving = self._resolving.get(key)
+                if resolving is None:
+                    self.misses += 1
+                    resolving = self._resolving[key] = threading.Event()
+                    break
+            resolving.wait()
+            addresses = self._cached(key)
+        else:
+            resolving = None
+        
+        if resolving is not None:
+            try:
+                # Resolve every family once; callers asking for AF_INET only
+                # (urllib3 without IPv6) get filtered from the same entry
+                addresses = self._resolver(host, port, 0, socket.SOCK_STREAM)
+                with self._lock:
+                    self._entries[key] = (time.monotonic() + self.ttl, addresses)
+            finally:
+                with self._lock:
+                    del self._resolving[key]
+                resolving.set()
+        
+        return [info for info in addresses
+                if (not family or info[0] == family) and (not proto or info[2] == proto)]
+    
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+        return None
+    
+    def resolve(self, host, port):
+        """Resolve a host into the cache and return its addresses"""
+        return self.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def install(self):
+        """Route socket.getaddrinfo through this cache (once per process)"""
+        if getattr(socket.getaddrinfo, '__qualname__', '') != 'DNSCache.getaddrinfo':
+            socket.getaddrinfo = self.getaddrinfo
+
+def is_ip_address(host):
+    """Return True if host is an IPv4/IPv6 literal rather than a name"""
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except (OSError, ValueError):
+            continue
+    return False
+
+dns_cache = DNSCache()
+dns_cache.install()
+
+def default_port(scheme):
+    return 443 if scheme == 'https' else 80
+
+def distinct_origins(urls):
+    """Map each distinct (scheme, host, port) in urls to the first URL on it"""
+    origins = {}
+    for url in urls:
+        parsed = urlparse(url)
+        if parsed.hostname:
+            try:
+                port = parsed.port or default_port(parsed.scheme)
+            except ValueError:
+                continue
+            origins.setdefault((parsed.scheme, parsed.hostname, port), url)
+    return origins
+
+def prewarm_hosts(urls, deadline=None):
+    """Resolve every distinct host into the DNS cache and return how many resolved"""
+    origins = distinct_origins(urls)
+    if not origins:
+        return 0
+    
+    warm_deadline = deadline.within(PREWARM_TIMEOUT) if deadline else Deadline(PREWARM_TIMEOUT)
+    
+    executor = ThreadPoolExecutor(max_workers=min(PREWARM_WORKERS, len(origins)))
+    try:
+        futures = [executor.submit(dns_cache.resolve, host, port) for scheme, host, port in origins]
+        done, _ = concurrent.futures.wait(futures, timeout=warm_deadline.remaining())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return sum(1 for future in done if future.exception() is None)
+
+# Persistent per-URL validators (ETag/Last-Modified) for conditional re-fetch
+VALIDATOR_STORE_PATH = os.environ.get(
+    'VALIDATOR_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'price_extractor_validators.sqlite3')
+)
+
+class ValidatorStore:
+    """Persistent store of HTTP validators and the price data they produced"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disabled = False
+    
+    def _connection(self):
+        if self._conn is None and not self._disabled:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS validators ('
+                    'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, '
+                    'price_data TEXT, updated_at REAL)'
+                )
+                self._conn.commit()
+            except Exception as e:
+                # Conditional re-fetch is an optimization; never fail a fetch over it
+                print(f"Validator store unavailable at {self.path}: {str(e)}")
+                self._conn = None
+                self._disabled = True
+        return self._conn
+    
+    def get(self, url):
+        """Return the stored validators and price data for a URL, or None"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    'SELECT etag, last_modified, price_data FROM validators WHERE url = ?', (url,)
+                ).fetchone()
+            except Exception as e:
+                print(f"Error reading validators for {url}: {str(e)}")
+                return None
+        
+        if not row:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'price_data': json.loads(row[2])
+        }
+    
+    def put(self, url, etag, last_modified, price_data):
+        """Remember the validators a response carried and the price data parsed from it"""
+        if not etag and not last_modified:
+            return
+        
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?)',
+                    (url, etag, last_modified, json.dumps(price_data), time.time())
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"Error saving validators for {url}: {str(e)}")
+
+validator_store = ValidatorStore(VALIDATOR_STORE_PATH)
+
+# Rendered-page snapshots: the browser tier's HTML, compressed and kept per
+# URL and capture time so heuristic changes can be re-run without rendering
+SNAPSHOT_STORE_PATH = os.environ.get(
+    'SNAPSHOT_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'price_extractor_snapshots.sqlite3')
+)
+SNAPSHOTS_KEPT_PER_URL = 5
+
+class SnapshotStore:
+    """Compressed rendered-HTML snapshots keyed by URL and capture timestamp"""
+    
+    def __init__(self, path, keep_per_url=SNAPSHOTS_KEPT_PER_URL):
+        self.path = path
+        self.keep_per_url = keep_per_url
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disabled = False
+    
+    def _connection(self):
+        if self._conn is None and not self._disabled:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS snapshots ('
+                    'url TEXT, captured_at REAL, html BLOB, styles TEXT, PRIMARY KEY (url, captured_at))'
+                )
+                columns = [row[1] for row in self._conn.execute('PRAGMA table_info(snapshots)')]
+                if 'styles' not in columns:
+                    self._conn.execute('ALTER TABLE snapshots ADD COLUMN styles TEXT')
+                self._conn.commit()
+            except Exception as e:
+                # Snapshots are for re-extraction later; never fail a render over them
+                print(f"Snapshot store unavailable at {self.path}: {str(e)}")
+                self._conn = None
+                self._disabled = True
+        return self._conn
+    
+    def put(self, url, html, captured_at=None, styles=None):
+        """Store a rendered page (and its node styles) and return its capture timestamp"""
+        captured_at = captured_at or time.time()
+        compressed = zlib.compress(html.encode('utf-8'))
+        styles_json = json.dumps(styles) if styles else None
+        
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                conn.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)', (url, captured_at, compressed, styles_json))
+                conn.execute(
+                    'DELETE FROM snapshots WHERE url = ? AND captured_at NOT IN ('
+                    'SELECT captured_at FROM snapshots WHERE url = ? ORDER BY captured_at DESC LIMIT ?)',
+                    (url, url, self.keep_per_url)
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"Error saving snapshot for {url}: {str(e)}")
+                return None
+        return captured_at
+    
+    def latest(self, url):
+        """Return (captured_at, html) for the newest snapshot of a URL, or None"""
+        snapshots = self.iter_snapshots([url], latest_only=True)
+        return next(((captured_at, html) for _, captured_at, html, _ in snapshots), None)
+    
+    def iter_snapshots(self, urls=None, since=None, latest_only=True):
+        """Yield (url, captured_at, html, styles) for stored snapshots"""
+        query = 'SELECT url, captured_at, html, styles FROM snapshots WHERE captured_at >= ?'
+        params = [since or 0]
+        if urls is not None:
+            urls = list(urls)
+            if not urls:
+                return
+            query += f" AND url IN ({', '.join('?' * len(urls))})"
+            params.extend(urls)
+        if latest_only:
+            query += ' AND captured_at = (SELECT MAX(captured_at) FROM snapshots s WHERE s.url = snapshots.url)'
+        query += ' ORDER BY url, captured_at'
+        
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                rows = conn.execute(query, params).fetchall()
+            except Exception as e:
+                print(f"Error reading snapshots: {str(e)}")
+                return
+        
+        for url, captured_at, compressed, styles in rows:
+            yield url, captured_at, zlib.decompress(compressed).decode('utf-8'), json.loads(styles) if styles else None
+
+snapshot_store = SnapshotStore(SNAPSHOT_STORE_PATH)
+
+def conditional_request_headers(cached):
+    """Build If-None-Match/If-Modified-Since headers from stored validators"""
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+class SlotWaiter:
+    """A thread queued in DomainScheduler for a host slot"""
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def clear(self):
+        self._event.clear()
+    
+    def wake(self):
+        self._event.set()
+    
+    def wait(self, timeout):
+        self._event.wait(timeout)
+
+class AsyncSlotWaiter:
+    """A coroutine queued in DomainScheduler for a host slot, woken from any thread"""
+    
+    def __init__(self, loop):
+        self._loop = loop
+        self._event = asyncio.Event()
+    
+    def clear(self):
+        self._event.clear()
+    
+    def wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass  # its loop has closed, and the waiter with it
+    
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+class DomainScheduler:
+    """Per-host rate limits, concurrency slots, Retry-After pauses and latency stats"""
+    
+    def __init__(self, rate=HOST_RATE_PER_SECOND, burst=HOST_BURST,
+                 max_concurrency=HOST_MAX_CONCURRENCY, hedge_max_ratio=HEDGE_MAX_RATIO):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.hedge_max_ratio = hedge_max_ratio
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._fetches = 0
+        self._hedges = 0
+    
+    def _host_state(self, host, now):
+        state = self._hosts.get(host)
+        if state is None:
+            state = {'tokens': float(self.burst), 'refilled_at': now, 'in_flight': 0, 'paused_until': 0.0,
+                     'latencies': deque(maxlen=LATENCY_WINDOW), 'waiters': deque()}
+            self._hosts[host] = state
+        return state
+    
+    def _take(self, state):
+        """Take a slot from a host's state if one is free (lock held); otherwise return seconds to wait"""
+        now = time.monotonic()
+        
+        # Refill the bucket for the time elapsed since the last check
+        state['tokens'] = min(self.burst, state['tokens'] + (now - state['refilled_at']) * self.rate)
+        state['refilled_at'] = now
+        
+        if now < state['paused_until']:
+            return state['paused_until'] - now
+        if state['in_flight'] >= self.max_concurrency:
+            return float('inf')  # until a slot is released
+        if state['tokens'] < 1:
+            return (1 - state['tokens']) / self.rate
+        
+        state['tokens'] -= 1
+        state['in_flight'] += 1
+        self._fetches += 1
+        return 0
+    
+    def try_acquire(self, host):
+        """Take a slot for host if one is free and nobody is queued for it; otherwise return seconds to wait"""
+        with self._lock:
+            state = self._host_state(host, time.monotonic())
+            if state['waiters']:
+                return float('inf')
+            return self._take(state)
+    
+    def _enqueue(self, host, waiter):
+        """Take a slot at once if possible (returns None), else queue waiter behind the host's others"""
+        with self._lock:
+            state = self._host_state(host, time.monotonic())
+            if not state['waiters'] and self._take(state) == 0:
+                return None
+            state['waiters'].append(waiter)
+            return waiter
+    
+    def _poll(self, host, waiter):
+        """Let a queued waiter take a slot if it is first in line; otherwise return seconds to wait"""
+        # Only the first in line watches the clock for token refills and
+        # pauses; the rest sleep until the one ahead of them gets its slot
+        with self._lock:
+            waiter.clear()
+            state = self._hosts[host]
+            if state['waiters'][0] is not waiter:
+                return float('inf')
+            delay = self._take(state)
+            if delay:
+                return delay
+            state['waiters'].popleft()
+            following = state['waiters'][0] if state['waiters'] else None
+        if following:
+            following.wake()
+        return 0
+    
+    def _abandon(self, host, waiter):
+        """Drop a waiter that gave up, handing its place at the front to the next one"""
+        with self._lock:
+            waiters = self._hosts[host]['waiters']
+            was_first = bool(waiters) and waiters[0] is waiter
+            if waiter in waiters:
+                waiters.remove(waiter)
+            following = waiters[0] if was_first and waiters else None
+        if following:
+            following.wake()
+    
+    def _wake_first(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            first = state['waiters'][0] if state and state['waiters'] else None
+        if first:
+            first.wake()
+    
+    @staticmethod
+    def _wait_timeout(delay, deadline):
+        if delay == float('inf'):
+            return deadline.timeout() if deadline else None
+        return deadline.timeout(delay) if deadline else delay
+    
+    def acquire(self, host, deadline=None):
+        """Block the calling thread until a slot for host is free"""
+        waiter = self._enqueue(host, SlotWaiter())
+        if waiter is None:
+            return
+        try:
+            delay = self._poll(host, waiter)
+            while delay:
+                waiter.wait(self._wait_timeout(delay, deadline))
+                delay = self._poll(host, waiter)
+        except BaseException:
+            self._abandon(host, waiter)
+            raise
+    
+    async def acquire_async(self, host, deadline=None):
+        """Wait on the event loop until a slot for host is free"""
+        waiter = self._enqueue(host, AsyncSlotWaiter(asyncio.get_running_loop()))
+        if waiter is None:
+            return
+        try:
+            delay = self._poll(host, waiter)
+            while delay:
+                await waiter.wait(self._wait_timeout(delay, deadline))
+                delay = self._poll(host, waiter)
+        except BaseException:
+            self._abandon(host, waiter)
+            raise
+    
+    def release(self, host, retry_after=None):
+        """Return a slot, pausing the host if the server asked us to back off"""
+        with self._lock:
+            state = self._host_state(host, time.monotonic())
+            state['in_flight'] = max(0, state['in_flight'] - 1)
+            if retry_after:
+                state['paused_until'] = max(state['paused_until'], time.monotonic() + retry_after)
+        self._wake_first(host)
+    
+    def record_latency(self, host, seconds):
+        """Record a time-to-first-byte sample for host"""
+        with self._lock:
+            self._host_state(host, time.monotonic())['latencies'].append(seconds)
+    
+    def latency_percentile(self, host, percentile):
+        """Return the host's recent time-to-first-byte percentile, or None with too few samples"""
+        with self._lock:
+            state = self._hosts.get(host)
+            samples = sorted(state['latencies']) if state else []
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+    
+    def try_hedge(self):
+        """Reserve a hedged request if the global hedge budget allows one"""
+        with self._lock:
+            if self._hedges + 1 > self._fetches * self.hedge_max_ratio:
+                return False
+            self._hedges += 1
+            return True
+
+domain_scheduler = DomainScheduler()
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into capped seconds"""
+    if not value:
+        return RETRY_AFTER_DEFAULT
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except Exception:
+            seconds = RETRY_AFTER_DEFAULT
+    return max(0.0, min(seconds, RETRY_AFTER_MAX))
+
+def throttle_delay(status, headers):
+    """Return how long to pause a host after this response, or None"""
+    if status == 429:
+        return parse_retry_after(headers.get('Retry-After'))
+    if status == 503 and headers.get('Retry-After'):
+        return parse_retry_after(headers.get('Retry-After'))
+    return None
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching when a host's circuit breaker is open"""
+
+class CircuitBreaker:
+    """Per-host circuit breaker: fail fast after repeated failures, probe once after cooldown"""
+    
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._hosts = {}
+    
+    def allow(self, host):
+        """Return True if a request to host may go ahead"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state['state'] == 'closed':
+                return True
+            
+            now = time.monotonic()
+            if now - state['changed_at'] < self.cooldown:
+                return False
+            
+            # Cooldown over (or the last probe never reported back): probe once
+            state['state'] = 'half_open'
+            state['changed_at'] = now
+            return True
+    
+    def record_success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+    
+    def record_failure(self, host):
+        with self._lock:
+            state = self._hosts.setdefault(host, {'state': 'closed', 'failures': 0, 'changed_at': 0.0})
+            state['failures'] += 1
+            if state['state'] == 'half_open' or state['failures'] >= self.threshold:
+                state['state'] = 'open'
+                state['changed_at'] = time.monotonic()
+    
+    def state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return state['state'] if state else 'closed'
+
+circuit_breaker = CircuitBreaker()
+
+def record_fetch_outcome(host, status):
+    """Feed a fetch outcome (final HTTP status, or None if no response) to the circuit breaker"""
+    if status is not None and status < 500 and status not in (403, 429):
+        circuit_breaker.record_success(host)
+    else:
+        circuit_breaker.record_failure(host)
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline expires before a stage could finish"""
+
+# Failures a real browser could plausibly get past: bot defences tend to
+# reset, drop or stall scripted clients and reject their TLS handshakes
+BROWSER_FIXABLE_ERRORS = (requests.ConnectionError, requests.Timeout,
+                          requests.exceptions.ChunkedEncodingError, ConnectionError, asyncio.TimeoutError)
+if aiohttp is not None:
+    BROWSER_FIXABLE_ERRORS += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+def browser_may_fix(error):
+    """Return True if a fetch error is one a browser could plausibly get past"""
+    if not isinstance(error, BROWSER_FIXABLE_ERRORS):
+        return False
+    seen = set()
+    causes = [error]
+    while causes:
+        cause = causes.pop()
+        if cause is None or id(cause) in seen:
+            continue
+        seen.add(id(cause))
+        if isinstance(cause, (socket.gaierror, ConnectionRefusedError)):
+            return False
+        # requests and aiohttp wrap the socket error a few layers down
+        causes.extend([cause.__cause__, cause.__context__,
+                       getattr(cause, 'reason', None), getattr(cause, 'os_error', None)])
+        causes.extend(arg for arg in cause.args if isinstance(arg, BaseException))
+    return True
+
+class FetchError(Exception):
+    """Raised when a page could not be fetched"""
+    
+    def __init__(self, message, status=None, browser_retryable=False):
+        super().__init__(message)
+        self.status = status
+        self.browser_retryable = browser_retryable
+
+class Deadline:
+    """Absolute time budget for one request, passed down to every stage"""
+    
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self):
+        return self.remaining() <= 0
+    
+    def timeout(self, cap=None):
+        """Return seconds a stage may use; raise DeadlineExceeded if none are left"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return remaining if cap is None else min(cap, remaining)
+    
+    def within(self, seconds):
+        """Return a deadline ending at the earlier of this one and seconds from now"""
+        child = Deadline(seconds)
+        child.expires_at = min(child.expires_at, self.expires_at)
+        return child
+
+def interleave_by_host(urls):
+    """Order URLs round-robin across hosts so one retailer cannot hog the workers"""
+    by_host = {}
+    for url in urls:
+        by_host.setdefault(get_url_host(url), []).append(url)
+    
+    interleaved = []
+    queues = list(by_host.values())
+    for i in range(max((len(q) for q in queues), default=0)):
+        interleaved.extend(q[i] for q in queues if i < len(q))
+    return interleaved
+
+def parse_price_value(price_str):
+    """Extract numeric value from price string"""
+    if not price_str:
+        return None
+    
+    # Remove currency symbols and clean the string
+    cleaned = re.sub(r'[£$€,\s]', '', str(price_str))
+    
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+def compare_prices(our_price, competitor_price):
+    """Compare our price with competitor price"""
+    our_val = parse_price_value(our_price)
+    comp_val = parse_price_value(competitor_price)
+    
+    if our_val is None or comp_val is None:
+        return 'unknown'
+    
+    if our_val < comp_val:
+        return 'lower'  # We are cheaper
+    elif our_val > comp_val:
+        return 'higher'  # We are more expensive
+    else:
+        return 'equal'
+
+def format_comparison_result(comparison, our_price, competitor_price):
+    """Format comparison result with recommendations"""
+    our_val = parse_price_value(our_price)
+    comp_val = parse_price_value(competitor_price)
+    
+    if our_val is None or comp_val is None:
+        return {
+            'status': 'unknown',
+            'message': 'Unable to compare prices',
+            'difference': 'N/A',
+            'recommendation': 'Check price formats'
+        }
+    
+    if comparison == 'lower':
+        difference = comp_val - our_val
+        percentage = round((difference / comp_val) * 100, 2)
+        return {
+            'status': 'competitive',
+            'message': f'Our price is {percentage}% lower than competitor',
+            'difference': f'+{difference:.2f}',
+            'recommendation': 'Good position - we are cheaper'
+        }
+    elif comparison == 'higher':
+        difference = our_val - comp_val
+        percentage = round((difference / our_val) * 100, 2)
+        return {
+            'status': 'expensive',
+            'message': f'Our price is {percentage}% higher than competitor',
+            'difference': f'-{difference:.2f}',
+            'recommendation': 'Consider price adjustment to be more competitive'
+        }
+    elif comparison == 'equal':
+        return {
+            'status': 'equal',
+            'message': 'Prices are equal',
+            'difference': '0.00',
+            'recommendation': 'Consider slight reduction to gain competitive edge'
+        }
+    else:
+        return {
+            'status': 'unknown',
+            'message': 'Unable to compare prices',
+            'difference': 'N/A',
+            'recommendation': 'Check price formats'
+        }
+
+def parse_csv_content(csv_content):
+    """Parse CSV content and extract product data"""
+    try:
+        # Parse CSV content
+        csv_reader = csv.DictReader(io.StringIO(csv_content))
+        products = []
+        
+        for row in csv_reader:
+            # Extract product information
+            product_name = row.get('product_name', '').strip()
+            our_price = row.get('our_price', '').strip()
+            
+            # Extract competitor URLs (looking for columns with 'competitor' or 'url')
+            competitor_urls = []
+            for key, value in row.items():
+                if ('competitor' in key.lower() or 'url' in key.lower()) and value.strip():
+                    competitor_urls.append(value.strip())
+            
+            if product_name and our_price and competitor_urls:
+                products.append({
+                    'product_name': product_name,
+                    'our_price': our_price,
+                    'competitor_urls': competitor_urls
+                })
+        
+        return products
+    except Exception as e:
+        raise Exception(f"Error parsing CSV: {str(e)}")
+
+def process_product_comparison(product_data, extracted_results=None, deadline=None):
+    """Process a single product's price comparison, reusing extracted_results when given"""
+    try:
+        product_name = product_data['product_name']
+        our_price = product_data['our_price']
+        competitor_urls = product_data['competitor_urls']
+        
+        competitor_results = []
+        
+        # Extract prices from competitor URLs unless the caller already did
+        if extracted_results is None:
+            extracted_results = extract_prices_tiered(competitor_urls, deadline or Deadline(PRODUCT_DEADLINE_SECONDS))
+        
+        for url, result in zip(competitor_urls, extracted_results):
+            if result['price']:
+                comparison = compare_prices(our_price, result['price'])
+                comparison_details = format_comparison_result(comparison, our_price, result['price'])
+                
+                # Add price type information to details
+                price_details = result.get('price_details', {})
+                # Ensure comparison_details is a dictionary that can hold any type
+                comparison_details = dict(comparison_details)
+                comparison_details['competitor_price_info'] = {
+                    'actual_price': result['price'],
+                    'price_type': price_details.get('price_type', 'unknown'),
+                    'original_price': price_details.get('original_price'),
+                    'discount_percentage': price_details.get('discount_percentage')
+                }
+                
+                # Add discount information to the message if available
+                if price_details.get('discount_percentage'):
+                    comparison_details['competitor_discount'] = f"Competitor has {price_details['discount_percentage']}% discount"
+                
+                competitor_results.append({
+                    'url': url,
+                    'price': result['price'],
+                    'price_details': price_details,
+                    'comparison': comparison,
+                    'details': comparison_details,
+                    'status': 'success'
+                })
+            elif result['status'] in ('circuit_open', 'timed_out'):
+                # Skipped because the retailer is failing, or cut off by the deadline
+                competitor_results.append({
+                    'url': url,
+                    'price': None,
+                    'price_details': result.get('price_details', {}),
+                    'comparison': 'unknown',
+                    'details': {'status': result['status'], 'message': result.get('error')},
+                    'status': result['status']
+                })
+            else:
+                competitor_results.append({
+                    'url': url,
+                    'price': None,
+                    'price_details': result.get('price_details', {}),
+                    'comparison': 'unknown',
+                    'details': {'status': 'no_price', 'message': 'No price found'},
+                    'status': 'no_price_found'
+                })
+        
+        # Generate summary
+        successful_comparisons = [r for r in competitor_results if r['status'] == 'success']
+        lower_count = len([r for r in successful_comparisons if r['comparison'] == 'lower'])
+        higher_count = len([r for r in successful_comparisons if r['comparison'] == 'higher'])
+        equal_count = len([r for r in successful_comparisons if r['comparison'] == 'equal'])
+        
+        overall_recommendation = 'competitive' if lower_count >= higher_count else 'consider_adjustment'
+        
+        return {
+            'product_name': product_name,
+            'our_price': our_price,
+            'competitor_results': competitor_results,
+            'summary': {
+                'total_competitors': len(competitor_urls),
+                'successful_extractions': len(successful_comparisons),
+                'lower_than_competitors': lower_count,
+                'higher_than_competitors': higher_count,
+                'equal_to_competitors': equal_count,
+                'overall_recommendation': overall_recommendation
+            },
+            'status': 'success'
+        }
+        
+    except Exception as e:
+        return {
+            'product_name': product_data.get('product_name', 'Unknown'),
+            'our_price': product_data.get('our_price', 'Unknown'),
+            'competitor_results': [],
+            'summary': {},
+            'status': 'error',
+            'error': str(e)
+        }
+
+class LexborTreeBuilder(HTMLTreeBuilder):
+    """BeautifulSoup tree builder fed by selectolax's lexbor parser"""
+    NAME = 'lexbor'
+    features = [NAME]
+    
+    def prepare_markup(self, markup, user_specified_encoding=None,
+                       document_declared_encoding=None, exclude_encodings=None):
+        if isinstance(markup, bytes):
+            markup = decode_html(markup)
+        yield markup, None, None, False
+    
+    def feed(self, markup):
+        soup = self.soup
+        document = LexborHTMLParser(markup).root.parent
+        # (node, closing) pairs; iterative so deeply nested pages can't hit
+        # the recursion limit
+        stack = [(child, False) for child in reversed(list(document.iter(include_text=True)))]
+        while stack:
+            node, closing = stack.pop()
+            tag = node.tag
+            if closing:
+                soup.handle_endtag(tag)
+            elif tag == '-text':
+                soup.handle_data(node.text_content)
+            elif tag == '-comment':
+                soup.endData()
+                soup.handle_data(node.text_lexbor() or '')
+                soup.endData(Comment)
+            elif tag == '-doctype':
+                soup.endData()
+                soup.handle_data('html')
+                soup.endData(Doctype)
+            elif not tag.startswith('-'):
+                attrs = {name: '' if value is None else value for name, value in node.attributes.items()}
+                soup.handle_starttag(tag, None, None, attrs)
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(list(node.iter(include_text=True))))
+
+def available_parsers():
+    """HTML parser backends installed here, in PARSER_PREFERENCE order"""
+    installed = {'lxml': LXML_AVAILABLE, 'lexbor': LexborHTMLParser is not None, 'html.parser': True}
+    return [name for name in PARSER_PREFERENCE if installed[name]]
+
+def resolve_parser(parser=None):
+    """Pick the parser backend to use, falling back to html.parser if it isn't installed"""
+    parser = parser or HTML_PARSER
+    available = available_parsers()
+    if parser == 'auto':
+        return available[0]
+    if parser not in available:
+        print(f"HTML parser {parser} not available, using html.parser")
+        return 'html.parser'
+    return parser
+
+def make_soup(html_content, parser=None):
+    """Parse HTML into a BeautifulSoup tree with the selected backend"""
+    parser = resolve_parser(parser)
+    if parser == 'lexbor':
+        return BeautifulSoup(html_content, builder=LexborTreeBuilder)
+    return BeautifulSoup(html_content, parser)
+
+class NodeStyles:
+    """Computed styles of a rendered page's price-bearing nodes"""
+    
+    def __init__(self, styles):
+        self._styles = styles or {}
+        sizes = [style['font_size'] for style in self._styles.values() if style.get('visible')]
+        self.max_font_size = max(sizes) if sizes else 0
+    
+    def lookup(self, element):
+        """Return the computed style for an element (or the price node inside it), or None"""
+        node_id = element.get(STYLE_NODE_ATTR)
+        if node_id is None:
+            tagged = element.find(attrs={STYLE_NODE_ATTR: True})
+            node_id = tagged.get(STYLE_NODE_ATTR) if tagged else None
+        style = self._styles.get(node_id)
+        if style is None:
+            return None
+        
+        return dict(
+            style,
+            relative_size=style['font_size'] / self.max_font_size if self.max_font_size else 1.0,
+            above_fold=style['bbox'][1] < ABOVE_FOLD_PX
+        )
+
+# Price selectors by price type, tried in this order by extract_price_with_type
+PRICE_SELECTORS = {
+    'sale_price': [
+        # Common sale price selectors
+        '.sale-price', '.price-sale', '.discounted-price', '.offer-price',
+        '.deal-price', '.reduced-price', '.special-price', '.promo-price',
+        '.price-now', '.price-current', '.current-price', '.final-price',
+        '.price-reduced', '.price-special', '.price-discount',
+        
+        # Specific e-commerce patterns
+        '.price-box .price:not(.was-price)', '.price-container .price:not(.original)',
+        '.product-price .current', '.sale .price', '.discount .price',
+        '.offer .price', '.special .price',
+        
+        # Data attributes and test IDs
+        '[data-testid*="sale"]', '[data-testid*="current"]', '[data-testid*="offer"]',
+        '[data-price-type="sale"]', '[data-price-type="current"]',
+        '[data-automation-id*="price-current"]',
+        
+        # Additional common patterns
+        '.price-value:not(.was)', '.main-price:not(.original)',
+        '.product-price-value:not(.crossed)', '.price-primary',
+        '.price-big', '.price-large', '.price-main'
+    ],
+    'original_price': [
+        # Original/was price selectors
+        '.original-price', '.regular-price', '.was-price', '.old-price',
+        '.price-was', '.price-original', '.price-regular', '.list-price',
+        '.msrp', '.rrp', '.crossed-price', '.strike-price',
+        '.price-strike', '.price-crossed', '.price-before', '.price-old',
+        '.rrp-price', '.before-price', '.prev-price', '.previous-price',
+        
+        # Specific patterns for crossed-out prices
+        'del .price', 's .price', '.strikethrough .price',
+        '.line-through .price', '.text-decoration-line-through .price',
+        
+        # Data attributes
+        '[data-testid*="was"]', '[data-testid*="original"]', '[data-testid*="regular"]',
+        '[data-price-type="was"]', '[data-price-type="original"]',
+        '[data-automation-id*="price-was"]', '[data-automation-id*="price-original"]'
+    ],
+    'current_price': [
+        # General price selectors (fallback)
+        '.price', '.product-price', '.woocommerce-Price-amount', '.amount',
+        '[itemprop="price"]', '[data-price]', '.price-current',
+        '.product-price-value', '.price-box .price', '.final-price',
+        '.price-display', '.price-value', '.product-price-amount'
+    ]
+}
+
+class PriceSelectorMatcher:
+    """Matches a whole table of CSS selectors in one walk of a subtree"""
+    
+    # The last compound of a selector, when it starts with a class or an attribute
+    KEY_RE = re.compile(r'(?:^|\s)([.\[])([-\w]+)(?:[.:\[#=*^$|~\]][^\s]*)?$')
+    QUOTED_SPACE_RE = re.compile(r'(["\'])[^"\']*\s[^"\']*\1')
+    
+    def __init__(self, selector_table):
+        self.selectors = list(dict.fromkeys(
+            selector for selectors in selector_table.values() for selector in selectors
+        ))
+        self.compiled = {selector: soupsieve.compile(selector) for selector in self.selectors}
+        self.by_class = {}
+        self.by_attribute = {}
+        self.unkeyed = []
+        for selector in self.selectors:
+            match = None
+            if ',' not in selector and not self.QUOTED_SPACE_RE.search(selector):
+                match = self.KEY_RE.search(selector)
+            if match is None:
+                self.unkeyed.append(selector)
+            elif match.group(1) == '.':
+                self.by_class.setdefault(match.group(2).lower(), []).append(selector)
+            else:
+                self.by_attribute.setdefault(match.group(2).lower(), []).append(selector)
+    
+    def candidates(self, element):
+        """Selectors that could match element, judged by its classes and attribute names"""
+        candidates = list(self.unkeyed)
+        for name in element.attrs:
+            candidates.extend(self.by_attribute.get(name.lower(), ()))
+        classes = element.get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        for class_name in classes:
+            candidates.extend(self.by_class.get(class_name.lower(), ()))
+        return candidates
+    
+    def select(self, area):
+        """Return {selector: [matching descendants of area in document order]}"""
+        matches = {selector: [] for selector in self.selectors}
+        for element in area.descendants:
+            if not isinstance(element, Tag):
+                continue
+            for selector in dict.fromkeys(self.candidates(element)):
+                if self.compiled[selector].match(element):
+                    matches[selector].append(element)
+        return matches
+
+price_selector_matcher = PriceSelectorMatcher(PRICE_SELECTORS)
+
+def scan_jsonld_spans(markup, pos=0):
+    """Yield (JSON-LD contents or None, end offset) for each complete span of markup from pos"""
+    kind = str if isinstance(markup, str) else bytes
+    while True:
+        match = SCRIPT_SCAN_RE[kind].search(markup, pos)
+        if not match:
+            # Nothing starts before the last few bytes, which may yet be an opener
+            yield None, max(pos, len(markup) - SCAN_OPENER_MAX_LENGTH)
+            return
+        name = match.group(1)
+        if name is None:
+            # Searching from the second dash also closes <!--> and <!--->
+            end = markup.find(COMMENT_END[kind], match.start() + 2)
+            if end == -1:
+                return
+            pos = end + len(COMMENT_END[kind])
+            yield None, pos
+            continue
+        tag_end = markup.find(TAG_END[kind], match.end())
+        if tag_end == -1:
+            return
+        name = name.lower()
+        close = SPAN_END_RE[kind][name].search(markup, tag_end + 1)
+        if not close:
+            return
+        block = None
+        if name == SCRIPT_TAG[kind]:
+            type_match = SCRIPT_TYPE_RE[kind].search(markup, match.end(), tag_end)
+            if type_match and next(value for value in type_match.groups() if value is not None) == JSONLD_TYPE[kind]:
+                block = markup[tag_end + 1:close.start()]
+        pos = close.end()
+        yield block, pos
+
+def iter_jsonld_blocks(markup):
+    """Yield the contents of each application/ld+json script in raw markup (str or bytes)"""
+    for block, _ in scan_jsonld_spans(markup):
+        if block is not None:
+            yield block
+
+def extract_price_with_type(html_content, url, node_styles=None, parser=None):
+    """Extract price with type classification (original, sale, current)"""
+    try:
+        # Initialize price data structure
+        price_data = {
+            'current_price': None,
+            'original_price': None,
+            'sale_price': None,
+            'price_type': 'unknown',
+            'discount_percentage': None,
+            'best_price': None  # The actual selling price to use for comparison
+        }
+        
+        # Strategy 1: JSON-LD structured data with price analysis, read from
+        # the raw markup so priced pages never need a DOM
+        for block in iter_jsonld_blocks(html_content):
+            try:
+                data = json.loads(block)
+                structured_prices = extract_structured_prices(data)
+                if structured_prices:
+                    price_data.update(structured_prices)
+                    if price_data['best_price']:
+                        return price_data
+            except:
+                continue
+        
+        soup = make_soup(html_content, parser)
+        computed_styles = NodeStyles(node_styles) if node_styles else None
+        
+        # STEP 1: Detect main product area to avoid suggested products
+        main_product_area = detect_main_product_area(soup)
+        
+        # Strategy 2: Smart CSS selector analysis for different price types
+        # Extract prices by type - FOCUS ON MAIN PRODUCT AREA
+        selector_matches = price_selector_matcher.select(main_product_area)
+        extracted_prices = {}
+        for price_type, selectors in PRICE_SELECTORS.items():
+            prices = []
+            for selector in selectors:
+                # Search within main product area first
+                elements = selector_matches[selector]
+                for element in elements:
+                    # Check if this element is from suggested products area
+                    if is_suggested_product_area(element):
+                        continue  # Skip suggested product prices
+                    
+                    # Rendered pages: what the browser actually drew
+                    computed = computed_styles.lookup(element) if computed_styles else None
+                    if computed is not None:
+                        if not computed['visible']:
+                            continue
+                        is_crossed_out = computed['line_through']
+                    else:
+                        # Skip if element is hidden or has display: none
+                        style = element.get('style', '')
+                        if isinstance(style, str):
+                            if 'display:none' in style.replace(' ', '') or 'display: none' in style:
+                                continue
+                    
+                        # Enhanced crossed-out price detection
+                        element_classes = element.get('class', [])
+                        element_style = element.get('style', '')
+                        parent_classes = element.parent.get('class', []) if element.parent else []
+                        parent_style = element.parent.get('style', '') if element.parent else ''
+                    
+                        # Convert to lists if strings
+                        if isinstance(element_classes, str):
+                            element_classes = [element_classes]
+                        if isinstance(parent_classes, str):
+                            parent_classes = [parent_classes]
+                    
+                        # Check for crossed-out indicators
+                        crossed_out_indicators = [
+                            'strike', 'strikethrough', 'line-through', 'text-decoration-line-through',
+                            'crossed', 'was-price', 'old-price', 'original-price', 'regular-price',
+                            'rrp', 'msrp', 'list-price', 'before-price', 'was', 'orig'
+                        ]
+                    
+                        # Check element and parent for crossed-out indicators
+                        all_classes = element_classes + parent_classes
+                        all_styles = [str(element_style), str(parent_style)]
+                    
+                        is_crossed_out = any(
+                            indicator in ' '.join(all_classes).lower() or 
+                            indicator in ' '.join(all_styles).lower() or
+                            'text-decoration: line-through' in str(element_style).lower() or
+                            'text-decoration:line-through' in str(element_style).lower()
+                            for indicator in crossed_out_indicators
+                        )
+                    
+                        # Additional visual checks for crossed-out prices
+                        if element.name == 's' or element.name == 'del':  # HTML strikethrough tags
+                            is_crossed_out = True
+                    
+                    # Skip crossed-out prices when looking for sale/current prices
+                    if price_type in ['sale_price', 'current_price'] and is_crossed_out:
+                        continue
+                    
+                    text = element.get_text().strip()
+                    if text and PRICE_RE.search(text):
+                        match = PRICE_RE.search(text)
+                        if match:
+                            price_value = match.group(0)
+                            prices.append({
+                                'value': price_value,
+                                'element': element,
+                                'is_crossed': is_crossed_out,
+                                'selector': selector,
+                                'confidence': calculate_main_product_confidence(element, price_type, is_crossed_out, computed)
+                            })
+            extracted_prices[price_type] = prices
+        
+        # Strategy 3: Analyze price relationships and context
+        price_data = analyze_price_relationships(extracted_prices, soup)
+        
+        # Strategy 4: Fallback - find most prominent price IN MAIN PRODUCT AREA
+        if not price_data['best_price']:
+            all_price_elements = main_product_area.find_all(text=PRICE_RE)
+            price_candidates = []
+            
+            for text_node in all_price_elements:
+                if text_node.parent:
+                    element = text_node.parent
+                    
+                    # Skip if from suggested products area
+                    if is_suggested_product_area(element):
+                        continue
+                    
+                    price_match = PRICE_RE.search(str(text_node))
+                    if price_match:
+                        price_value = price_match.group(0)
+                        
+                        computed = computed_styles.lookup(element) if computed_styles else None
+                        if computed is not None:
+                            if not computed['visible']:
+                                continue
+                            is_crossed = computed['line_through']
+                        else:
+                            # Skip if element or parent has crossed-out indicators
+                            element_classes = ' '.join(element.get('class', [])).lower()
+                            parent_classes = ' '.join(element.parent.get('class', [])).lower() if element.parent else ''
+                            
+                            is_crossed = any(indicator in element_classes or indicator in parent_classes 
+                                           for indicator in ['strike', 'crossed', 'was', 'old', 'original', 'regular'])
+                            
+                            if element.name in ['s', 'del'] or element.parent and element.parent.name in ['s', 'del']:
+                                is_crossed = True
+                        
+                        if not is_crossed:  # Only consider non-crossed-out prices
+                            confidence = calculate_main_product_confidence(element, 'current_price', is_crossed, computed)
+                            price_candidates.append({
+                                'value': price_value,
+                                'confidence': confidence,
+                                'element': element
+                            })
+            
+            if price_candidates:
+                # Sort by confidence and take the best one
+                price_candidates.sort(key=lambda x: x['confidence'], reverse=True)
+                best_candidate = price_candidates[0]
+                price_data['current_price'] = best_candidate['value']
+                price_data['best_price'] = best_candidate['value']
+                price_data['price_type'] = 'regular'
+        
+        return price_data
+        
+    except Exception as e:
+        print(f"Error extracting price from {url}: {str(e)}")
+        return {
+            'current_price': None,
+            'original_price': None,
+            'sale_price': None,
+            'price_type': 'error',
+            'discount_percentage': None,
+            'best_price': None
+        }
+
+def calculate_price_confidence(element, price_type, is_crossed_out, computed=None):
+    """Calculate confidence score for price based on element attributes"""
+    confidence = 50  # Base confidence
+    
+    # Reduce confidence for crossed-out prices
+    if is_crossed_out:
+        confidence -= 30
+    
+    # Increase confidence for sale price indicators
+    element_classes = ' '.join(element.get('class', [])).lower()
+    element_text = element.get_text().lower()
+    
+    sale_indicators = ['sale', 'discount', 'offer', 'special', 'deal', 'reduced', 'now']
+    original_indicators = ['was', 'orig', 'regular', 'list', 'rrp', 'msrp']
+    
+    if price_type == 'sale_price':
+        if any(indicator in element_classes or indicator in element_text for indicator in sale_indicators):
+            confidence += 20
+        if any(indicator in element_classes or indicator in element_text for indicator in original_indicators):
+            confidence -= 15
+    
+    elif price_type == 'original_price':
+        if any(indicator in element_classes or indicator in element_text for indicator in original_indicators):
+            confidence += 20
+        if any(indicator in element_classes or indicator in element_text for indicator in sale_indicators):
+            confidence -= 15
+    
+    # Check element prominence (font size, position)
+    if computed is not None:
+        # Rendered font size against the page's largest price
+        if computed['relative_size'] >= 0.9:
+            confidence += 10
+        elif computed['relative_size'] <= 0.7:
+            confidence -= 10
+        if computed['above_fold']:
+            confidence += 5
+    else:
+        style = element.get('style', '')
+        if 'font-size' in style:
+            # Larger fonts typically indicate more prominent prices
+            if any(size in style for size in ['large', 'xl', '2em', '1.5em']):
+                confidence += 10
+            elif any(size in style for size in ['small', 'xs', '0.8em', '0.9em']):
+                confidence -= 10
+    
+    # Check for price position context
+    parent = element.parent
+    if parent:
+        parent_classes = ' '.join(parent.get('class', [])).lower()
+        if 'price-box' in parent_classes or 'price-container' in parent_classes:
+            confidence += 15
+    
+    return max(0, min(100, confidence))  # Clamp between 0-100
+
+def document_root(element):
+    """The BeautifulSoup object (or detached root) element belongs to"""
+    root = element
+    while root.parent is not None:
+        root = root.parent
+    return root
+
+def document_memo(element, name):
+    """A memo dict shared by every node of element's document, keyed by id(node)"""
+    memos = document_root(element).__dict__.setdefault('_extract_memos', {})
+    return memos.setdefault(name, {})
+
+# Per-node subtree statistics, computed for a whole page in one bottom-up
+# pass: price strings and product links under the node (as counted by
+# find_all(text=PRICE_RE) and find_all('a', href=True)), the length of
+# get_text().strip(), and whether the node carries Product schema markup.
+# length/lead/trail are the unstripped text length and its leading and
+# trailing whitespace, which is what lets parents be stripped without
+# rebuilding their text
+SubtreeStats = namedtuple('SubtreeStats', 'price_texts links text_length product_schema length lead trail')
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+def has_default_text_types(tag):
+    """Whether tag.get_text() reads plain strings (not script/style/template contents)"""
+    types = tag.interesting_string_types
+    return isinstance(types, (tuple, list, set, frozenset)) and set(types) == set(TEXT_STRING_TYPES)
+
+def compute_subtree_stats(top, memo):
+    """Fill memo with SubtreeStats for top and every node under it"""
+    for node in reversed([top, *top.descendants]):
+        if isinstance(node, NavigableString):
+            length = lead = trail = 0
+            if type(node) in TEXT_STRING_TYPES:
+                length = len(node)
+                lead = length - len(node.lstrip())
+                trail = length - len(node.rstrip())
+            price_texts = 1 if PRICE_RE.search(node) else 0
+            memo[id(node)] = SubtreeStats(price_texts, 0, length - lead - trail if lead < length else 0,
+                                          False, length, lead, trail)
+            continue
+        
+        price_texts = links = length = lead = trail = 0
+        for child in node.contents:
+            child_stats = memo[id(child)]
+            price_texts += child_stats.price_texts
+            links += child_stats.links
+            if child.name == 'a' and child.get('href') is not None:
+                links += 1
+            # strip() of the concatenation: leading whitespace runs on while
+            # everything so far is whitespace, trailing restarts at any text
+            if lead == length:
+                lead = length + child_stats.lead
+            if child_stats.trail < child_stats.length:
+                trail = child_stats.trail
+            else:
+                trail += child_stats.length
+            length += child_stats.length
+        
+        if has_default_text_types(node):
+            text_length = length - lead - trail if lead < length else 0
+        else:
+            text_length = len(node.get_text().strip())
+        product_schema = bool(node.get('itemtype') and 'Product' in node.get('itemtype', ''))
+        memo[id(node)] = SubtreeStats(price_texts, links, text_length, product_schema, length, lead, trail)
+
+def subtree_stats(node):
+    """SubtreeStats for a node; the first call computes them for the whole page"""
+    memo = document_memo(node, 'subtree_stats')
+    stats = memo.get(id(node))
+    if stats is None:
+        compute_subtree_stats(document_root(node), memo)
+        stats = memo.get(id(node))
+        if stats is None:
+            compute_subtree_stats(node, memo)
+            stats = memo[id(node)]
+    return stats
+
+def node_identity(node):
+    """Lowercased class string and id of a node"""
+    return ' '.join(node.get('class', [])).lower(), node.get('id', '').lower()
+
+def detect_main_product_area(soup):
+    """Detect the main product area to avoid suggested/related products"""
+    main_product_selectors = [
+        # Amazon main product area
+        '#dp-container', '#feature-bullets', '#apex_desktop', '#centerCol',
+        '.a-section[data-feature-name="detailBullets"]', '#productDetails_feature_div',
+        '#ppd', '#dp', '#detail-main', '#detail-bullets', '#feature-bullets',
+        
+        # Generic main product containers
+        '.product-main', '.product-detail', '.product-info', '.main-product',
+        '.product-container', '.product-wrapper', '.pd-wrap', '.pdp-container',
+        '.product-details-main', '.product-page-main', '.item-details',
+        '.product-content', '.product-summary', '.product-overview',
+        
+        # E-commerce specific patterns
+        '[data-testid="product-container"]', '[data-testid="main-product"]',
+        '[data-automation-id="product-main"]', '.js-product-container',
+        '[data-module="ProductDetails"]', '[data-component="ProductInfo"]',
+        
+        # John Lewis / Currys / Argos specific
+        '.product-overview', '.product-summary', '.product-hero',
+        '.pdp-product-overview', '.product-information-wrapper',
+        '.product-details-container', '.product-info-main',
+        
+        # ASOS / Next / Zara patterns
+        '.product-hero', '.pdp-product', '.product-detail-wrapper',
+        '.product-information', '.product-details-wrapper',
+        
+        # eBay patterns
+        '.x-buybox', '.notranslate', '#mainContent', '.vim',
+        
+        # Shopify patterns
+        '.product-single', '.product-form', '.product-detail',
+        '.shopify-section', '[data-section-type="product"]',
+        
+        # WooCommerce patterns
+        '.woocommerce-product-details', '.product', '.single-product',
+        '.woocommerce .product', '.product-summary',
+        
+        # Schema.org product containers
+        '[itemtype*="Product"]', '[itemscope][itemtype*="Product"]',
+        
+        # Common content areas
+        '#content', '#main-content', '.main-content', '.content-main',
+        '.page-content', '.container-main', '#primary-content'
+    ]
+    
+    # Try to find main product area with higher specificity first
+    for selector in main_product_selectors:
+        main_area = soup.select_one(selector)
+        if main_area:
+            # Validate that this area actually contains product information
+            area_text = main_area.get_text().lower()
+            product_indicators = ['price', 'buy', 'add to cart', 'purchase', 'description']
+            
+            if any(indicator in area_text for indicator in product_indicators):
+                return main_area
+    
+    # Fallback: try to identify by largest content area with product info
+    potential_areas = soup.find_all(['div', 'section', 'article', 'main'], class_=True)
+    scored_areas = []
+    
+    for area in potential_areas:
+        score = score_product_area(area)
+        if score > 30:  # Minimum threshold
+            scored_areas.append((area, score))
+    
+    if scored_areas:
+        # Return the highest scoring area
+        scored_areas.sort(key=lambda x: x[1], reverse=True)
+        return scored_areas[0][0]
+    
+    # Last resort: return body (full page) but with warning
+    return soup
+
+def score_product_area(element):
+    """Score an element's likelihood of being the main product area"""
+    score = 0
+    
+    # Check classes for product indicators
+    classes = ' '.join(element.get('class', [])).lower()
+    
+    # Positive indicators
+    product_indicators = [
+        'product', 'item', 'detail', 'main', 'primary', 'hero', 'overview',
+        'summary', 'information', 'description', 'specification'
+    ]
+    
+    for indicator in product_indicators:
+        if indicator in classes:
+            score += 15
+    
+    stats = subtree_stats(element)
+    
+    # Check for price elements (good sign)
+    score += min(stats.price_texts * 5, 20)  # Cap at 20 points
+    
+    # Check for product schema
+    if stats.product_schema:
+        score += 25
+    
+    # Check size (larger areas more likely to be main product)
+    text_length = stats.text_length
+    if text_length > 500:
+        score += 10
+    elif text_length > 1000:
+        score += 15
+    
+    # Negative indicators (likely suggested products)
+    negative_indicators = [
+        'suggest', 'recommend', 'related', 'similar', 'also', 'bought',
+        'viewed', 'cross-sell', 'upsell', 'bundle', 'accessory'
+    ]
+    
+    for negative in negative_indicators:
+        if negative in classes:
+            score -= 20
+    
+    # Check for multiple product links (suggests listing/suggestions)
+    if stats.links > 5:  # Too many links suggests it's a listing
+        score -= 10
+    
+    return score
+
+# Ancestor markers for is_suggested_product_area: a close ancestor matching a
+# main-product confirmation clears an element outright, otherwise any of the
+# suggestion markers on an ancestor (or the element itself) flags it
+MAIN_PRODUCT_CONFIRMATIONS = [
+    'centerCol', 'dp-container', 'feature-bullets', 'product-main',
+    'main-product', 'product-detail', 'buybox', 'product-summary'
+]
+
+# Enhanced suggested product text patterns
+SUGGESTION_PATTERNS = [
+    'customers who bought', 'also bought', 'you might like', 'you may also like',
+    'recommended', 'related products', 'similar items', 'similar products',
+    'frequently bought together', 'customers also viewed', 'people also bought',
+    'inspired by your', 'because you viewed', 'suggestions', 'recommended for you',
+    'cross-sell', 'upsell', 'bundle', 'add-on', 'accessory', 'accessories',
+    'complete your look', 'goes well with', 'pair with', 'bundle deals',
+    'other customers', 'shoppers also', 'more like this', 'you might also need',
+    'trending now', 'best sellers', 'top picks', 'featured products',
+    'sponsored', 'advertisement', 'ad ', 'promoted', 'compare with similar',
+    'alternative products', 'other options', 'more choices', 'explore similar',
+    'recently viewed', 'your history', 'continue shopping', 'shop more'
+]
+
+# Enhanced CSS class/ID indicators (but exclude main product areas)
+SUGGESTION_IDENTIFIERS = [
+    'recommend', 'suggest', 'related', 'similar', 'also', 'other',
+    'cross-sell', 'upsell', 'bundle', 'accessory', 'addon', 'add-on',
+    'carousel', 'slider', 'grid-item', 'tile', 'card-grid',
+    'recently-viewed', 'trending', 'featured', 'sponsored', 'ad-',
+    'promotion', 'promo', 'deal-', 'offer-', 'sale-grid', 'product-grid',
+    'listing', 'catalog', 'search-result', 'filter-result',
+    'sidebar', 'aside', 'footer-products', 'header-products'
+]
+
+# Specific e-commerce suggestion containers
+ECOMMERCE_SUGGESTION_PATTERNS = [
+    'recommendations', 'similar-products', 'related-items', 
+    'also-bought', 'you-might-like', 'frequently-together',
+    'cross-sells', 'up-sells', 'product-recommendations',
+    'recommended-products', 'suggestion-container', 'rec-container'
+]
+
+def is_main_product_node(node):
+    """Whether a node's class or id confirms it as the main product area"""
+    memo = document_memo(node, 'main_product_node')
+    verdict = memo.get(id(node))
+    if verdict is None:
+        classes, node_id = node_identity(node)
+        verdict = any(confirmation in classes or confirmation in node_id
+                      for confirmation in MAIN_PRODUCT_CONFIRMATIONS)
+        memo[id(node)] = verdict
+    return verdict
+
+def is_suggestion_node(node):
+    """Whether a node's text, class or id marks it as a suggestions container"""
+    memo = document_memo(node, 'suggestion_node')
+    verdict = memo.get(id(node))
+    if verdict is None:
+        classes, node_id = node_identity(node)
+        text = node.get_text().lower()
+        verdict = (
+            any(pattern in text or pattern in classes or pattern in node_id for pattern in SUGGESTION_PATTERNS)
+            or any(identifier in classes or identifier in node_id for identifier in SUGGESTION_IDENTIFIERS)
+            or any(pattern in classes or pattern in node_id or
+                   pattern.replace('-', '_') in classes or pattern.replace('-', '') in classes
+                   for pattern in ECOMMERCE_SUGGESTION_PATTERNS)
+        )
+        memo[id(node)] = verdict
+    return verdict
+
+def is_listing_node(node):
+    """Whether a node holds several product links or prices, like a listing"""
+    memo = document_memo(node, 'listing_node')
+    verdict = memo.get(id(node))
+    if verdict is None:
+        stats = subtree_stats(node)
+        verdict = stats.links > 4 or stats.price_texts > 3
+        memo[id(node)] = verdict
+    return verdict
+
+def is_suggested_product_area(element):
+    """Check if an element is likely from suggested/related products section"""
+    memo = document_memo(element, 'suggested_area')
+    verdict = memo.get(id(element))
+    if verdict is None:
+        verdict = classify_suggested_product_area(element)
+        memo[id(element)] = verdict
+    return verdict
+
+def classify_suggested_product_area(element):
+    ancestors = []
+    current = element.parent
+    while current is not None and len(ancestors) < 5:
+        ancestors.append(current)
+        current = current.parent
+    
+    # First check if element is in a confirmed main product area
+    if any(is_main_product_node(ancestor) for ancestor in ancestors[:3]):
+        return False  # Definitely not a suggestion area
+    if not ancestors:
+        return False
+    
+    # The element's own class and id
+    classes, element_id = node_identity(element)
+    if any(pattern in classes or pattern in element_id for pattern in SUGGESTION_PATTERNS):
+        return True
+    if any(identifier in classes or identifier in element_id for identifier in SUGGESTION_IDENTIFIERS):
+        return True
+    
+    # Check parent elements up to 5 levels for suggestion indicators, and
+    # close parents for many product links (indicates listing/suggestions)
+    for level, ancestor in enumerate(ancestors):
+        if is_suggestion_node(ancestor) or (level <= 2 and is_listing_node(ancestor)):
+            return True
+    
+    return False
+
+def calculate_main_product_confidence(element, price_type, is_crossed_out, computed=None):
+    """Enhanced confidence calculation for main product area pricing"""
+    confidence = calculate_price_confidence(element, price_type, is_crossed_out, computed)
+    
+    # HEAVILY penalize if element is in suggested product area
+    if is_suggested_product_area(element):
+        confidence -= 70  # Increased penalty from 50 to 70
+        return max(0, confidence)  # Early return for suggested products
+    
+    # Major bonus for being in main product context
+    current = element
+    main_product_bonus = 0
+    
+    for level in range(7):  # Check up to 7 parent levels
+        if current.parent:
+            current = current.parent
+            parent_classes = ' '.join(current.get('class', [])).lower()
+            parent_id = current.get('id', '').lower()
+            
+            # Main product area indicators with different weights
+            primary_indicators = [
+                ('product-main', 25), ('main-product', 25), ('product-detail', 20),
+                ('product-info', 20), ('product-container', 18), ('product-summary', 22),
+                ('product-overview', 20), ('centerCol', 30), ('dp-container', 30),
+                ('feature-bullets', 25), ('pdp-container', 22)
+            ]
+            
+            secondary_indicators = [
+                ('product-wrapper', 15), ('pd-wrap', 15), ('product-content', 18),
+                ('item-details', 15), ('product-hero', 20), ('buybox', 25),
+                ('product-form', 18), ('main-content', 12), ('primary-content', 15)
+            ]
+            
+            # Check primary indicators (higher bonus)
+            for indicator, bonus in primary_indicators:
+                if indicator in parent_classes or indicator in parent_id:
+                    main_product_bonus = max(main_product_bonus, bonus)
+                    break
+            
+            # Check secondary indicators if no primary found
+            if main_product_bonus == 0:
+                for indicator, bonus in secondary_indicators:
+                    if indicator in parent_classes or indicator in parent_id:
+                        main_product_bonus = max(main_product_bonus, bonus)
+            
+            # Special bonus for schema.org product markup
+            if current.get('itemtype') and 'Product' in current.get('itemtype', ''):
+                main_product_bonus = max(main_product_bonus, 20)
+            
+            # Bonus for data attributes indicating main product
+            data_attrs = ['data-testid', 'data-automation-id', 'data-component', 'data-module']
+            for attr in data_attrs:
+                attr_value = current.get(attr, '').lower()
+                if any(term in attr_value for term in ['product', 'main', 'detail', 'info']):
+                    main_product_bonus = max(main_product_bonus, 15)
+                    break
+        else:
+            break
+    
+    confidence += main_product_bonus
+    
+    # Enhanced position-based scoring
+    page_position_score = 0
+    try:
+        # Calculate element depth and sibling position
+        depth = 0
+        sibling_position = 0
+        current = element
+        
+        # Get sibling position (earlier elements are more likely main product)
+        if element.parent:
+            siblings = list(element.parent.children)
+            sibling_position = next((i for i, sibling in enumerate(siblings) if sibling == element), 0)
+        
+        # Calculate depth from root
+        while current.parent and depth < 15:
+            depth += 1
+            current = current.parent
+        
+        # Scoring based on position heuristics
+        if depth < 6:  # Very shallow = likely main content
+            page_position_score = 15
+        elif depth < 10:  # Reasonable depth
+            page_position_score = 8
+        elif depth < 15:  # Deep but acceptable
+            page_position_score = 3
+        
+        # Bonus for being among first elements (early in DOM)
+        if sibling_position < 3:
+            page_position_score += 5
+        
+    except:
+        pass
+    
+    confidence += page_position_score
+    
+    # Enhanced container analysis
+    parent_container = element.parent
+    if parent_container:
+        container_stats = subtree_stats(parent_container)
+        
+        # Count prices in same container
+        sibling_prices = container_stats.price_texts
+        
+        # Penalize containers with too many prices (suggests listing)
+        if sibling_prices > 4:
+            confidence -= 20
+        elif sibling_prices > 2:
+            confidence -= 10
+        
+        # Check container size (larger containers more likely main product)
+        container_text_length = container_stats.text_length
+        if container_text_length > 1000:  # Large container
+            confidence += 8
+        elif container_text_length > 500:  # Medium container
+            confidence += 5
+        elif container_text_length < 100:  # Very small container (suspicious)
+            confidence -= 5
+    
+    # Price type specific adjustments
+    if price_type == 'sale_price' and not is_crossed_out:
+        confidence += 5  # Prefer clear sale prices
+    elif price_type == 'current_price' and not is_crossed_out:
+        confidence += 3  # Prefer current prices over crossed-out
+    
+    return max(0, min(100, confidence))  # Clamp between 0-100
+
+def extract_structured_prices(data):
+    """Extract prices from JSON-LD structured data with type detection"""
+    from typing import Dict, Any
+    prices: Dict[str, Any] = {'current_price': None, 'original_price': None, 'sale_price': None}
+    
+    def find_prices_recursive(obj):
+        if isinstance(obj, list):
+            for item in obj:
+                result = find_prices_recursive(item)
+                if result:
+                    return result
+        elif isinstance(obj, dict):
+            # Check if this object has @graph
+            if "@graph" in obj:
+                return find_prices_recursive(obj["@graph"])
+            
+            # Check if this is a product/offer object
+            if obj.get("@type") in ("Product", "Offer", "AggregateOffer"):
+                # Check offers array
+                if "offers" in obj:
+                    offers = obj["offers"]
+                    if isinstance(offers, list) and offers:
+                        offers = offers[0]
+                    
+                    if isinstance(offers, dict):
+                        # Look for different price types
+                        if "price" in offers:
+                            prices['current_price'] = str(offers["price"])
+                        if "highPrice" in offers:
+                            prices['original_price'] = str(offers["highPrice"])
+                        if "lowPrice" in offers:
+                            prices['sale_price'] = str(offers["lowPrice"])
+                        
+                        # Return if we found prices
+                        if any(prices.values()):
+                            return prices
+                
+                # Check direct price
+                if "price" in obj:
+                    prices['current_price'] = str(obj["price"])
+                    return prices
+    
+    result = find_prices_recursive(data)
+    if result and any(result.values()):
+        # Determine best price and type
+        if result['sale_price']:
+            result['best_price'] = result['sale_price']
+            result['price_type'] = 'sale'
+        elif result['current_price']:
+            result['best_price'] = result['current_price']
+            result['price_type'] = 'regular'
+        return result
+    return None
+
+def analyze_price_relationships(extracted_prices, soup):
+    """Analyze extracted prices to determine relationships and select best price"""
+    price_data = {
+        'current_price': None,
+        'original_price': None,
+        'sale_price': None,
+        'price_type': 'unknown',
+        'discount_percentage': None,
+        'best_price': None
+    }
+    
+    # Sort prices by confidence score (highest first)
+    for price_type in extracted_prices:
+        if extracted_prices[price_type]:
+            extracted_prices[price_type].sort(key=lambda x: x.get('confidence', 0), reverse=True)
+    
+    # Process sale prices (highest priority) - exclude crossed-out prices
+    sale_prices = [p for p in extracted_prices.get('sale_price', []) if not p.get('is_crossed', False)]
+    if sale_prices:
+        best_sale = sale_prices[0]
+        sale_price = best_sale['value']
+        price_data['sale_price'] = sale_price
+        price_data['best_price'] = sale_price
+        price_data['price_type'] = 'sale'
+    
+    # Process original prices - prefer crossed-out or "was" prices
+    original_prices = extracted_prices.get('original_price', [])
+    if original_prices:
+        # Prefer crossed-out prices for original price
+        crossed_originals = [p for p in original_prices if p.get('is_crossed', False)]
+        if crossed_originals:
+            original_price = crossed_originals[0]['value']
+        else:
+            original_price = original_prices[0]['value']
+        price_data['original_price'] = original_price
+        
+        # If we have both sale and original, calculate discount
+        if price_data['sale_price']:
+            try:
+                sale_val = parse_price_value(price_data['sale_price'])
+                orig_val = parse_price_value(original_price)
+                if sale_val and orig_val and orig_val > sale_val:
+                    discount = ((orig_val - sale_val) / orig_val) * 100
+                    price_data['discount_percentage'] = round(discount, 1)
+            except:
+                pass
+    
+    # Process current prices (if no sale price found) - exclude crossed-out prices
+    if not price_data['best_price']:
+        current_prices = [p for p in extracted_prices.get('current_price', []) if not p.get('is_crossed', False)]
+        if current_prices:
+            best_current = current_prices[0]
+            current_price = best_current['value']
+            price_data['current_price'] = current_price
+            price_data['best_price'] = current_price
+            
+            # Check if there's an original price higher than current (indicating sale)
+            if price_data['original_price']:
+                try:
+                    curr_val = parse_price_value(current_price)
+                    orig_val = parse_price_value(price_data['original_price'])
+                    if curr_val and orig_val and orig_val > curr_val:
+                        price_data['price_type'] = 'discounted'
+                        discount = ((orig_val - curr_val) / orig_val) * 100
+                        price_data['discount_percentage'] = round(discount, 1)
+                    else:
+                        price_data['price_type'] = 'regular'
+                except:
+                    price_data['price_type'] = 'regular'
+            else:
+                price_data['price_type'] = 'regular'
+    
+    # Final fallback: use any available price (even crossed-out if nothing else)
+    if not price_data['best_price']:
+        all_prices = []
+        for price_type_list in extracted_prices.values():
+            all_prices.extend(price_type_list)
+        
+        if all_prices:
+            # Sort by confidence and prefer non-crossed prices
+            all_prices.sort(key=lambda x: (not x.get('is_crossed', False), x.get('confidence', 0)), reverse=True)
+            best_available = all_prices[0]
+            price_data['best_price'] = best_available['value']
+            price_data['current_price'] = best_available['value']
+            price_data['price_type'] = 'regular' if not best_available.get('is_crossed', False) else 'uncertain'
+    
+    return price_data
+
+def extract_price_from_html(html_content, url):
+    """Legacy function - extract simple price from HTML content"""
+    price_data = extract_price_with_type(html_content, url)
+    return price_data['best_price'] if price_data else None
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Strategy 1: JSON-LD structured data
+        json_scripts = soup.find_all('script', type='application/ld+json')
+        for script in json_scripts:
+            try:
+                data = json.loads(script.string)
+                price = extract_price_from_jsonld_data(data)
+                if price:
+                    return price
+            except:
+                continue
+        
+        # Strategy 2: Common price selectors
+        price_selectors = [
+            '.price', '.product-price', '.woocommerce-Price-amount', '.amount',
+            '[itemprop="price"]', '[data-price]', '.price-current', '.sale-price',
+            '.regular-price', '.product-price-value', '.price-box .price',
+            '.price-range .price', '.product-price .price'
+        ]
+        
+        for selector in price_selectors:
+            elements = soup.select(selector)
+            for element in elements:
+                text = element.get_text().strip()
+                if text and PRICE_RE.search(text):
+                    match = PRICE_RE.search(text)
+                    if match:
+                        return match.group(0)
+        
+        # Strategy 3: Text pattern matching in entire HTML
+        price_match = PRICE_RE.search(html_content)
+        if price_match:
+            return price_match.group(0)
+            
+        return None
+        
+    except Exception as e:
+        print(f"Error extracting price from {url}: {str(e)}")
+        return None
+
+def extract_price_from_jsonld_data(data):
+    """Extract price from JSON-LD structured data"""
+    if isinstance(data, list):
+        for item in data:
+            price = extract_price_from_jsonld_data(item)
+            if price:
+                return price
+    elif isinstance(data, dict):
+        # Check if this object has @graph
+        if "@graph" in data:
+            return extract_price_from_jsonld_data(data["@graph"])
+        
+        # Check if this is a product/offer object
+        if data.get("@type") in ("Product", "Offer", "AggregateOffer"):
+            # Check offers
+            if "offers" in data:
+                offers = data["offers"]
+                if isinstance(offers, list) and offers:
+                    offers = offers[0]
+                if isinstance(offers, dict) and "price" in offers:
+                    return str(offers["price"])
+            
+            # Check direct price
+            if "price" in data:
+                return str(data["price"])
+    
+    return None
+
+class StreamScanner:
+    """Collects a streamed response body and decides when enough has been read"""
+    
+    def __init__(self, max_bytes=STREAM_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.stopped_early = False
+        self.truncated = False
+        self._scan_from = 0
+    
+    def feed(self, chunk):
+        """Add a chunk; return True when the rest of the body is not needed"""
+        self.buffer.extend(chunk)
+        
+        if self._has_priced_jsonld():
+            self.stopped_early = True
+            return True
+        if len(self.buffer) >= self.max_bytes:
+            self.truncated = True
+            return True
+        return False
+    
+    def drain_limit(self, headers):
+        """Return how much more of the body to read so its connection can be reused (0: drop it)"""
+        try:
+            remaining = int(headers.get('Content-Length')) - len(self.buffer)
+        except (TypeError, ValueError):
+            return STREAM_DRAIN_MAX_BYTES  # length unknown: read up to the cap and see
+        if headers.get('Content-Encoding'):
+            return STREAM_DRAIN_MAX_BYTES  # decoded bytes don't tell how much is left
+        return remaining if remaining <= STREAM_DRAIN_MAX_BYTES else 0
+    
+    def _has_priced_jsonld(self):
+        # The same scan extract_price_with_type runs, resumed where the last
+        # chunk left off; a span split across chunks is picked up once it ends
+        for block, end in scan_jsonld_spans(self.buffer, self._scan_from):
+            self._scan_from = end
+            if block is None:
+                continue
+            try:
+                structured_prices = extract_structured_prices(json.loads(block))
+            except Exception:
+                continue
+            if structured_prices and structured_prices.get('best_price'):
+                return True
+        return False
+
+def normalize_charset(label):
+    """Map a declared charset label to a Python codec name, or None if unknown"""
+    try:
+        name = codecs.lookup(label.strip().strip('"\'')).name
+    except (LookupError, AttributeError):
+        return None
+    if name in ('latin-1', 'iso8859-1', 'ascii'):
+        return 'cp1252'
+    return name
+
+def resolve_charset(data, content_type=None):
+    """Return (encoding, source) for a response body without decoding it"""
+    if content_type:
+        match = HEADER_CHARSET_RE.search(content_type)
+        encoding = normalize_charset(match.group(1)) if match else None
+        if encoding:
+            return encoding, 'header'
+    
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if data.startswith(bom):
+            return encoding, 'bom'
+    
+    match = META_CHARSET_RE.search(data, 0, CHARSET_SNIFF_BYTES)
+    encoding = normalize_charset(match.group(1).decode('ascii')) if match else None
+    if encoding:
+        # A UTF-16 label read as ASCII bytes can't be right; the page is UTF-8
+        return ('utf-8' if encoding.startswith('utf-16') else encoding), 'meta'
+    
+    try:
+        # Not final: a body cut off by the stream cap may end mid-character
+        codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+        return 'utf-8', 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    
+    detected = requests.compat.chardet.detect(data)['encoding']
+    return normalize_charset(detected) or 'utf-8', 'detected'
+
+def decode_html(data, content_type=None):
+    """Decode a response body using the charset resolved from its bytes"""
+    encoding, _ = resolve_charset(data, content_type)
+    return data.decode(encoding, errors='replace')
+
+class FetchAttempt:
+    """Scheduler, breaker and callback bookkeeping shared by fetch_page and fetch_page_async"""
+    
+    def __init__(self, url, timeout, deadline=None, on_request_sent=None, on_response=None):
+        self.url = url
+        self.host = get_url_host(url)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.on_request_sent = on_request_sent
+        self.on_response = on_response
+        self.status = None
+        self.request_sent = False
+        self.retry_after = None
+        self._sent_at = None
+    
+    def check_circuit(self):
+        """Fail fast for an open host, before it uses any rate tokens or slots"""
+        if not circuit_breaker.allow(self.host):
+            raise CircuitOpenError(f"Circuit open for {self.host}, skipped {self.url}")
+    
+    def start(self):
+        """Mark a request as going out and return its budget, which starts once the slots are ours"""
+        fetch_deadline = self.deadline.within(self.timeout) if self.deadline else Deadline(self.timeout)
+        if self.on_request_sent:
+            self.on_request_sent()
+        self.request_sent = True
+        self._sent_at = time.monotonic()
+        return fetch_deadline
+    
+    def throttled(self, status, headers, attempt):
+        """Record a response's headers; return True if the request should be retried after Retry-After"""
+        domain_scheduler.record_latency(self.host, time.monotonic() - self._sent_at)
+        if self.on_response:
+            self.on_response()
+        self.status = status
+        self.retry_after = throttle_delay(status, headers)
+        return self.retry_after is not None and attempt < THROTTLE_MAX_RETRIES
+    
+    def release(self):
+        """Return the host slot, pausing the host if the server asked us to back off"""
+        domain_scheduler.release(self.host, self.retry_after)
+        self.retry_after = None
+    
+    def result(self, status, headers, scanner):
+        """Record a successful fetch and build fetch_page's return value (scanner is None on a 304)"""
+        record_fetch_outcome(self.host, status)
+        html_content = None if scanner is None else decode_html(bytes(scanner.buffer), headers.get('Content-Type'))
+        return {
+            'status': status,
+            'html': html_content,
+            'bytes_read': 0 if scanner is None else len(scanner.buffer),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified')
+        }
+    
+    def failure(self, error):
+        """Record a failed fetch and return the exception the caller should see"""
+        if isinstance(error, CircuitOpenError):
+            return error
+        # Running out of the request's budget is not the host's fault
+        if self.deadline and self.deadline.expired():
+            return DeadlineExceeded(f"Request deadline exceeded while fetching {self.url}")
+        # Nor is waiting in our own queue; a failure part-way through a 2xx
+        # body still counts against the host
+        error_status = self.status if self.status and self.status >= 400 else None
+        if self.request_sent:
+            record_fetch_outcome(self.host, error_status)
+        return FetchError(f"Failed to fetch {self.url}: {str(error)}", status=error_status,
+                          browser_retryable=error_status is None and browser_may_fix(error))
+    
+    def close(self):
+        """Fire both callbacks once the fetch ends, so a waiter is never left hanging"""
+        if self.on_request_sent:
+            self.on_request_sent()
+        if self.on_response:
+            self.on_response()
+
+def fetch_page(url, timeout=FETCH_TIMEOUT, cached=None, max_bytes=STREAM_MAX_BYTES, deadline=None,
+               on_request_sent=None, on_response=None):
+    """Fetch a page, revalidating against stored validators when given"""
+    fetch = FetchAttempt(url, timeout, deadline, on_request_sent, on_response)
+    try:
+        fetch.check_circuit()
+        for attempt in range(THROTTLE_MAX_RETRIES + 1):
+            domain_scheduler.acquire(fetch.host, deadline)
+            try:
+                fetch_deadline = fetch.start()
+                session = get_http_session(url)
+                with session.get(url, headers=conditional_request_headers(cached), timeout=fetch_deadline.timeout(),
+                                 allow_redirects=True, stream=True) as response:
+                    if fetch.throttled(response.status_code, response.headers, attempt):
+                        continue  # the scheduler holds this host until Retry-After passes
+                    response.raise_for_status()
+                    
+                    scanner = None
+                    if response.status_code != 304:
+                        scanner = StreamScanner(max_bytes)
+                        chunks = response.iter_content(STREAM_CHUNK_SIZE)
+                        for chunk in chunks:
+                            if scanner.feed(chunk):
+                                # A body read to the end hands its connection back
+                                # to the pool on close; a partly read one closes it
+                                drained, limit = 0, scanner.drain_limit(response.headers)
+                                if limit:
+                                    for chunk in chunks:
+                                        drained += len(chunk)
+                                        if drained > limit or fetch_deadline.expired():
+                                            break
+                                break
+                            # requests timeouts are per socket read, so enforce the total here
+                            if fetch_deadline.expired():
+                                raise requests.Timeout("Page body not read within the time budget")
+                    return fetch.result(response.status_code, response.headers, scanner)
+            finally:
+                fetch.release()
+    except Exception as e:
+        raise fetch.failure(e)
+    finally:
+        fetch.close()
+
+def fetch_url_content(url, timeout=FETCH_TIMEOUT):
+    """Fetch URL content with requests (more compatible with serverless)"""
+    return fetch_page(url, timeout)['html']
+
+# Threads for hedged fetches on the blocking path: the primary and its hedge
+# both run here so the caller can wait on whichever finishes first
+_hedge_pool = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS * 2)
+
+def fetch_page_hedged(url, cached=None, deadline=None):
+    """fetch_page, racing a duplicate request when the first is slow to respond"""
+    hedge_after = domain_scheduler.latency_percentile(get_url_host(url), HEDGE_PERCENTILE)
+    if hedge_after is None:
+        return fetch_page(url, cached=cached, deadline=deadline)
+    
+    sent = threading.Event()
+    responded = threading.Event()
+    primary = _hedge_pool.submit(fetch_page, url, cached=cached, deadline=deadline,
+                                 on_request_sent=sent.set, on_response=responded.set)
+    
+    # Time spent queued in the scheduler doesn't count towards the hedge delay
+    sent.wait()
+    if responded.wait(hedge_after) or not domain_scheduler.try_hedge():
+        return primary.result()
+    
+    hedge = _hedge_pool.submit(fetch_page, url, cached=cached, deadline=deadline)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+def extract_page_price_data(url, page, cached):
+    """Get price data for a fetched page, reusing the stored result on a 304"""
+    if page['status'] == 304 and cached:
+        return cached['price_data']
+    
+    price_data = extract_price_with_type(page['html'], url)
+    if price_data and price_data.get('price_type') != 'error':
+        validator_store.put(url, page['etag'], page['last_modified'], price_data)
+    return price_data
+
+def build_price_result(url, price_data):
+    """Build the per-URL result returned by the extraction endpoints"""
+    # Handle case where price_data might be None
+    if not price_data:
+        price_data = {
+            'current_price': None,
+            'original_price': None,
+            'sale_price': None,
+            'price_type': 'error',
+            'discount_percentage': None,
+            'best_price': None
+        }
+    
+    return {
+        'url': url,
+        'price': price_data.get('best_price'),
+        'price_details': {
+            'current_price': price_data.get('current_price'),
+            'original_price': price_data.get('original_price'),
+            'sale_price': price_data.get('sale_price'),
+            'price_type': price_data.get('price_type', 'unknown'),
+            'discount_percentage': price_data.get('discount_percentage')
+        },
+        'status': 'success' if price_data.get('best_price') else 'no_price_found'
+    }
+
+def build_error_result(url, error, status='error'):
+    """Build the per-URL result for a failed extraction"""
+    result = {
+        'url': url,
+        'price': None,
+        'price_details': {
+            'current_price': None,
+            'original_price': None,
+            'sale_price': None,
+            'price_type': 'error',
+            'discount_percentage': None
+        },
+        'status': status,
+        'error': str(error)
+    }
+    if getattr(error, 'browser_retryable', False):
+        result['browser_retryable'] = True
+    return result
+
+def build_timed_out_result(url):
+    """Build the per-URL result for a URL the request deadline cut off"""
+    return build_error_result(url, 'Request deadline exceeded before this URL finished', status='timed_out')
+
+def looks_client_rendered(html):
+    """Return True if a page looks like a JavaScript app shell rather than server-rendered content"""
+    if not html or 'application/ld+json' in html:
+        return False
+    if APP_SHELL_RE.search(html):
+        return True
+    text = TAG_RE.sub(' ', NON_TEXT_BLOCK_RE.sub(' ', html))
+    return len(' '.join(text.split())) < CLIENT_RENDERED_TEXT_CHARS and '<script' in html.lower()
+
+def build_static_result(url, page, price_data):
+    """Build the result for a statically fetched page, flagging client-rendered pages"""
+    result = build_price_result(url, price_data)
+    if result['status'] == 'success' and looks_client_rendered(page['html']):
+        # A price pulled from an app shell is often a placeholder or teaser
+        result['client_rendered'] = True
+    return result
+
+def extract_single_price(url, deadline=None):
+    """Extract detailed price information from a single URL"""
+    try:
+        cached = validator_store.get(url)
+        fetch = fetch_page_hedged if HEDGE_REQUESTS else fetch_page
+        page = fetch(url, cached=cached, deadline=deadline)
+        if deadline:
+            deadline.timeout()  # no budget left to parse
+        price_data = extract_page_price_data(url, page, cached)
+        return build_static_result(url, page, price_data)
+    except CircuitOpenError as e:
+        return build_error_result(url, e, status='circuit_open')
+    except DeadlineExceeded:
+        return build_timed_out_result(url)
+    except Exception as e:
+        return build_error_result(url, e)
+
+async def fetch_page_async(session, url, semaphore, timeout=FETCH_TIMEOUT, cached=None,
+                           max_bytes=STREAM_MAX_BYTES, deadline=None, on_request_sent=None, on_response=None):
+    """Fetch a page on the event loop, bounded by the host slot and in-flight semaphore"""
+    fetch = FetchAttempt(url, timeout, deadline, on_request_sent, on_response)
+    try:
+        fetch.check_circuit()
+        for attempt in range(THROTTLE_MAX_RETRIES + 1):
+            # Wait for the host before taking a global slot, so a throttled
+            # retailer cannot hold slots other hosts could be using
+            await domain_scheduler.acquire_async(fetch.host, deadline)
+            try:
+                async with semaphore:
+                    fetch_deadline = fetch.start()
+                    client_timeout = aiohttp.ClientTimeout(total=fetch_deadline.timeout())
+                    async with session.get(url, headers=conditional_request_headers(cached),
+                                           timeout=client_timeout, allow_redirects=True) as response:
+                        if fetch.throttled(response.status, response.headers, attempt):
+                            continue  # the scheduler holds this host until Retry-After passes
+                        response.raise_for_status()
+                        
+                        scanner = None
+                        if response.status != 304:
+                            scanner = StreamScanner(max_bytes)
+                            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                                if scanner.feed(chunk):
+                                    # As in fetch_page: a short remainder is read so the
+                                    # connection is released to the pool, not closed
+                                    drained, limit = 0, scanner.drain_limit(response.headers)
+                                    if limit:
+                                        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                                            drained += len(chunk)
+                                            if drained > limit:
+                                                break
+                                    if not limit or drained > limit:
+                                        response.close()
+                                    break
+                        return fetch.result(response.status, response.headers, scanner)
+            finally:
+                fetch.release()
+    except Exception as e:
+        raise fetch.failure(e)
+    finally:
+        fetch.close()
+
+async def fetch_page_hedged_async(session, url, semaphore, cached=None, deadline=None):
+    """fetch_page_async, racing a duplicate request when the first is slow to respond"""
+    hedge_after = domain_scheduler.latency_percentile(get_url_host(url), HEDGE_PERCENTILE)
+    if hedge_after is None:
+        return await fetch_page_async(session, url, semaphore, cached=cached, deadline=deadline)
+    
+    sent = asyncio.Event()
+    responded = asyncio.Event()
+    primary = asyncio.ensure_future(fetch_page_async(
+        session, url, semaphore, cached=cached, deadline=deadline,
+        on_request_sent=sent.set, on_response=responded.set))
+    
+    # Time spent queued in the scheduler doesn't count towards the hedge delay
+    await sent.wait()
+    try:
+        await asyncio.wait_for(responded.wait(), timeout=hedge_after)
+    except asyncio.TimeoutError:
+        pass
+    if responded.is_set() or not domain_scheduler.try_hedge():
+        return await primary
+    
+    hedge = asyncio.ensure_future(fetch_page_async(session, url, semaphore, cached=cached, deadline=deadline))
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
+
+async def extract_prices_async(urls, deadline):
+    """Fetch every URL concurrently on one event loop and parse pages as they arrive"""
+    semaphore = asyncio.Semaphore(ASYNC_MAX_IN_FLIGHT)
+    connector = aiohttp.TCPConnector(limit=ASYNC_MAX_IN_FLIGHT, limit_per_host=HOST_MAX_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    
+    # Parsing is CPU work, so it runs off the loop to keep fetches flowing
+    parse_pool = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+    try:
+        async with aiohttp.ClientSession(connector=connector, headers={'User-Agent': UA}) as session:
+            async def extract_one(url):
+                try:
+                    cached = await loop.run_in_executor(parse_pool, validator_store.get, url)
+                    fetch = fetch_page_hedged_async if HEDGE_REQUESTS else fetch_page_async
+                    page = await fetch(session, url, semaphore, cached=cached, deadline=deadline)
+                    deadline.timeout()  # no budget left to parse
+                    price_data = await loop.run_in_executor(parse_pool, extract_page_price_data, url, page, cached)
+                    return build_static_result(url, page, price_data)
+                except CircuitOpenError as e:
+                    return build_error_result(url, e, status='circuit_open')
+                except DeadlineExceeded:
+                    return build_timed_out_result(url)
+                except Exception as e:
+                    return build_error_result(url, e)
+            
+            tasks = [asyncio.ensure_future(extract_one(url)) for url in urls]
+            if not tasks:
+                return []
+            done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            
+            return [task.result() if task in done else build_timed_out_result(url)
+                    for task, url in zip(tasks, urls)]
+    finally:
+        # Don't hold the response for parses the deadline already gave up on
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+
+def extract_prices_batch(urls, deadline, prewarm=False):
+    """Extract prices for a batch of URLs, using the asyncio engine when available"""
+    ordered_urls = interleave_by_host(urls)
+    
+    if prewarm:
+        threading.Thread(target=prewarm_hosts, args=(urls, deadline), daemon=True).start()
+    
+    if ASYNC_FETCH_AVAILABLE:
+        results = dict(zip(ordered_urls, asyncio.run(extract_prices_async(ordered_urls, deadline))))
+        return [results[url] for url in urls]
+    
+    # Fallback: blocking fetches on a small thread pool
+    executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS)
+    try:
+        future_to_url = {executor.submit(extract_single_price, url, deadline): url for url in ordered_urls}
+        done, _ = concurrent.futures.wait(future_to_url, timeout=deadline.remaining())
+        
+        results = {}
+        for future, url in future_to_url.items():
+            if future not in done:
+                results[url] = build_timed_out_result(url)
+                continue
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                results[url] = build_error_result(url, e)
+    finally:
+        # Fetches still running stop on their own once the deadline passes
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return [results[url] for url in urls]
+
+class TierMemory:
+    """Per-host memory of which extraction tier last produced a price"""
+    
+    def __init__(self, ttl=TIER_MEMORY_TTL):
+        self.ttl = ttl
+        self._tiers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, host):
+        with self._lock:
+            entry = self._tiers.get(host)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+            return None
+    
+    def record(self, host, tier):
+        with self._lock:
+            self._tiers[host] = (tier, time.monotonic())
+    
+    def forget(self, host):
+        with self._lock:
+            self._tiers.pop(host, None)
+
+tier_memory = TierMemory()
+
+_browser_renderer = None
+_browser_checked = False
+_browser_lock = threading.Lock()
+
+def load_browser_renderer():
+    """Return price_extractor.render_page, or None when the browser tier is unavailable"""
+    global _browser_renderer, _browser_checked
+    with _browser_lock:
+        if not _browser_checked:
+            _browser_checked = True
+            if BROWSER_TIER_ENABLED:
+                try:
+                    from price_extractor import render_page
+                    _browser_renderer = render_page
+                except ImportError as e:
+                    print(f"Browser tier unavailable, extracting statically only: {str(e)}")
+        return _browser_renderer
+
+def needs_browser_tier(result):
+    """Return True if a static result should be retried in the browser"""
+    if result['status'] == 'no_price_found':
+        return True
+    if result['status'] == 'error':
+        # HTTP errors, lookups and refusals fail the same way in a browser
+        return result.get('browser_retryable', False)
+    return result['status'] == 'success' and result.get('client_rendered', False)
+
+def build_browser_result(url, raw_price):
+    """Build the per-URL result from the price text the browser tier returned"""
+    price_data = None
+    if raw_price:
+        match = PRICE_RE.search(raw_price)
+        price = match.group(0) if match else raw_price.strip()
+        price_data = {
+            'current_price': price,
+            'original_price': None,
+            'sale_price': None,
+            'price_type': 'regular',
+            'discount_percentage': None,
+            'best_price': price
+        }
+    return build_price_result(url, price_data)
+
+def extract_rendered_price(url, rendered):
+    """Run the full heuristics on a rendered page, snapshotting it for later re-runs"""
+    if rendered.get('html'):
+        snapshot_store.put(url, rendered['html'], styles=rendered.get('styles'))
+        price_data = extract_price_with_type(rendered['html'], url, rendered.get('styles'))
+        if price_data and price_data.get('best_price'):
+            return build_price_result(url, price_data)
+    return build_browser_result(url, rendered.get('price'))
+
+# Threads for parsing rendered pages. Kept apart from the loop's default
+# executor, which asyncio.run waits on at exit, so a parse the deadline gave
+# up on finishes in the background instead of holding up the response
+_render_parse_pool = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+
+async def render_price(render_page, url, deadline):
+    """Extract one URL's price in the browser tier"""
+    try:
+        rendered = await asyncio.wait_for(render_page(url, deadline=deadline), timeout=deadline.timeout())
+        parse_timeout = deadline.timeout()  # raises when no budget is left to parse
+        loop = asyncio.get_running_loop()
+        parse = loop.run_in_executor(_render_parse_pool, extract_rendered_price, url, rendered)
+        return await asyncio.wait_for(parse, timeout=parse_timeout)
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        return build_timed_out_result(url)
+    except Exception as e:
+        return build_error_result(url, e)
+
+def reextract_snapshots(urls=None, since=None):
+    """Re-run extract_price_with_type over stored rendered snapshots"""
+    results = []
+    for url, captured_at, html, styles in snapshot_store.iter_snapshots(urls, since):
+        result = build_price_result(url, extract_price_with_type(html, url, styles))
+        result['captured_at'] = captured_at
+        results.append(result)
+    return results
+
+def settle_tiers(url, static_result, browser_result):
+    """Pick the final result for a URL and remember which tier worked for its host"""
+    host = get_url_host(url)
+    if browser_result is None:
+        if static_result['status'] == 'success':
+            tier_memory.record(host, TIER_STATIC)
+        result = static_result
+    elif browser_result['status'] == 'success':
+        tier_memory.record(host, TIER_BROWSER)
+        result = browser_result
+    else:
+        # The browser did no better; fall back to what static found, if anything
+        if static_result is None:
+            tier_memory.forget(host)
+        result = static_result or browser_result
+    
+    result['tier'] = TIER_BROWSER if result is browser_result else TIER_STATIC
+    return result
+
+def extract_prices_tiered(urls, deadline, prewarm=False):
+    """Extract prices statically first, escalating to the browser only where needed"""
+    render_page = load_browser_renderer()
+    browser_first = [url for url in urls
+                     if render_page and tier_memory.get(get_url_host(url)) == TIER_BROWSER]
+    skipped = set(browser_first)
+    static_urls = [url for url in urls if url not in skipped]
+    static_results = dict(zip(static_urls, extract_prices_batch(static_urls, deadline, prewarm)))
+    
+    escalated = browser_first
+    if render_page:
+        escalated = browser_first + [url for url in static_urls if needs_browser_tier(static_results[url])]
+    
+    browser_results = {}
+    if escalated and not deadline.expired():
+        async def render_all():
+            return await asyncio.gather(*[render_price(render_page, url, deadline) for url in escalated])
+        browser_results = dict(zip(escalated, asyncio.run(render_all())))
+    
+    return [settle_tiers(url, static_results.get(url), browser_results.get(url)) for url in urls]
+
+async def extract_price_tiered(url, deadline):
+    """Single-URL extract_prices_tiered for callers already on an event loop"""
+    render_page = load_browser_renderer()
+    static_result = None
+    if not render_page or tier_memory.get(get_url_host(url)) != TIER_BROWSER:
+        loop = asyncio.get_running_loop()
+        static_result = await loop.run_in_executor(None, extract_single_price, url, deadline)
+        if not render_page or not needs_browser_tier(static_result) or deadline.expired():
+            return settle_tiers(url, static_result, None)
+    
+    return settle_tiers(url, static_result, await render_price(render_page, url, deadline))
+
+@app.route('/api/extract', methods=['POST'])
+def extract_prices():
+    """Extract prices from multiple URLs"""
+    try:
+        data = request.json or {}
+        urls = data.get('urls', [])
+        
+        if not urls:
+            return jsonify({'error': 'No URLs provided'}), 400
+        
+        # Limit URLs for serverless constraints
+        if len(urls) > 10:
+            return jsonify({'error': 'Maximum 10 URLs allowed per request'}), 400
+        
+        # Fetch concurrently and parse pages as they arrive, within one deadline;
+        # only pages the static tier can't price go to the browser
+        deadline = Deadline(EXTRACT_DEADLINE_SECONDS)
+        results = extract_prices_tiered([url.strip() for url in urls if url.strip()], deadline)
+        
+        return jsonify({
+            'results': results,
+            'total': len(results),
+            'successful': len([r for r in results if r['status'] == 'success']),
+            'failed': len([r for r in results if r['status'] in ('error', 'circuit_open')]),
+            'timed_out': len([r for r in results if r['status'] == 'timed_out'])
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/compare-csv', methods=['POST'])
+def compare_csv_prices():
+    """Process CSV file and compare prices with competitors"""
+    try:
+        # Check if request has file
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        file = request.files['file']
+        if file.filename == '' or file.filename is None:
+            return jsonify({'error': 'No file selected'}), 400
+        
+        if not file.filename.lower().endswith('.csv'):
+            return jsonify({'error': 'File must be a CSV'}), 400
+        
+        # Read and parse CSV content
+        try:
+            csv_content = file.read().decode('utf-8')
+            products = parse_csv_content(csv_content)
+        except Exception as e:
+            return jsonify({'error': f'Error reading CSV: {str(e)}'}), 400
+        
+        if not products:
+            return jsonify({'error': 'No valid products found in CSV. Expected columns: product_name, our_price, and competitor URLs'}), 400
+        
+        # No product limit for local deployment
+        
+        # Fetch every competitor URL in the file as one batch so the asyncio
+        # engine keeps many requests in flight across products
+        all_urls = list(dict.fromkeys(url for product in products for url in product['competitor_urls']))
+        deadline = Deadline(COMPARE_CSV_DEADLINE_SECONDS)
+        
+        extracted_by_url = dict(zip(all_urls, extract_prices_tiered(all_urls, deadline, prewarm=True)))
+        
+        # Process each product
+        results = []
+        for product in products:
+            try:
+                extracted_results = [extracted_by_url[url] for url in product['competitor_urls']]
+                result = process_product_comparison(product, extracted_results)
+                results.append(result)
+            except Exception as e:
+                results.append({
+                    'product_name': product.get('product_name', 'Unknown'),
+                    'our_price': product.get('our_price', 'Unknown'),
+                    'competitor_results': [],
+                    'summary': {},
+                    'status': 'error',
+                    'error': str(e)
+                })
+        
+        # Generate overall summary
+        successful_products = [r for r in results if r['status'] == 'success']
+        total_competitive = len([r for r in successful_products 
+                               if r['summary'].get('overall_recommendation') == 'competitive'])
+        
+        overall_summary = {
+            'total_products': len(products),
+            'successful_comparisons': len(successful_products),
+            'competitive_products': total_competitive,
+            'needs_adjustment': len(successful_products) - total_competitive,
+            'overall_status': 'good' if total_competitive >= len(successful_products) / 2 else 'needs_review',
+            'timed_out_urls': len([r for r in extracted_by_url.values() if r['status'] == 'timed_out'])
+        }
+        
+        return jsonify({
+            'results': results,
+            'summary': overall_summary,
+            'status': 'success'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/')
+def index():
+    """Serve the CSV upload interface"""
+    return render_template('csv_upload.html')
+
+@app.route('/csv-upload')
+def csv_upload_page():
+    """Serve the CSV upload interface"""
+    return render_template('csv_upload.html')
+
+# Vercel handler
+def handler(request):
+    def start_response(status, headers, exc_info=None):
+        # This function should return a write callable, but for Vercel
+        # we can return a simple function that handles bytes
+        def write(data):
+            return data
+        return write
+    
+    # Get the WSGI response
+    response = app(request.environ, start_response)
+    
+    # If response is an iterable, join it into a single response
+    if hasattr(response, '__iter__'):
+        return b''.join(response)
+    return response
+
+# For local development
+if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML parser backends behind extract_price_with_type
+
+Times parsing and full extraction per page for every installed backend and
+checks each one finds exactly what html.parser finds. The corpus is the
+rendered snapshot store by default, or any .html files / directories given
+on the command line:
+
+    python benchmark_parsers.py                 # stored snapshots
+    python benchmark_parsers.py pages/ a.html   # saved pages
+
+Only switch HTML_PARSER away from html.parser once this reports no
+mismatches on a real corpus; the backends repair broken markup differently.
+"""
+
+import os
+import sys
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from api.extract import available_parsers, make_soup, extract_price_with_type, snapshot_store
+
+def load_corpus(paths):
+    """Return (name, html) pairs from the given files/directories, or the snapshot store"""
+    if not paths:
+        return [(url, html) for url, _, html, _ in snapshot_store.iter_snapshots()]
+    
+    pages = []
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(('.html', '.htm')))
+        for file_path in files:
+            with open(file_path, 'rb') as f:
+                pages.append((file_path, f.read().decode('utf-8', errors='replace')))
+    return pages
+
+def time_call(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+def benchmark(pages):
+    parsers = available_parsers()
+    print(f"📄 {len(pages)} pages, {sum(len(html) for _, html in pages) / 1e6:.1f} MB; backends: {', '.join(parsers)}")
+    
+    parse_ms = {parser: [] for parser in parsers}
+    extract_ms = {parser: [] for parser in parsers}
+    mismatches = {parser: [] for parser in parsers}
+    
+    for name, html in pages:
+        baseline = None
+        for parser in reversed(parsers):  # html.parser first, as the reference
+            _, elapsed = time_call(make_soup, html, parser)
+            parse_ms[parser].append(elapsed)
+            result, elapsed = time_call(extract_price_with_type, html, name, parser=parser)
+            extract_ms[parser].append(elapsed)
+            if baseline is None:
+                baseline = result
+            elif result != baseline:
+                mismatches[parser].append(name)
+    
+    print(f"\n{'backend':<12} {'parse p50':>10} {'parse mean':>11} {'extract p50':>12} {'extract mean':>13} {'mismatches':>11}")
+    for parser in parsers:
+        print(f"{parser:<12} {statistics.median(parse_ms[parser]):>8.1f}ms {statistics.mean(parse_ms[parser]):>9.1f}ms "
+              f"{statistics.median(extract_ms[parser]):>10.1f}ms {statistics.mean(extract_ms[parser]):>11.1f}ms "
+              f"{len(mismatches[parser]):>11}")
+    
+    for parser, names in mismatches.items():
+        for name in names:
+            print(f"⚠️  {parser} differs from html.parser on {name}")
+    return mismatches
+
+if __name__ == "__main__":
+    corpus = load_corpus(sys.argv[1:])
+    if not corpus:
+        print("❌ No pages to benchmark: no stored snapshots and no files given")
+        sys.exit(1)
+    sys.exit(1 if any(benchmark(corpus).values()) else 0)
